@@ -0,0 +1,244 @@
+"""Server-computed analytics, maintained incrementally as documents are written.
+
+Each user has one materialized document in the analytics collection. Write
+handlers turn the change they just committed into a $inc delta
+(analytics_update) and apply it, so reading /analytics is a single point
+lookup. rebuild_user_analytics() recomputes the counters from the source
+collections for backfills.
+
+Documents the engine keeps carry metricsVersion. Ones without it hold
+counters clients posted before the engine existed, which deltas must not be
+added to; rebuild_legacy_analytics() recomputes them (and creates the
+missing ones) before the app serves requests.
+
+A unique userId index keeps it to one document per user. Upserts racing
+before that index existed could leave duplicates, each holding part of the
+counts; dedupe_analytics() merges them before the index is created.
+"""
+import re
+from datetime import datetime
+
+from database import (
+    analytics_collection, finances_collection, goals_collection, schedules_collection,
+    tasks_collection, transactions_collection, users_collection
+)
+from revisions import bump
+from rollups import number, record_rollups
+
+# Fields owned by the engine; clients cannot overwrite them through POST /analytics
+SERVER_FIELDS = (
+    'totalTasks', 'tasksCompleted', 'productivityScore', 'eventsScheduled', 'goalsTotal',
+    'goalsCompleted', 'transactionsCount', 'monthlySpending', 'monthlyBudget', 'metricsUpdatedAt',
+    'metricsVersion'
+)
+# Marks documents whose counters the engine maintains
+METRICS_VERSION = 1
+# Users checked per query by rebuild_legacy_analytics()
+LEGACY_BATCH_SIZE = 1000
+
+_MONTH = re.compile(r'^\d{4}-\d{2}')
+
+
+def month_key(transaction):
+    """YYYY-MM bucket of a transaction: its own date if given, else createdAt"""
+    value = transaction.get('date')
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m')
+    if isinstance(value, str) and _MONTH.match(value):
+        return value[:7]
+    return (transaction.get('createdAt') or datetime.utcnow()).strftime('%Y-%m')
+
+
+def _document_delta(kind, document, sign):
+    if kind == 'tasks':
+        return {
+            'totalTasks': sign,
+            'tasksCompleted': sign if document.get('status') == 'completed' else 0
+        }
+    if kind == 'goals':
+        return {
+            'goalsTotal': sign,
+            'goalsCompleted': sign if document.get('status') == 'completed' else 0
+        }
+    if kind == 'schedules':
+        return {'eventsScheduled': sign}
+    if kind == 'transactions':
+        amount = number(document.get('amount'))
+        delta = {'transactionsCount': sign}
+        # Expenses are stored as negative amounts
+        if amount < 0:
+            delta[f'monthlySpending.{month_key(document)}'] = sign * -amount
+        return delta
+    raise ValueError(f'No analytics for {kind}')
+
+
+def analytics_update(kind, before=None, after=None):
+    """The update that moves a user's metrics from `before` to `after`.
+
+    Pass only `after` for an insert, only `before` for a delete and both for an
+    update. Returns None when nothing the engine tracks changed.
+    """
+    inc = {}
+    for document, sign in ((before, -1), (after, 1)):
+        if document is not None:
+            for field, value in _document_delta(kind, document, sign).items():
+                inc[field] = inc.get(field, 0) + value
+    inc = {field: value for field, value in inc.items() if value}
+    if not inc:
+        return None
+    return _metrics_update(inc)
+
+
+def _metrics_update(inc):
+    return {'$inc': inc, '$set': {'metricsUpdatedAt': datetime.utcnow()},
+            '$setOnInsert': {'metricsVersion': METRICS_VERSION}}
+
+
+def budget_update(finance):
+    """Update setting monthlyBudget from a finances document's budgets"""
+    budgets = finance.get('budgets') or []
+    total = sum(number(budget.get('budget')) for budget in budgets if isinstance(budget, dict))
+    return {'$set': {'monthlyBudget': total, 'metricsUpdatedAt': datetime.utcnow()},
+            '$setOnInsert': {'metricsVersion': METRICS_VERSION}}
+
+
+def client_analytics_update(data, now):
+    """The upsert storing client-provided presentation data (weeklyData,
+    insights, ...); server-computed metrics cannot be overwritten"""
+    for field in ('_id', 'id', 'userId', 'createdAt') + SERVER_FIELDS:
+        data.pop(field, None)
+    return {'$set': data, '$setOnInsert': {'createdAt': now, 'metricsVersion': METRICS_VERSION}}
+
+
+def record_change(user_id, kind, before=None, after=None):
+    """Apply one committed write to the user's analytics (and transaction rollups)"""
+    update = analytics_update(kind, before, after)
+    if update:
+        analytics_collection.update_one({'userId': user_id}, update, upsert=True)
+    if kind == 'transactions':
+        record_rollups(user_id, [(before, after)])
+
+
+def record_changes(user_id, kind, changes):
+    """record_change for many (before, after) pairs in a single analytics write"""
+    changes = list(changes)
+    if kind == 'transactions':
+        record_rollups(user_id, changes)
+    inc = {}
+    for before, after in changes:
+        update = analytics_update(kind, before, after)
+        if update:
+            for field, value in update['$inc'].items():
+                inc[field] = inc.get(field, 0) + value
+    inc = {field: value for field, value in inc.items() if value}
+    if inc:
+        analytics_collection.update_one({'userId': user_id}, _metrics_update(inc), upsert=True)
+
+
+def record_budget(user_id, finance):
+    analytics_collection.update_one({'userId': user_id}, budget_update(finance), upsert=True)
+
+
+def with_derived_metrics(analytics):
+    """Add the metrics that are cheap ratios of the stored counters"""
+    if analytics and 'totalTasks' in analytics:
+        total = analytics.get('totalTasks') or 0
+        completed = analytics.get('tasksCompleted') or 0
+        analytics['productivityScore'] = round(completed * 100 / total) if total else 0
+    return analytics
+
+
+def rebuild_user_analytics(user_id):
+    """Recompute every server-owned metric for one user from the raw collections"""
+    query = {'userId': user_id}
+    monthly_spending = {}
+    for transaction in transactions_collection.find(query, {'amount': 1, 'date': 1, 'createdAt': 1}):
+        amount = number(transaction.get('amount'))
+        if amount < 0:
+            month = month_key(transaction)
+            monthly_spending[month] = monthly_spending.get(month, 0) + -amount
+
+    metrics = {
+        'totalTasks': tasks_collection.count_documents(query),
+        'tasksCompleted': tasks_collection.count_documents({**query, 'status': 'completed'}),
+        'eventsScheduled': schedules_collection.count_documents(query),
+        'goalsTotal': goals_collection.count_documents(query),
+        'goalsCompleted': goals_collection.count_documents({**query, 'status': 'completed'}),
+        'transactionsCount': transactions_collection.count_documents(query),
+        'monthlySpending': monthly_spending,
+        'monthlyBudget': 0,
+        'metricsUpdatedAt': datetime.utcnow(),
+        'metricsVersion': METRICS_VERSION
+    }
+    latest_finance = finances_collection.find_one(query, {'budgets': 1}, sort=[('_id', -1)])
+    if latest_finance:
+        metrics['monthlyBudget'] = budget_update(latest_finance)['$set']['monthlyBudget']
+
+    analytics_collection.update_one(query, {'$set': metrics}, upsert=True)
+    bump(user_id, 'analytics')
+    return metrics
+
+
+def rebuild_all_analytics():
+    """Rebuild metrics for every user, returning how many were processed"""
+    count = 0
+    for user in users_collection.find({}, {'_id': 1}):
+        rebuild_user_analytics(str(user['_id']))
+        count += 1
+    return count
+
+
+def rebuild_legacy_analytics(batch_size=LEGACY_BATCH_SIZE):
+    """Rebuild every user whose analytics document is missing or predates the engine, returning how many.
+
+    Users are checked a batch at a time, so memory stays flat however many
+    there are.
+    """
+    rebuilt = 0
+    batch = []
+    for user in users_collection.find({}, {'_id': 1}).sort('_id', 1):
+        batch.append(str(user['_id']))
+        if len(batch) >= batch_size:
+            rebuilt += _rebuild_legacy_batch(batch)
+            batch = []
+    if batch:
+        rebuilt += _rebuild_legacy_batch(batch)
+    return rebuilt
+
+
+def _rebuild_legacy_batch(user_ids):
+    current = {document['userId'] for document in analytics_collection.find(
+        {'userId': {'$in': user_ids}, 'metricsVersion': METRICS_VERSION}, {'userId': 1})}
+    legacy = [user_id for user_id in user_ids if user_id not in current]
+    for user_id in legacy:
+        rebuild_user_analytics(user_id)
+    return len(legacy)
+
+
+def dedupe_analytics():
+    """Merge every user's duplicate analytics documents into one, returning how many users had them.
+
+    The oldest document is kept, with client-provided fields it lacks taken
+    from the newer ones. Each holds only part of the counters, so they are
+    recomputed from the source collections.
+    """
+    duplicates = analytics_collection.aggregate([
+        {'$group': {'_id': '$userId', 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}}
+    ], allowDiskUse=True)
+    users = 0
+    for duplicate in duplicates:
+        documents = list(analytics_collection.find({'_id': {'$in': duplicate['ids']}}).sort('_id', 1))
+        keep, extra = documents[0], documents[1:]
+        merged = {}
+        for document in extra:
+            for field, value in document.items():
+                if field not in keep and field not in merged and field not in SERVER_FIELDS:
+                    merged[field] = value
+        if merged:
+            analytics_collection.update_one({'_id': keep['_id']}, {'$set': merged})
+        analytics_collection.delete_many({'_id': {'$in': [document['_id'] for document in extra]}})
+        if duplicate['_id']:
+            rebuild_user_analytics(duplicate['_id'])
+        users += 1
+    return users
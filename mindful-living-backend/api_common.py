@@ -0,0 +1,324 @@
+"""Request handling shared by app.py (Flask) and async_app.py (Quart).
+
+Nothing here does I/O or depends on the web framework: configuration read
+from the environment, the JWT claims, request parsing and validation, and
+the documents the handlers write. Each app module does its own database
+calls around these, so a rule is changed in one place for both. Importing
+this module starts nothing; the hashing pool, identity cache and
+revocation list are built by each app from the factories below.
+"""
+import base64
+import os
+import re
+import uuid
+from datetime import datetime, time, timedelta
+
+from bson.objectid import ObjectId
+
+from identity import IdentityCache
+from life_block_contents import COLLECTION as CONTENTS_COLLECTION, normalize_contents, stamp_new_contents
+from passwords import PasswordHasher
+from revocation import RevocationList
+
+# Answer to a valid token whose user was deleted or deactivated
+ACCOUNT_UNAVAILABLE = 'Account not found or deactivated'
+
+# Fields a PUT or bulk update may not overwrite
+PROTECTED_FIELDS = ('_id', 'id', 'userId', 'createdAt')
+
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+# What the overview needs from each collection: (projection, limit).
+# Sections return the most recent documents first.
+DASHBOARD_SECTIONS = {
+    'tasks': ({'title': 1, 'status': 1, 'priority': 1, 'dueDate': 1, 'category': 1}, 50),
+    'finances': ({'budgets': 1, 'income': 1, 'savings': 1, 'savingsGoal': 1, 'totalExpenses': 1}, 1),
+    'transactions': ({'description': 1, 'amount': 1, 'category': 1, 'date': 1}, 10),
+    'goals': ({'title': 1, 'category': 1, 'status': 1, 'targetValue': 1, 'currentValue': 1, 'deadline': 1}, 20),
+    'life_blocks': ({'name': 1, 'description': 1, 'icon': 1, 'color': 1}, 50),
+}
+# Its schedules section instead lists the occurrences (recurring events
+# expanded) of today and the following days, soonest first
+UPCOMING_DAYS = 7
+UPCOMING_LIMIT = 50
+UPCOMING_FIELDS = ('_id', 'id', 'title', 'startTime', 'endTime', 'location', 'category', 'seriesId', 'occurrenceStart')
+
+
+# --- Configuration ---
+def jwt_config():
+    """JWT settings for app.config; tokens of either app are valid in the other"""
+    return {
+        'JWT_SECRET_KEY': os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production'),  # Change this!
+        'JWT_ACCESS_TOKEN_EXPIRES': timedelta(days=7),  # Token expires in 7 days
+    }
+
+
+def listing_config():
+    """Pagination and streaming settings for app.config.
+
+    List endpoints return the whole collection as a bare array unless the
+    client asks for a page (?limit= or ?cursor=). Set
+    LEGACY_LIST_RESPONSES=false to always paginate. STREAM_BATCH_SIZE is the
+    number of documents pulled from the cursor per chunk with ?stream=true.
+    """
+    return {
+        'LEGACY_LIST_RESPONSES': os.environ.get('LEGACY_LIST_RESPONSES', 'true').lower() == 'true',
+        'DEFAULT_PAGE_LIMIT': int(os.environ.get('DEFAULT_PAGE_LIMIT', 50)),
+        'MAX_PAGE_LIMIT': int(os.environ.get('MAX_PAGE_LIMIT', 500)),
+        'STREAM_BATCH_SIZE': int(os.environ.get('STREAM_BATCH_SIZE', 200)),
+    }
+
+
+def create_password_hasher():
+    """The bcrypt pool.
+
+    Hashing runs on a bounded pool so login bursts cannot starve cheap
+    reads. The cost factor is calibrated to BCRYPT_TARGET_MS (never below
+    12) unless BCRYPT_ROUNDS pins it.
+    """
+    workers = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    return PasswordHasher(
+        workers=workers,
+        max_queue=int(os.environ.get('PASSWORD_HASH_QUEUE', workers * 4)),
+        rounds=int(os.environ['BCRYPT_ROUNDS']) if os.environ.get('BCRYPT_ROUNDS') else None,
+        target_ms=int(os.environ.get('BCRYPT_TARGET_MS', 250))
+    )
+
+
+def create_identity_cache():
+    """Every protected request checks that its user still exists and is
+    active; the answer is cached per process for IDENTITY_CACHE_TTL seconds."""
+    return IdentityCache(
+        ttl=int(os.environ.get('IDENTITY_CACHE_TTL', 30)),
+        max_entries=int(os.environ.get('IDENTITY_CACHE_SIZE', 10000))
+    )
+
+
+def create_revocation_list():
+    """Logged-out tokens are checked against an in-memory Bloom filter sized
+    for REVOCATION_CAPACITY tokens; only a filter hit costs a MongoDB lookup."""
+    return RevocationList(
+        capacity=int(os.environ.get('REVOCATION_CAPACITY', 1000000)),
+        error_rate=float(os.environ.get('REVOCATION_ERROR_RATE', 0.001)),
+        refresh_seconds=float(os.environ.get('REVOCATION_REFRESH_SECONDS', 5)),
+        rebuild_seconds=float(os.environ.get('REVOCATION_REBUILD_SECONDS', 6 * 3600))
+    )
+
+
+def is_usable_identity(identity):
+    """Whether a token's resolved identity may still make requests"""
+    return bool(identity) and identity['isActive']
+
+
+# --- Requests ---
+def validate_user_data(data, is_signup=False):
+    """Validate user registration/login data"""
+    if not data:
+        return False, "No data provided"
+
+    if is_signup:
+        required_fields = ['email', 'password', 'firstName', 'lastName']
+        for field in required_fields:
+            if field not in data or not data[field].strip():
+                return False, f"{field} is required"
+
+        # Validate email format (basic)
+        email = data['email'].strip().lower()
+        if '@' not in email or '.' not in email:
+            return False, "Invalid email format"
+
+        # Validate password length
+        if len(data['password']) < 6:
+            return False, "Password must be at least 6 characters long"
+    else:
+        required_fields = ['email', 'password']
+        for field in required_fields:
+            if field not in data or not data[field].strip():
+                return False, f"{field} is required"
+
+    return True, "Valid"
+
+
+def encode_cursor(last_id):
+    """Encode the last ObjectId of a page as an opaque cursor token"""
+    return base64.urlsafe_b64encode(last_id.binary).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token back into an ObjectId, raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        return ObjectId(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_page_limit(value, config):
+    """Parse the ?limit= parameter, clamping it to MAX_PAGE_LIMIT"""
+    if value is None:
+        return config['DEFAULT_PAGE_LIMIT']
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, config['MAX_PAGE_LIMIT'])
+
+
+def parse_fields(value):
+    """Turn ?fields=name,icon,data.title into an inclusion projection.
+
+    `id` is always returned. A path nested under another requested path is
+    dropped, since MongoDB rejects overlapping projections. Raises ValueError
+    for anything that is not a plain dotted field name.
+    """
+    projection = {'_id': 1}
+    for name in sorted(field.strip() for field in value.split(',')):
+        if not name or name == 'id':
+            continue
+        if not FIELD_NAME.match(name):
+            raise ValueError(f'Invalid field: {name}')
+        if any(name.startswith(included + '.') for included in projection):
+            continue
+        projection[name] = 1
+    return projection
+
+
+def request_projection(args, config, views=None):
+    """Projection asked for with ?view= (one of `views`) or ?fields=, else None"""
+    if 'view' in args and 'fields' in args:
+        raise ValueError('Use either view or fields, not both')
+    if 'view' in args:
+        if not views or args['view'] not in views:
+            raise ValueError(f"Unknown view: {args['view']}")
+        return views[args['view']](config)
+    if 'fields' in args:
+        return parse_fields(args['fields'])
+    return None
+
+
+def user_projection(args):
+    """Projection of /auth/me: the ?fields= asked for, never the password hash"""
+    if 'fields' not in args:
+        return {'password': 0}
+    projection = parse_fields(args['fields'])
+    projection.pop('password', None)
+    return projection
+
+
+def life_block_summary_projection(config):
+    """Sidebar fields plus the number of contents, without the contents themselves"""
+    if config['LIFE_BLOCK_CONTENT_STORAGE'] == CONTENTS_COLLECTION:
+        content_count = {'$ifNull': ['$contentCount', 0]}
+    else:
+        content_count = {'$size': {'$ifNull': ['$contents', []]}}
+    return {
+        'name': 1, 'description': 1, 'icon': 1, 'color': 1, 'createdAt': 1, 'updatedAt': 1,
+        'contentCount': content_count
+    }
+
+
+LIFE_BLOCK_VIEWS = {'summary': life_block_summary_projection}
+
+
+def upcoming_window(now):
+    """[start, end) of the dashboard's schedules: whole UTC days from today"""
+    start = datetime.combine(now.date(), time.min)
+    return start, start + timedelta(days=UPCOMING_DAYS)
+
+
+def upcoming_section(occurrences):
+    """The dashboard's schedules section from the occurrences of upcoming_window(), by startTime"""
+    return [
+        {field: occurrence[field] for field in UPCOMING_FIELDS if field in occurrence}
+        for occurrence in occurrences[:UPCOMING_LIMIT]
+    ]
+
+
+# --- Documents ---
+def new_user(data, password_hash, now):
+    """The user document created by signup from validated `data`"""
+    return {
+        'email': data['email'].strip().lower(),
+        'firstName': data['firstName'].strip(),
+        'lastName': data['lastName'].strip(),
+        'password': password_hash,
+        'createdAt': now,
+        'updatedAt': now,
+        'isActive': True,
+        'profile': {
+            'avatar': None,
+            'bio': '',
+            'preferences': {
+                'theme': 'light',
+                'notifications': True
+            }
+        }
+    }
+
+
+def profile_update(data, now):
+    """The $set of a profile update, or ValueError if a required field is missing"""
+    if not data.get('firstName') or not data.get('lastName') or not data.get('email'):
+        raise ValueError('First name, last name, and email are required')
+    return {
+        'firstName': data['firstName'],
+        'lastName': data['lastName'],
+        'email': data['email'],
+        'updatedAt': now
+    }
+
+
+def updatable_fields(data):
+    """The $set of an update of `data`, without the PROTECTED_FIELDS"""
+    return {field: value for field, value in data.items() if field not in PROTECTED_FIELDS}
+
+
+def stamp_created(data, user_id, now):
+    data['userId'] = user_id
+    data['createdAt'] = now
+    return data
+
+
+def stamp_task(data, user_id, now):
+    data = stamp_created(data, user_id, now)
+    data['updatedAt'] = now
+    return data
+
+
+def stamp_goal(data, user_id, now):
+    data = stamp_created(data, user_id, now)
+    data['status'] = data.get('status', 'active')
+    return data
+
+
+def new_life_block(data, user_id, now):
+    """Stamp a posted life block and return (block, its contents).
+
+    Contents get server ids and creation times, content types and their
+    fields get ids. Raises ValueError for duplicate content ids.
+    """
+    data['userId'] = user_id
+    data.setdefault('createdAt', now)
+    data.setdefault('updatedAt', now)
+    contents = stamp_new_contents(data.get('contents') or [], now)
+    for content_type in data.get('contentTypes') or []:
+        content_type.setdefault('id', str(uuid.uuid4()))
+        for field in content_type.get('fields') or []:
+            field.setdefault('id', str(uuid.uuid4()))
+    return data, contents
+
+
+def life_block_update(data, now, contents_in_collection):
+    """The $set of a life-block PUT"""
+    data = updatable_fields(data)
+    data['updatedAt'] = now
+    if contents_in_collection:
+        # Contents are written through their own endpoints in collection mode
+        data.pop('contents', None)
+        data.pop('contentCount', None)
+    elif 'contents' in data:
+        # Clients send back createdAt as a string; keep it a date so paging sorts it
+        data['contents'] = normalize_contents(data['contents'], now)
+    return data
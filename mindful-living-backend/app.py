@@ -1,96 +1,308 @@
-from flask import Flask, jsonify, request
-from pymongo import MongoClient
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, stream_with_context
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt, get_jwt_identity
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import uuid
-import bcrypt
+from functools import wraps
+import click
+import io
 import os
+import shutil
+import tempfile
 
-app = Flask(__name__)
-CORS(app)
-
-# JWT Configuration
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')  # Change this!
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)  # Token expires in 7 days
-jwt = JWTManager(app)
-
-# MongoDB Configuration
-MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
-client = MongoClient(MONGODB_URI)
-db_name = 'lifesync' if 'mongodb://' in MONGODB_URI and '@' in MONGODB_URI else 'mindful_living'
-db = client[db_name]
-
-# Collections
-users_collection = db['users']
-life_blocks_collection = db['life_blocks']
-tasks_collection = db['tasks']
-finances_collection = db['finances']
-transactions_collection = db['transactions']
-schedules_collection = db['schedules']
-analytics_collection = db['analytics']
-
-def convert_objectid_to_string(data):
-    """Convert MongoDB ObjectId to string for JSON serialization"""
-    if isinstance(data, list):
-        return [convert_objectid_to_string(item) for item in data]
-    elif isinstance(data, dict):
-        result = {}
-        for key, value in data.items():
-            if key == '_id' and isinstance(value, ObjectId):
-                result['id'] = str(value)  # Convert _id to id for frontend
-            elif isinstance(value, ObjectId):
-                result[key] = str(value)
-            elif isinstance(value, (dict, list)):
-                result[key] = convert_objectid_to_string(value)
-            else:
-                result[key] = value
-        return result
-    else:
-        return data
+from analytics_engine import (
+    client_analytics_update, dedupe_analytics, rebuild_all_analytics, rebuild_legacy_analytics, rebuild_user_analytics,
+    record_budget, record_change, with_derived_metrics
+)
+from api_common import (
+    ACCOUNT_UNAVAILABLE, DASHBOARD_SECTIONS, LIFE_BLOCK_VIEWS, create_identity_cache,
+    create_password_hasher, create_revocation_list, decode_cursor, encode_cursor, is_usable_identity, jwt_config,
+    life_block_update, listing_config, new_life_block, new_user, parse_page_limit, profile_update, request_projection,
+    stamp_created, stamp_goal, stamp_task, updatable_fields, upcoming_section, upcoming_window, user_projection,
+    validate_user_data
+)
+from availability import calendar_blocks, find_conflicts, free_slots, outside_hours, parse_availability_args
+from bulk import run_bulk
+from calendar_dates import WINDOW_FIELDS, convert_string_dates, parse_window, with_native_dates
+from database import (
+    analytics_collection, close_client, finances_collection, get_db, goals_collection,
+    life_blocks_collection, schedules_collection, tasks_collection, transactions_collection,
+    import_jobs_collection, users_collection
+)
+from indexes import ensure_indexes, verify_query_plans
+from life_block_contents import (
+    COLLECTION as CONTENTS_COLLECTION, STORAGE_MODES as CONTENT_STORAGE_MODES, add_content,
+    delete_block_contents, delete_content, insert_block_contents, migrate_embedded_contents, new_content,
+    normalize_legacy_contents, page_contents, page_embedded_contents, update_content
+)
+from passwords import HashingPoolSaturated
+from recurrence import (
+    exception_update, is_occurrence, occurrence_window, occurrences_in_window, parse_exception, with_series_fields
+)
+from response_compression import ResponseCompression, available_encodings
+from response_cache import cache_tags, create_response_cache
+from rollups import rebuild_all_rollups, rebuild_user_rollups, summarize
+from revisions import ANALYTICS_SOURCES, bump, current_revisions, revision_etag
+from serialization import DEFAULT_JSON_PROVIDER, create_json_provider, iso_utc, to_public, with_iso_dates
+from statement_import import (
+    FORMATS as IMPORT_FORMATS, RowError, detect_format, expire_stale_job, import_transactions, run_import_job
+)
+
+api = Blueprint('api', __name__, cli_group=None)
+jwt = JWTManager()
+
+# Per-process state (see api_common for what each is configured with)
+password_hasher = create_password_hasher()
+identity_cache = create_identity_cache()
+
+@jwt.user_lookup_loader
+def load_current_user(jwt_header, jwt_data):
+    """Resolve the token's user; deleted and deactivated accounts resolve to None"""
+    identity = identity_cache.get(jwt_data['sub'])
+    return identity if is_usable_identity(identity) else None
+
+@jwt.user_lookup_error_loader
+def current_user_not_found(jwt_header, jwt_data):
+    return jsonify({'msg': ACCOUNT_UNAVAILABLE}), 401
+
+revocation_list = create_revocation_list()
+
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_payload):
+    return revocation_list.is_revoked(jwt_payload['jti'])
+
+def create_app():
+    """Build the Flask application.
+
+    Nothing here touches MongoDB; each process opens its own client lazily on
+    the first query, so the app can be preloaded before workers fork.
+    """
+    app = Flask(__name__)
+    # 'orjson' (default when installed) or 'stdlib'; both produce the same bytes
+    app.json = create_json_provider(app, os.environ.get('JSON_PROVIDER', DEFAULT_JSON_PROVIDER))
+    CORS(app)
+
+    # JWT and pagination configuration, shared with async_app
+    app.config.update(jwt_config())
+    jwt.init_app(app)
+    app.config.update(listing_config())
+
+    # Bulk endpoints: operations per bulk_write call, and per request
+    app.config['BULK_BATCH_SIZE'] = int(os.environ.get('BULK_BATCH_SIZE', 500))
+    app.config['BULK_MAX_OPERATIONS'] = int(os.environ.get('BULK_MAX_OPERATIONS', 5000))
+
+    # Response cache for the hot GET endpoints: 'memory' (per process), 'redis'
+    # (shared through RESPONSE_CACHE_URL) or 'none'
+    app.extensions['response_cache'] = create_response_cache(
+        os.environ.get('RESPONSE_CACHE', 'memory'),
+        url=os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/0'),
+        max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        ttl=int(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+        max_entry_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRY_BYTES', 1024 * 1024))
+    )
+    # GET /cache/stats exposes cache internals; off unless an operator turns it on
+    app.config['CACHE_STATS'] = os.environ.get('CACHE_STATS', 'false').lower() == 'true'
+
+    # Statement imports: rows per insert_many, and the upload size above which
+    # the file is spooled to disk and imported by a background job
+    app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    app.config['IMPORT_INLINE_MAX_BYTES'] = int(os.environ.get('IMPORT_INLINE_MAX_BYTES', 1024 * 1024))
+
+    # Life-block contents: 'embedded' keeps them in the block's contents array,
+    # 'collection' stores one document per item (run migrate-life-block-contents first)
+    app.config['LIFE_BLOCK_CONTENT_STORAGE'] = os.environ.get('LIFE_BLOCK_CONTENT_STORAGE', 'embedded')
+    if app.config['LIFE_BLOCK_CONTENT_STORAGE'] not in CONTENT_STORAGE_MODES:
+        raise ValueError(f"LIFE_BLOCK_CONTENT_STORAGE must be one of {', '.join(CONTENT_STORAGE_MODES)}")
+
+    # Response compression: codings in order of preference (only the installed
+    # ones by default), the body size below which responses are sent as is,
+    # and a level per coding
+    ResponseCompression(
+        encodings=[name for name in os.environ.get(
+            'COMPRESSION_ALGORITHMS', ','.join(available_encodings())).split(',') if name],
+        min_size=int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+        levels={name: int(os.environ[f'COMPRESSION_LEVEL_{name.upper()}'])
+                for name in ('gzip', 'br', 'zstd') if os.environ.get(f'COMPRESSION_LEVEL_{name.upper()}')}
+    ).init_app(app)
+
+    app.register_blueprint(api)
+    return app
 
 def hash_password(password):
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash password using bcrypt on the hashing pool"""
+    return password_hasher.hash(password)
 
 def verify_password(password, hashed):
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    """Verify password against hash on the hashing pool"""
+    return password_hasher.verify(password, hashed)
 
-def validate_user_data(data, is_signup=False):
-    """Validate user registration/login data"""
-    if not data:
-        return False, "No data provided"
-    
-    if is_signup:
-        required_fields = ['email', 'password', 'firstName', 'lastName']
-        for field in required_fields:
-            if field not in data or not data[field].strip():
-                return False, f"{field} is required"
-        
-        # Validate email format (basic)
-        email = data['email'].strip().lower()
-        if '@' not in email or '.' not in email:
-            return False, "Invalid email format"
-        
-        # Validate password length
-        if len(data['password']) < 6:
-            return False, "Password must be at least 6 characters long"
-    else:
-        required_fields = ['email', 'password']
-        for field in required_fields:
-            if field not in data or not data[field].strip():
-                return False, f"{field} is required"
-    
-    return True, "Valid"
+def hashing_busy_response(error):
+    """503 response telling the client when to retry a saturated hashing pool"""
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+def stream_json_array(cursor, batch_size):
+    """Yield a JSON array one batch of documents at a time"""
+    dumps = current_app.json.dumps
+    yield '['
+    first = True
+    batch = []
+    for document in cursor:
+        batch.append(dumps(to_public(document), separators=(',', ':')))
+        if len(batch) >= batch_size:
+            yield ('' if first else ',') + ','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield ']'
+
+def stream_user_documents(collection, query, projection=None):
+    """Return a chunked response that streams every matching document.
 
-@app.route('/')
+    Only one cursor batch is held in memory at a time, so memory stays flat
+    and the first bytes go out as soon as the first batch arrives.
+    """
+    batch_size = current_app.config['STREAM_BATCH_SIZE']
+    cursor = collection.find(query, projection, batch_size=batch_size).sort('_id', 1)
+    return Response(
+        stream_with_context(stream_json_array(cursor, batch_size)),
+        mimetype='application/json'
+    )
+
+def list_user_documents(collection, user_id, views=None, window_field=None):
+    """Return a user's documents as a keyset-paginated page.
+
+    Pages are ordered by (userId, _id) and the cursor holds the last _id seen,
+    so every page is a bounded index range scan regardless of depth. Without
+    ?limit= or ?cursor= the legacy bare-array response is kept while
+    LEGACY_LIST_RESPONSES is enabled. ?stream=true streams the whole
+    collection as a bare array instead. ?fields= or ?view= trims each
+    document in the database (see request_projection). With a window_field,
+    ?from=&to= keeps the documents whose field falls in [from, to).
+    """
+    query = {'userId': user_id}
+    args = request.args
+    try:
+        projection = request_projection(request.args, current_app.config, views)
+        window = parse_window(args) if window_field else None
+        if window:
+            query[window_field] = window
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if args.get('stream', '').lower() == 'true':
+        return stream_user_documents(collection, query, projection)
+    if current_app.config['LEGACY_LIST_RESPONSES'] and 'limit' not in args and 'cursor' not in args:
+        return jsonify(to_public(list(collection.find(query, projection))))
+
+    try:
+        limit = parse_page_limit(args.get('limit'), current_app.config)
+        if args.get('cursor'):
+            query['_id'] = {'$gt': decode_cursor(args['cursor'])}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Fetch one extra document to know whether another page exists
+    documents = list(collection.find(query, projection).sort('_id', 1).limit(limit + 1))
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = encode_cursor(documents[-1]['_id']) if has_more else None
+
+    return jsonify({
+        'items': to_public(documents),
+        'next': next_cursor
+    })
+
+def get_user_document(collection, id, user_id, not_found, views=None):
+    """Return one of the user's documents, honouring ?fields= and ?view="""
+    try:
+        projection = request_projection(request.args, current_app.config, views)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        document = collection.find_one({'_id': ObjectId(id), 'userId': user_id}, projection)
+    except InvalidId:
+        document = None
+    if not document:
+        return jsonify({'error': not_found}), 404
+    return jsonify(to_public(document))
+
+def conditional(*kinds, cache=False, varies=None):
+    """Give GET responses an ETag derived from the user's revisions of `kinds`.
+
+    A matching If-None-Match is answered with 304 right after the revision
+    lookup, before the handler runs any query. With cache=True the serialized
+    body is also kept in the response cache under that ETag, so other clients
+    of the same user skip the query and serialization too. `varies` returns
+    whatever else the response depends on, such as the current day.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            query = request.query_string.decode('latin-1')
+            if varies:
+                query = f'{query}|{varies()}'
+            etag = revision_etag(user_id, current_revisions(user_id, kinds), request.path, query)
+            response_cache = current_app.extensions['response_cache'] if cache else None
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                cached_body = response_cache.get(etag) if response_cache else None
+                if cached_body is not None:
+                    response = Response(cached_body, mimetype='application/json')
+                else:
+                    response = current_app.make_response(fn(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if response_cache and not response.is_streamed:
+                        response_cache.set(etag, response.get_data(), cache_tags(user_id, kinds))
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def bumps_revision(*kinds):
+    """Bump the user's revisions of `kinds` after the write handler succeeds"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code < 400:
+                touch(get_jwt_identity(), *kinds)
+            return response
+        return wrapper
+    return decorator
+
+def touch(user_id, *kinds):
+    """Record a write: bump the revisions and drop this process's cached responses"""
+    bump(user_id, *kinds)
+    if 'users' in kinds:
+        identity_cache.invalidate(user_id)
+    response_cache = current_app.extensions['response_cache']
+    if response_cache:
+        response_cache.invalidate(cache_tags(user_id, kinds))
+
+@api.errorhandler(InvalidId)
+def invalid_id(error):
+    """A path id that is not an ObjectId cannot name any document"""
+    return jsonify({'error': 'Not found'}), 404
+
+def contents_in_collection():
+    return current_app.config['LIFE_BLOCK_CONTENT_STORAGE'] == CONTENTS_COLLECTION
+
+@api.route('/')
 def index():
     return "Flask server is running!"
 
 # --- Authentication Endpoints ---
-@app.route('/auth/signup', methods=['POST'])
+@api.route('/auth/signup', methods=['POST'])
 def signup():
     try:
         data = request.get_json()
@@ -100,40 +312,19 @@ def signup():
         if not is_valid:
             return jsonify({'error': message}), 400
         
-        email = data['email'].strip().lower()
+        new_user_document = new_user(data, hash_password(data['password']), datetime.utcnow())
         
-        # Check if user already exists
-        existing_user = users_collection.find_one({'email': email})
-        if existing_user:
+        # The unique email index rejects existing users in the same round trip
+        try:
+            result = users_collection.insert_one(new_user_document)
+        except DuplicateKeyError:
             return jsonify({'error': 'User already exists with this email'}), 400
         
-        # Create new user
-        new_user = {
-            'email': email,
-            'firstName': data['firstName'].strip(),
-            'lastName': data['lastName'].strip(),
-            'password': hash_password(data['password']),
-            'createdAt': datetime.utcnow(),
-            'updatedAt': datetime.utcnow(),
-            'isActive': True,
-            'profile': {
-                'avatar': None,
-                'bio': '',
-                'preferences': {
-                    'theme': 'light',
-                    'notifications': True
-                }
-            }
-        }
-        
-        result = users_collection.insert_one(new_user)
-        
         # Create access token
         access_token = create_access_token(identity=str(result.inserted_id))
         
         # Return user data without password
-        user_data = users_collection.find_one({'_id': result.inserted_id})
-        user_data = convert_objectid_to_string(user_data)
+        user_data = to_public(new_user_document)
         del user_data['password']
         
         return jsonify({
@@ -142,10 +333,12 @@ def signup():
             'access_token': access_token
         }), 201
         
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/auth/login', methods=['POST'])
+@api.route('/auth/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -174,14 +367,18 @@ def login():
         # Create access token
         access_token = create_access_token(identity=str(user['_id']))
         
-        # Update last login
+        # Update last login, upgrading hashes made with an outdated cost
+        login_update = {'lastLogin': datetime.utcnow()}
+        if password_hasher.needs_rehash(user['password']):
+            login_update['password'] = hash_password(password)
         users_collection.update_one(
             {'_id': user['_id']},
-            {'$set': {'lastLogin': datetime.utcnow()}}
+            {'$set': login_update}
         )
+        touch(str(user['_id']), 'users')
         
         # Return user data without password
-        user_data = convert_objectid_to_string(user)
+        user_data = to_public(user)
         del user_data['password']
         
         return jsonify({
@@ -190,79 +387,80 @@ def login():
             'access_token': access_token
         }), 200
         
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/auth/me', methods=['GET'])
+@api.route('/auth/me', methods=['GET'])
 @jwt_required()
+@conditional('users', cache=True)
 def get_current_user():
     try:
         user_id = get_jwt_identity()
-        user = users_collection.find_one({'_id': ObjectId(user_id)})
+        try:
+            projection = user_projection(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        user = users_collection.find_one({'_id': ObjectId(user_id)}, projection)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Return user data without password
-        user_data = convert_objectid_to_string(user)
-        del user_data['password']
-        
-        return jsonify({'user': user_data}), 200
+        return jsonify({'user': to_public(user)}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/auth/logout', methods=['POST'])
+@api.route('/auth/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    # In a more complex setup, you might want to blacklist the token
-    # For now, we'll just return a success message
-    return jsonify({'message': 'Logged out successfully'}), 200
+    try:
+        token = get_jwt()
+        revocation_list.revoke(token['jti'], get_jwt_identity(), datetime.utcfromtimestamp(token['exp']))
+        return jsonify({'message': 'Logged out successfully'}), 200
 
-@app.route('/auth/profile', methods=['PUT'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/auth/profile', methods=['PUT'])
 @jwt_required()
+@bumps_revision('users')
 def update_profile():
     try:
         data = request.get_json()
         current_user_id = get_jwt_identity()
         
-        # Validate required fields
-        if not data.get('firstName') or not data.get('lastName') or not data.get('email'):
-            return jsonify({'error': 'First name, last name, and email are required'}), 400
+        try:
+            update_data = profile_update(data, datetime.utcnow())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Check if email is already taken by another user
-        existing_user = users_collection.find_one({'email': data['email'], '_id': {'$ne': ObjectId(current_user_id)}})
-        if existing_user:
+        # The unique email index rejects an email taken by another user
+        try:
+            updated_user = users_collection.find_one_and_update(
+                {'_id': ObjectId(current_user_id)},
+                {'$set': update_data},
+                projection={'password': 0},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
             return jsonify({'error': 'Email already taken'}), 400
         
-        # Update user profile
-        update_data = {
-            'firstName': data['firstName'],
-            'lastName': data['lastName'],
-            'email': data['email'],
-            'updatedAt': datetime.utcnow()
-        }
-        
-        result = users_collection.update_one(
-            {'_id': ObjectId(current_user_id)},
-            {'$set': update_data}
-        )
-        
-        if result.modified_count == 0:
+        if not updated_user:
             return jsonify({'error': 'Failed to update profile'}), 400
         
-        # Get updated user data
-        updated_user = users_collection.find_one({'_id': ObjectId(current_user_id)})
-        user_data = convert_objectid_to_string(updated_user)
-        del user_data['password']
+        user_data = to_public(updated_user)
         
         return jsonify({'user': user_data, 'message': 'Profile updated successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/auth/change-password', methods=['PUT'])
+@api.route('/auth/change-password', methods=['PUT'])
 @jwt_required()
+@bumps_revision('users')
 def change_password():
     try:
         data = request.get_json()
@@ -295,70 +493,107 @@ def change_password():
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/auth/deactivate', methods=['POST'])
+@jwt_required()
+@bumps_revision('users')
+def deactivate_account():
+    """Deactivate the current account; its tokens stop working on every endpoint"""
+    try:
+        data = request.get_json() or {}
+        current_user_id = get_jwt_identity()
+        
+        if not data.get('password'):
+            return jsonify({'error': 'Password is required'}), 400
+        
+        user = users_collection.find_one({'_id': ObjectId(current_user_id)}, {'password': 1})
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if not verify_password(data['password'], user['password']):
+            return jsonify({'error': 'Password is incorrect'}), 400
+        
+        users_collection.update_one(
+            {'_id': ObjectId(current_user_id)},
+            {'$set': {'isActive': False, 'updatedAt': datetime.utcnow()}}
+        )
+        
+        return jsonify({'message': 'Account deactivated'}), 200
+        
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/life_blocks', methods=['GET'])
+@api.route('/life_blocks', methods=['GET'])
 @jwt_required()
+@conditional('life_blocks', cache=True)
 def get_life_blocks():
     user_id = get_jwt_identity()
-    life_blocks = list(life_blocks_collection.find({'userId': user_id}))
-    life_blocks = convert_objectid_to_string(life_blocks)
-    return jsonify(life_blocks)
+    return list_user_documents(life_blocks_collection, user_id, LIFE_BLOCK_VIEWS)
+
+@api.route('/life_blocks/<id>', methods=['GET'])
+@jwt_required()
+@conditional('life_blocks')
+def get_life_block(id):
+    user_id = get_jwt_identity()
+    return get_user_document(life_blocks_collection, id, user_id,
+                             'Life block not found or access denied', LIFE_BLOCK_VIEWS)
 
-@app.route('/life_blocks', methods=['POST'])
+@api.route('/life_blocks', methods=['POST'])
 @jwt_required()
+@bumps_revision('life_blocks')
 def create_life_block():
     user_id = get_jwt_identity()
     data = request.get_json()
     
-    # Add user ID to the life block
-    data['userId'] = user_id
-    
-    # Add timestamps and ID if not present
-    now = datetime.utcnow()
-    if 'createdAt' not in data:
-        data['createdAt'] = now
-    if 'updatedAt' not in data:
-        data['updatedAt'] = now
-    if 'contents' not in data:
-        data['contents'] = []
+    try:
+        data, contents = new_life_block(data, user_id, datetime.utcnow())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Generate UUIDs for content types and fields
-    if 'contentTypes' in data:
-        for content_type in data['contentTypes']:
-            if 'id' not in content_type:
-                content_type['id'] = str(uuid.uuid4())
-            if 'fields' in content_type:
-                for field in content_type['fields']:
-                    if 'id' not in field:
-                        field['id'] = str(uuid.uuid4())
+    if not contents_in_collection():
+        data['contents'] = contents
+        life_blocks_collection.insert_one(data)
+        return jsonify(to_public(data)), 201
     
-    result = life_blocks_collection.insert_one(data)
-    created_block = life_blocks_collection.find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(created_block)), 201
+    data['contents'] = []
+    data['contentCount'] = len(contents)
+    life_blocks_collection.insert_one(data)
+    try:
+        insert_block_contents(str(data['_id']), user_id, contents)
+    except Exception:
+        # Leave no block behind without its contents
+        life_blocks_collection.delete_one({'_id': data['_id']})
+        raise
+    data['contents'] = contents
+    return jsonify(to_public(data)), 201
 
-@app.route('/life_blocks/<id>', methods=['PUT'])
+@api.route('/life_blocks/<id>', methods=['PUT'])
 @jwt_required()
+@bumps_revision('life_blocks')
 def update_life_block(id):
     user_id = get_jwt_identity()
-    data = request.get_json()
-    data['updatedAt'] = datetime.utcnow()
+    data = life_block_update(request.get_json(), datetime.utcnow(), contents_in_collection())
     
     # Only update if the life block belongs to the user
-    result = life_blocks_collection.update_one(
+    updated_block = life_blocks_collection.find_one_and_update(
         {'_id': ObjectId(id), 'userId': user_id}, 
-        {'$set': data}
+        {'$set': data},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not updated_block:
         return jsonify({'error': 'Life block not found or access denied'}), 404
     
-    updated_block = life_blocks_collection.find_one({'_id': ObjectId(id)})
-    return jsonify(convert_objectid_to_string(updated_block))
+    return jsonify(to_public(updated_block))
 
-@app.route('/life_blocks/<id>', methods=['DELETE'])
+@api.route('/life_blocks/<id>', methods=['DELETE'])
 @jwt_required()
+@bumps_revision('life_blocks')
 def delete_life_block(id):
     user_id = get_jwt_identity()
     
@@ -367,230 +602,685 @@ def delete_life_block(id):
     
     if result.deleted_count == 0:
         return jsonify({'error': 'Life block not found or access denied'}), 404
+    if contents_in_collection():
+        delete_block_contents(id, user_id)
     
     return jsonify({'message': 'Life block deleted successfully', 'deleted': True})
 
-@app.route('/life_blocks/<id>/contents', methods=['POST'])
+@api.route('/life_blocks/<id>/contents', methods=['GET'])
 @jwt_required()
-def add_content_to_life_block(id):
+@conditional('life_blocks')
+def get_life_block_contents(id):
+    """One page of a block's contents, oldest first: {'items': [...], 'next': cursor}"""
     user_id = get_jwt_identity()
-    data = request.get_json()
+    try:
+        limit = parse_page_limit(request.args.get('limit'), current_app.config)
+        if contents_in_collection():
+            page = page_contents(id, user_id, limit, request.args.get('cursor'))
+        else:
+            page = page_embedded_contents(id, user_id, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Verify the life block belongs to the user
-    life_block = life_blocks_collection.find_one({'_id': ObjectId(id), 'userId': user_id})
-    if not life_block:
+    if page is None:
         return jsonify({'error': 'Life block not found or access denied'}), 404
+    items, next_cursor = page
+    return jsonify({'items': items, 'next': next_cursor})
+
+@api.route('/life_blocks/<id>/contents', methods=['POST'])
+@jwt_required()
+@bumps_revision('life_blocks')
+def add_content_to_life_block(id):
+    user_id = get_jwt_identity()
+    data = request.get_json()
     
     # Add timestamps and ID
     now = datetime.utcnow()
-    content = {
-        'id': str(uuid.uuid4()),
-        'contentTypeId': data.get('contentTypeId'),
-        'data': data.get('data', {}),
-        'createdAt': now,
-        'updatedAt': now
-    }
+    content = new_content(data, now)
     
-    life_blocks_collection.update_one(
-        {'_id': ObjectId(id)}, 
-        {'$push': {'contents': content}, '$set': {'updatedAt': now}}
+    if contents_in_collection():
+        # Only the new item goes back; the block may hold thousands
+        if not add_content(id, user_id, content):
+            return jsonify({'error': 'Life block not found or access denied'}), 404
+        return jsonify(content), 201
+    
+    # Only push if the life block belongs to the user
+    updated_block = life_blocks_collection.find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id}, 
+        {'$push': {'contents': content}, '$set': {'updatedAt': now}},
+        return_document=ReturnDocument.AFTER
     )
+    if not updated_block:
+        return jsonify({'error': 'Life block not found or access denied'}), 404
     
-    updated_block = life_blocks_collection.find_one({'_id': ObjectId(id)})
-    return jsonify(convert_objectid_to_string(updated_block))
+    return jsonify(to_public(updated_block))
 
-@app.route('/life_blocks/<id>/contents/<content_id>', methods=['PUT'])
+@api.route('/life_blocks/<id>/contents/<content_id>', methods=['PUT'])
 @jwt_required()
+@bumps_revision('life_blocks')
 def update_content_in_life_block(id, content_id):
     user_id = get_jwt_identity()
     data = request.get_json()
     
-    # Verify the life block belongs to the user
-    life_block = life_blocks_collection.find_one({'_id': ObjectId(id), 'userId': user_id})
-    if not life_block:
-        return jsonify({'error': 'Life block not found or access denied'}), 404
-    
     now = datetime.utcnow()
-    result = life_blocks_collection.update_one(
-        {'_id': ObjectId(id), 'contents.id': content_id},
+    if contents_in_collection():
+        content = update_content(id, user_id, content_id, data.get('data', {}), now)
+        if not content:
+            return jsonify({'error': 'Content not found'}), 404
+        return jsonify(content)
+    
+    updated_block = life_blocks_collection.find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id, 'contents.id': content_id},
         {'$set': {
             'contents.$.data': data.get('data', {}),
             'contents.$.updatedAt': now,
             'updatedAt': now
-        }}
+        }},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not updated_block:
+        # Only the failure path pays for telling the two cases apart
+        if not life_blocks_collection.find_one({'_id': ObjectId(id), 'userId': user_id}, {'_id': 1}):
+            return jsonify({'error': 'Life block not found or access denied'}), 404
         return jsonify({'error': 'Content not found'}), 404
     
-    updated_block = life_blocks_collection.find_one({'_id': ObjectId(id)})
-    return jsonify(convert_objectid_to_string(updated_block))
+    return jsonify(to_public(updated_block))
 
-@app.route('/life_blocks/<id>/contents/<content_id>', methods=['DELETE'])
+@api.route('/life_blocks/<id>/contents/<content_id>', methods=['DELETE'])
 @jwt_required()
+@bumps_revision('life_blocks')
 def delete_content_from_life_block(id, content_id):
     user_id = get_jwt_identity()
     
-    # Verify the life block belongs to the user
-    life_block = life_blocks_collection.find_one({'_id': ObjectId(id), 'userId': user_id})
-    if not life_block:
-        return jsonify({'error': 'Life block not found or access denied'}), 404
-    
     now = datetime.utcnow()
-    result = life_blocks_collection.update_one(
-        {'_id': ObjectId(id)},
-        {'$pull': {'contents': {'id': content_id}}, '$set': {'updatedAt': now}}
+    if contents_in_collection():
+        if not delete_content(id, user_id, content_id, now):
+            return jsonify({'error': 'Content not found'}), 404
+        return jsonify({'message': 'Content deleted successfully', 'deleted': True})
+    
+    # Only pull if the life block belongs to the user
+    updated_block = life_blocks_collection.find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id},
+        {'$pull': {'contents': {'id': content_id}}, '$set': {'updatedAt': now}},
+        return_document=ReturnDocument.AFTER
     )
+    if not updated_block:
+        return jsonify({'error': 'Life block not found or access denied'}), 404
     
-    updated_block = life_blocks_collection.find_one({'_id': ObjectId(id)})
-    return jsonify(convert_objectid_to_string(updated_block))
+    return jsonify(to_public(updated_block))
 
 # --- Tasks Endpoints ---
-@app.route('/tasks', methods=['GET'])
+@api.route('/tasks', methods=['GET'])
 @jwt_required()
+@conditional('tasks', cache=True)
 def get_tasks():
     user_id = get_jwt_identity()
-    tasks = list(tasks_collection.find({'userId': user_id}))
-    return jsonify(convert_objectid_to_string(tasks))
+    return list_user_documents(tasks_collection, user_id, window_field=WINDOW_FIELDS['tasks'])
 
-@app.route('/tasks', methods=['POST'])
+@api.route('/tasks/<id>', methods=['GET'])
 @jwt_required()
+@conditional('tasks')
+def get_task(id):
+    return get_user_document(tasks_collection, id, get_jwt_identity(), 'Task not found or access denied')
+
+@api.route('/tasks', methods=['POST'])
+@jwt_required()
+@bumps_revision('tasks')
 def create_task():
     user_id = get_jwt_identity()
-    data = request.get_json()
-    data['userId'] = user_id
-    data['createdAt'] = datetime.utcnow()
-    data['updatedAt'] = datetime.utcnow()
-    result = tasks_collection.insert_one(data)
-    new_task = tasks_collection.find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(new_task)), 201
+    data = stamp_task(with_native_dates('tasks', request.get_json()), user_id, datetime.utcnow())
+    tasks_collection.insert_one(data)
+    record_change(user_id, 'tasks', after=data)
+    return jsonify(to_public(data)), 201
 
-@app.route('/tasks/<id>', methods=['PUT'])
+@api.route('/tasks/<id>', methods=['PUT'])
+@jwt_required()
+@bumps_revision('tasks')
 def update_task(id):
-    data = request.get_json()
+    user_id = get_jwt_identity()
+    data = with_native_dates('tasks', updatable_fields(request.get_json()))
     data['updatedAt'] = datetime.utcnow()
-    tasks_collection.update_one({'_id': ObjectId(id)}, {'$set': data})
-    updated_task = tasks_collection.find_one({'_id': ObjectId(id)})
-    return jsonify(convert_objectid_to_string(updated_task))
+    # Fetch the previous version so analytics can see status transitions;
+    # $set of top-level fields makes the new version a plain merge
+    previous_task = tasks_collection.find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id},
+        {'$set': data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous_task:
+        return jsonify({'error': 'Task not found or access denied'}), 404
+    updated_task = {**previous_task, **data}
+    record_change(user_id, 'tasks', before=previous_task, after=updated_task)
+    return jsonify(to_public(updated_task))
 
-@app.route('/tasks/<id>', methods=['DELETE'])
+@api.route('/tasks/<id>', methods=['DELETE'])
+@jwt_required()
+@bumps_revision('tasks')
 def delete_task(id):
-    result = tasks_collection.delete_one({'_id': ObjectId(id)})
-    return jsonify({'message': 'Task deleted', 'deleted': result.deleted_count > 0})
+    user_id = get_jwt_identity()
+    deleted_task = tasks_collection.find_one_and_delete({'_id': ObjectId(id), 'userId': user_id})
+    if deleted_task:
+        record_change(user_id, 'tasks', before=deleted_task)
+    return jsonify({'message': 'Task deleted', 'deleted': deleted_task is not None})
 
 # --- Finances Endpoints ---
-@app.route('/finances', methods=['GET'])
+@api.route('/finances', methods=['GET'])
 @jwt_required()
+@conditional('finances')
 def get_finances():
     user_id = get_jwt_identity()
-    finances = list(finances_collection.find({'userId': user_id}))
-    return jsonify(convert_objectid_to_string(finances))
+    return list_user_documents(finances_collection, user_id)
 
-@app.route('/finances', methods=['POST'])
+@api.route('/finances', methods=['POST'])
 @jwt_required()
+@bumps_revision('finances')
 def create_finance():
     user_id = get_jwt_identity()
     data = request.get_json()
     data['userId'] = user_id
     data['createdAt'] = datetime.utcnow()
-    result = finances_collection.insert_one(data)
-    new_item = finances_collection.find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(new_item)), 201
+    finances_collection.insert_one(data)
+    record_budget(user_id, data)
+    return jsonify(to_public(data)), 201
+
+@api.route('/finances/summary', methods=['GET'])
+@jwt_required()
+@conditional('transactions')
+def get_finance_summary():
+    """Income, spending and net per day or month and category, from the transaction rollups"""
+    user_id = get_jwt_identity()
+    try:
+        summary = summarize(
+            user_id,
+            request.args.get('granularity', 'month'),
+            request.args.get('from'),
+            request.args.get('to')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(summary)
+
+@api.route('/finances/insights', methods=['GET'])
+@jwt_required()
+def get_finance_insights():
+    """Burn rate, spending trend, savings-goal ETAs and budget overspend forecast.
+
+    Not conditional: the same data gives different insights from one day to
+    the next, unless ?asOf= pins the day.
+    """
+    # NumPy takes a while to import; only workers that serve insights pay for it
+    from finance_insights import user_insights
+
+    user_id = get_jwt_identity()
+    try:
+        insights = user_insights(user_id, request.args.get('asOf'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(insights)
 
-@app.route('/transactions', methods=['GET'])
+@api.route('/transactions', methods=['GET'])
 @jwt_required()
+@conditional('transactions')
 def get_transactions():
     user_id = get_jwt_identity()
-    transactions = list(transactions_collection.find({'userId': user_id}))
-    return jsonify(convert_objectid_to_string(transactions))
+    return list_user_documents(transactions_collection, user_id)
 
-@app.route('/transactions', methods=['POST'])
+@api.route('/transactions', methods=['POST'])
 @jwt_required()
+@bumps_revision('transactions')
 def add_transaction():
     user_id = get_jwt_identity()
     data = request.get_json()
     data['userId'] = user_id
     data['createdAt'] = datetime.utcnow()
-    result = transactions_collection.insert_one(data)
-    new_transaction = transactions_collection.find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(new_transaction)), 201
+    transactions_collection.insert_one(data)
+    record_change(user_id, 'transactions', after=data)
+    return jsonify(to_public(data)), 201
+
+import_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('IMPORT_WORKERS', 2)),
+    thread_name_prefix='import'
+)
+
+@api.route('/transactions/import', methods=['POST'])
+@jwt_required()
+@bumps_revision('transactions')
+def import_transactions_file():
+    """Import a CSV or OFX bank statement, sent as the 'file' form field or the raw body.
+
+    Small files are imported while the client waits and answered with the
+    counts. Larger ones (or uploads of unknown length) are spooled to disk and
+    imported in the background; the 202 response points at a job to poll.
+    """
+    user_id = get_jwt_identity()
+    fmt = request.args.get('format')
+    if fmt and fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(IMPORT_FORMATS)}"}), 400
+    date_format = request.args.get('dateFormat')
+    upload = request.files.get('file')
+    raw = upload.stream if upload else request.stream
+    filename = upload.filename if upload else None
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+
+    if request.content_length is not None and request.content_length <= current_app.config['IMPORT_INLINE_MAX_BYTES']:
+        stream = io.BufferedReader(raw)
+        fmt = fmt or detect_format(filename, stream.peek(512)[:512])
+        try:
+            counts = import_transactions(user_id, stream, fmt, batch_size, date_format)
+        except (RowError, UnicodeDecodeError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(counts)
+
+    # Copy the upload to disk in chunks so the request can finish without holding it in memory
+    with tempfile.NamedTemporaryFile(prefix='statement-', delete=False) as spool:
+        shutil.copyfileobj(raw, spool)
+    with open(spool.name, 'rb') as stream:
+        fmt = fmt or detect_format(filename, stream.read(512))
+
+    job = {
+        'userId': user_id,
+        'status': 'running',
+        'format': fmt,
+        'filename': filename,
+        'processed': 0,
+        'inserted': 0,
+        'duplicates': 0,
+        'rejected': 0,
+        'errors': [],
+        'createdAt': datetime.utcnow()
+    }
+    job['heartbeatAt'] = job['createdAt']
+    import_jobs_collection.insert_one(job)
+    import_executor.submit(run_import_job, job['_id'], user_id, spool.name, fmt, batch_size, date_format)
+
+    response = jsonify(to_public(job))
+    response.headers['Location'] = f"/transactions/import/{job['id']}"
+    return response, 202
+
+@api.route('/transactions/import/<job_id>', methods=['GET'])
+@jwt_required()
+def get_import_job(job_id):
+    """Progress and counts of a background statement import"""
+    try:
+        expire_stale_job(ObjectId(job_id), get_jwt_identity())
+    except InvalidId:
+        pass
+    return get_user_document(import_jobs_collection, job_id, get_jwt_identity(), 'Import job not found')
 
 # --- Schedule Endpoints ---
-@app.route('/schedules', methods=['GET'])
+@api.route('/schedules', methods=['GET'])
 @jwt_required()
+@conditional('schedules')
 def get_schedules():
+    """The user's schedule documents; with ?from=&to=, the events in that window.
+
+    A window lists what happens in it, so recurring events are expanded
+    there like /schedules/occurrences does rather than matched on their
+    first startTime. Such a listing is bounded by the window and is not
+    paginated or streamed.
+    """
     user_id = get_jwt_identity()
-    schedules = list(schedules_collection.find({'userId': user_id}))
-    return jsonify(convert_objectid_to_string(schedules))
+    if 'from' in request.args or 'to' in request.args:
+        if any(name in request.args for name in ('limit', 'cursor', 'stream')):
+            return jsonify({'error': 'A schedule window is not paginated or streamed'}), 400
+        try:
+            start, end = occurrence_window(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(to_public(occurrences_in_window(schedules_collection, user_id, start, end)))
+    return list_user_documents(schedules_collection, user_id)
 
-@app.route('/schedules', methods=['POST'])
+@api.route('/schedules', methods=['POST'])
 @jwt_required()
+@bumps_revision('schedules')
 def create_schedule_item():
     user_id = get_jwt_identity()
-    data = request.get_json()
+    data = with_native_dates('schedules', request.get_json())
+    try:
+        with_series_fields('schedules', data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     data['userId'] = user_id
     data['createdAt'] = datetime.utcnow()
-    result = schedules_collection.insert_one(data)
-    new_item = schedules_collection.find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(new_item)), 201
+    schedules_collection.insert_one(data)
+    record_change(user_id, 'schedules', after=data)
+    return jsonify(to_public(data)), 201
+
+@api.route('/schedules/occurrences', methods=['GET'])
+@jwt_required()
+@conditional('schedules', cache=True)
+def get_schedule_occurrences():
+    """Single events and recurring-event occurrences starting in [from, to), by startTime.
+
+    Series are expanded only inside the window; the response cache keeps
+    the expansion of hot windows until the user's schedules change.
+    """
+    user_id = get_jwt_identity()
+    try:
+        start, end = occurrence_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(to_public(occurrences_in_window(schedules_collection, user_id, start, end)))
+
+def window_blocks():
+    """(from, to, options, busy blocks) of a conflict or free-slot request, or ValueError"""
+    start, end = occurrence_window(request.args)
+    options = parse_availability_args(request.args)
+    blocks = calendar_blocks(schedules_collection, tasks_collection, get_jwt_identity(), start, end,
+                             options['include_tasks'], options['task_minutes'])
+    return start, end, options, blocks
+
+@api.route('/schedules/conflicts', methods=['GET'])
+@jwt_required()
+@conditional('schedules', 'tasks', cache=True)
+def get_schedule_conflicts():
+    """Spans in [from, to) where two or more events (and, with ?includeTasks=true, tasks) overlap"""
+    try:
+        start, end, _, blocks = window_blocks()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    conflicts = find_conflicts(blocks, start, end)
+    for conflict in conflicts:
+        with_iso_dates(conflict, ('start', 'end'))
+        to_public(conflict['items'])
+    return jsonify({'from': iso_utc(start), 'to': iso_utc(end), 'conflicts': conflicts})
+
+@api.route('/schedules/free-slots', methods=['GET'])
+@jwt_required()
+@conditional('schedules', 'tasks', cache=True)
+def get_free_slots():
+    """Gaps of at least ?duration= minutes in [from, to), optionally within ?dayStart=&dayEnd= hours"""
+    try:
+        start, end, options, blocks = window_blocks()
+        blocks.extend(outside_hours(start, end, options['day_start'], options['day_end']))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    duration = options['duration']
+    return jsonify({
+        'from': iso_utc(start),
+        'to': iso_utc(end),
+        'duration': duration // timedelta(minutes=1),
+        'slots': [
+            {'start': iso_utc(slot_start), 'end': iso_utc(slot_end),
+             'minutes': (slot_end - slot_start) // timedelta(minutes=1)}
+            for slot_start, slot_end in free_slots(blocks, start, end, duration)
+        ],
+    })
+
+@api.route('/schedules/<id>/exceptions', methods=['POST'])
+@jwt_required()
+@bumps_revision('schedules')
+def add_schedule_exception(id):
+    """Cancel (`cancelled: true`) or change one occurrence of a recurring event.
+
+    The occurrence is checked against the stored rule before anything is
+    written, and the write only matches the series while its rule and first
+    start are still the ones checked, so a concurrent rule change cannot slip
+    in between (the request is answered with 409 instead).
+    """
+    user_id = get_jwt_identity()
+    try:
+        exception = parse_exception(request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = {'_id': ObjectId(id), 'userId': user_id}
+    series = schedules_collection.find_one(query, {'recurrence': 1, 'startTime': 1})
+    if not series:
+        return jsonify({'error': 'Event not found or access denied'}), 404
+    if not series.get('recurrence'):
+        return jsonify({'error': 'Not a recurring event'}), 400
+    if not is_occurrence(series, exception['occurrence']):
+        return jsonify({'error': 'occurrence is not an occurrence of this event'}), 400
+    updated_series = schedules_collection.find_one_and_update(
+        {**query, 'recurrence': series['recurrence'], 'startTime': series['startTime']},
+        exception_update(exception), return_document=ReturnDocument.AFTER
+    )
+    if not updated_series:
+        return jsonify({'error': 'The event changed while the exception was added; try again'}), 409
+    return jsonify(to_public(updated_series))
 
 # --- Analytics Endpoints ---
-@app.route('/analytics', methods=['GET'])
+@api.route('/analytics', methods=['GET'])
 @jwt_required()
+@conditional(*ANALYTICS_SOURCES, cache=True)
 def get_analytics():
     user_id = get_jwt_identity()
+    # Metrics are maintained on write, so this is a single point lookup
     analytics = analytics_collection.find_one({'userId': user_id})
     if analytics:
-        return jsonify(convert_objectid_to_string(analytics))
+        return jsonify(to_public(with_derived_metrics(analytics)))
     else:
         # Return empty analytics if none exist
         return jsonify({})
 
-@app.route('/analytics', methods=['POST'])
+@api.route('/analytics', methods=['POST'])
 @jwt_required()
+@bumps_revision('analytics')
 def create_analytics():
+    """Store client-provided presentation data (weeklyData, insights, ...) on the
+    user's analytics document; server-computed metrics cannot be overwritten"""
     user_id = get_jwt_identity()
-    data = request.get_json()
-    data['userId'] = user_id
-    data['createdAt'] = datetime.utcnow()
-    result = analytics_collection.insert_one(data)
-    new_item = analytics_collection.find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(new_item)), 201
+    analytics = analytics_collection.find_one_and_update(
+        {'userId': user_id},
+        client_analytics_update(request.get_json(), datetime.utcnow()),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return jsonify(to_public(with_derived_metrics(analytics))), 201
 
 # --- Goals Endpoints ---
-@app.route('/goals', methods=['GET'])
+@api.route('/goals', methods=['GET'])
 @jwt_required()
+@conditional('goals', cache=True)
 def get_goals():
     user_id = get_jwt_identity()
-    goals = list(db['goals'].find({'userId': user_id}))
-    return jsonify(convert_objectid_to_string(goals))
+    return list_user_documents(goals_collection, user_id)
 
-@app.route('/goals', methods=['POST'])
+@api.route('/goals/<id>', methods=['GET'])
 @jwt_required()
+@conditional('goals')
+def get_goal(id):
+    return get_user_document(goals_collection, id, get_jwt_identity(), 'Goal not found or access denied')
+
+@api.route('/goals', methods=['POST'])
+@jwt_required()
+@bumps_revision('goals')
 def create_goal():
     user_id = get_jwt_identity()
-    data = request.get_json()
-    data['userId'] = user_id
-    data['createdAt'] = datetime.utcnow()
-    data['status'] = data.get('status', 'active')
-    result = db['goals'].insert_one(data)
-    new_goal = db['goals'].find_one({'_id': result.inserted_id})
-    return jsonify(convert_objectid_to_string(new_goal)), 201
+    data = stamp_goal(request.get_json(), user_id, datetime.utcnow())
+    goals_collection.insert_one(data)
+    record_change(user_id, 'goals', after=data)
+    return jsonify(to_public(data)), 201
 
-@app.route('/goals/<id>', methods=['PUT'])
+@api.route('/goals/<id>', methods=['PUT'])
 @jwt_required()
+@bumps_revision('goals')
 def update_goal(id):
     user_id = get_jwt_identity()
-    data = request.get_json()
-    db['goals'].update_one({'_id': ObjectId(id), 'userId': user_id}, {'$set': data})
+    data = updatable_fields(request.get_json())
+    previous_goal = goals_collection.find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id},
+        {'$set': data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous_goal:
+        record_change(user_id, 'goals', before=previous_goal, after={**previous_goal, **data})
     return jsonify({'success': True})
 
-@app.route('/goals/<id>', methods=['DELETE'])
+@api.route('/goals/<id>', methods=['DELETE'])
 @jwt_required()
+@bumps_revision('goals')
 def delete_goal(id):
     user_id = get_jwt_identity()
-    db['goals'].delete_one({'_id': ObjectId(id), 'userId': user_id})
+    deleted_goal = goals_collection.find_one_and_delete({'_id': ObjectId(id), 'userId': user_id})
+    if deleted_goal:
+        record_change(user_id, 'goals', before=deleted_goal)
     return jsonify({'success': True})
 
+# --- Bulk Endpoints ---
+# New documents are stamped exactly as the single-item POST handlers do
+BULK_COLLECTIONS = {
+    'tasks': (tasks_collection, stamp_task),
+    'transactions': (transactions_collection, stamp_created),
+    'schedules': (schedules_collection, stamp_created),
+    'goals': (goals_collection, stamp_goal),
+}
+
+@api.route('/<any(tasks, transactions, schedules, goals):kind>/bulk', methods=['POST'])
+@jwt_required()
+def bulk_write_documents(kind):
+    """Insert, update and delete many documents in one request.
+
+    Accepts a list of operations (or {"operations": [...]}) as described in
+    bulk.py and answers with one result per operation, in request order.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list):
+        return jsonify({'error': 'Expected a list of operations'}), 400
+    if len(operations) > current_app.config['BULK_MAX_OPERATIONS']:
+        return jsonify({'error': f"At most {current_app.config['BULK_MAX_OPERATIONS']} operations per request"}), 413
+
+    collection, prepare_insert = BULK_COLLECTIONS[kind]
+    results = run_bulk(collection, kind, user_id, operations, current_app.config['BULK_BATCH_SIZE'],
+                       prepare_insert, datetime.utcnow())
+    touch(user_id, kind)
+
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'error': 0}
+    for result in results:
+        counts[result['status']] += 1
+    return jsonify({
+        'results': results,
+        'inserted': counts['inserted'],
+        'updated': counts['updated'],
+        'deleted': counts['deleted'],
+        'failed': counts['error']
+    })
+
+# --- Dashboard Endpoint ---
+DASHBOARD_KINDS = tuple(dict.fromkeys((*DASHBOARD_SECTIONS, 'schedules', *ANALYTICS_SOURCES)))
+dashboard_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('DASHBOARD_WORKERS', 16)),
+    thread_name_prefix='dashboard'
+)
+
+def fetch_dashboard_section(name, user_id, projection, limit):
+    return list(get_db()[name].find({'userId': user_id}, projection).sort('_id', -1).limit(limit))
+
+def fetch_upcoming(user_id, start, end):
+    return upcoming_section(occurrences_in_window(schedules_collection, user_id, start, end))
+
+def today():
+    return datetime.utcnow().date().isoformat()
+
+@api.route('/dashboard', methods=['GET'])
+@jwt_required()
+@conditional(*DASHBOARD_KINDS, varies=today)
+def get_dashboard():
+    """Everything the overview page needs in one response.
+
+    The per-collection queries run concurrently, so the response takes as long
+    as the slowest query instead of seven sequential requests.
+    """
+    user_id = get_jwt_identity()
+    futures = {
+        name: dashboard_executor.submit(fetch_dashboard_section, name, user_id, projection, limit)
+        for name, (projection, limit) in DASHBOARD_SECTIONS.items()
+    }
+    futures['schedules'] = dashboard_executor.submit(fetch_upcoming, user_id, *upcoming_window(datetime.utcnow()))
+    futures['analytics'] = dashboard_executor.submit(analytics_collection.find_one, {'userId': user_id})
+
+    dashboard = {name: to_public(future.result()) for name, future in futures.items()}
+    dashboard['analytics'] = with_derived_metrics(dashboard['analytics']) or {}
+    return jsonify(dashboard)
+
+@api.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Hit/miss counters of this worker's response cache, when CACHE_STATS is on"""
+    if not current_app.config['CACHE_STATS']:
+        return jsonify({'error': 'Not found'}), 404
+    response_cache = current_app.extensions['response_cache']
+    return jsonify(response_cache.stats() if response_cache else {'backend': 'none'})
+
+# --- Index Management ---
+def dedupe_for_unique_indexes(db):
+    """Merge duplicate analytics documents until the unique userId index exists"""
+    if 'userId_unique' not in db.analytics.index_information():
+        return dedupe_analytics()
+    return 0
+
+def bootstrap_indexes():
+    """Create required indexes and fail loudly if any endpoint query still scans.
+
+    The client used here is closed afterwards so a preloading master never
+    forks with an open connection pool.
+    """
+    try:
+        dedupe_for_unique_indexes(get_db())
+        ensure_indexes(get_db())
+        verify_query_plans(get_db())
+        normalize_legacy_contents()
+        rebuild_legacy_analytics()
+    finally:
+        close_client()
+
+@api.cli.command('create-indexes')
+def create_indexes_command():
+    """Create the required MongoDB indexes and verify the query plans."""
+    db = get_db()
+    deduped = dedupe_for_unique_indexes(db)
+    if deduped:
+        print(f'Merged duplicate analytics documents of {deduped} users')
+    created = ensure_indexes(db)
+    for collection_name, names in created.items():
+        print(f"{collection_name}: {', '.join(names)}")
+    verify_query_plans(db)
+    print('All canonical queries use an index')
+    normalized = normalize_legacy_contents()
+    if normalized:
+        print(f'Normalized the embedded contents of {normalized} life blocks')
+    rebuilt = rebuild_legacy_analytics()
+    if rebuilt:
+        print(f'Rebuilt the legacy analytics of {rebuilt} users')
+
+@api.cli.command('migrate-dates')
+@click.option('--batch-size', default=500, show_default=True, help='Documents per bulk write.')
+def migrate_dates_command(batch_size):
+    """Convert string startTime/endTime/dueDate fields to native datetimes."""
+    db = get_db()
+    for kind in WINDOW_FIELDS:
+        converted, unparseable = convert_string_dates(db[kind], kind, batch_size)
+        print(f'{kind}: converted {converted}, left {unparseable} unparseable')
+
+@api.cli.command('rebuild-analytics')
+@click.option('--user-id', default=None, help='Only rebuild this user\'s metrics.')
+def rebuild_analytics_command(user_id):
+    """Recompute materialized analytics from tasks, transactions, schedules and goals."""
+    if user_id:
+        rebuild_user_analytics(user_id)
+        print(f'Rebuilt analytics for {user_id}')
+    else:
+        print(f'Rebuilt analytics for {rebuild_all_analytics()} users')
+
+@api.cli.command('rebuild-rollups')
+@click.option('--user-id', default=None, help='Only rebuild this user\'s rollups.')
+def rebuild_rollups_command(user_id):
+    """Recompute the daily and monthly transaction rollups from the transactions."""
+    if user_id:
+        print(f'Rebuilt {rebuild_user_rollups(user_id)} rollup buckets for {user_id}')
+    else:
+        print(f'Rebuilt rollups for {rebuild_all_rollups()} users')
+
+@api.cli.command('migrate-life-block-contents')
+def migrate_life_block_contents_command():
+    """Move embedded life-block contents into the life_block_contents collection."""
+    blocks, items = migrate_embedded_contents()
+    print(f'Moved {items} contents out of {blocks} life blocks')
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+    if os.environ.get('ENSURE_INDEXES', 'true').lower() == 'true':
+        bootstrap_indexes()
+    create_app().run(debug=True, port=5001)
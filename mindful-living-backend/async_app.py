@@ -0,0 +1,782 @@
+"""Asyncio variant of the API (experimental).
+
+Serves a subset of app.py's routes, with the same request/response shapes
+and JWTs, on Quart with PyMongo's AsyncMongoClient. A request waiting on
+MongoDB does not hold a thread, so one process can keep thousands of
+requests in flight:
+
+    hypercorn async_app:app --bind 0.0.0.0:5001
+
+Request parsing, validation and the documents written come from
+api_common, which app.py uses too; only the database calls are ported.
+The routes of app.py not served here are listed in SYNC_ONLY_ROUTES, and
+only the embedded life-block contents layout is supported. Responses carry
+no ETags and skip the response cache and compression.
+tests/test_async_app.py checks that the two route tables differ by exactly
+SYNC_ONLY_ROUTES and that every route served here answers like app.py.
+"""
+from quart import Quart, Response, current_app, g, jsonify, request
+from quart_cors import cors
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+from functools import wraps
+import jwt as pyjwt
+import asyncio
+import uuid
+import os
+
+from analytics_engine import analytics_update, budget_update, client_analytics_update, with_derived_metrics
+from api_common import (
+    ACCOUNT_UNAVAILABLE, DASHBOARD_SECTIONS, LIFE_BLOCK_VIEWS, create_identity_cache,
+    create_password_hasher, create_revocation_list, decode_cursor, encode_cursor, is_usable_identity, jwt_config,
+    life_block_update, listing_config, new_life_block, new_user, parse_page_limit, profile_update, request_projection,
+    stamp_created, stamp_goal, stamp_task, updatable_fields, upcoming_section, upcoming_window, user_projection,
+    validate_user_data
+)
+from calendar_dates import WINDOW_FIELDS, parse_window, with_native_dates
+from database import close_async_client, get_async_db
+from identity import IDENTITY_PROJECTION, identity_filter
+from life_block_contents import new_content
+from passwords import HashingPoolSaturated
+from recurrence import merge_occurrences, occurrence_window, window_queries, with_series_fields
+from revocation import LOAD_TIMEOUT, REFRESH_BATCH_SIZE, REFRESH_PROJECTION
+from revisions import revision_update
+from rollups import rollup_operations
+from serialization import DEFAULT_JSON_PROVIDER, create_json_provider, to_public
+
+app = cors(Quart(__name__))
+app.json = create_json_provider(app, os.environ.get('JSON_PROVIDER', DEFAULT_JSON_PROVIDER))
+
+# JWT and pagination configuration, the same as app.py's
+app.config.update(jwt_config())
+app.config.update(listing_config())
+
+# Only the embedded life-block contents layout is served here so far
+app.config['LIFE_BLOCK_CONTENT_STORAGE'] = os.environ.get('LIFE_BLOCK_CONTENT_STORAGE', 'embedded')
+if app.config['LIFE_BLOCK_CONTENT_STORAGE'] != 'embedded':
+    raise RuntimeError('async_app serves LIFE_BLOCK_CONTENT_STORAGE=embedded only; use app.py for collection mode')
+
+# Per-process state, configured like app.py's
+password_hasher = create_password_hasher()
+identity_cache = create_identity_cache()
+revocation_list = create_revocation_list()
+
+# (rule, method) of the app.py routes not served here
+SYNC_ONLY_ROUTES = {
+    ('/auth/deactivate', 'POST'),
+    ('/life_blocks/<id>', 'GET'),
+    ('/life_blocks/<id>/contents', 'GET'),
+    ('/tasks/<id>', 'GET'),
+    ('/goals/<id>', 'GET'),
+    ('/finances/summary', 'GET'),
+    ('/finances/insights', 'GET'),
+    ('/transactions/import', 'POST'),
+    ('/transactions/import/<job_id>', 'GET'),
+    ('/<any(tasks, transactions, schedules, goals):kind>/bulk', 'POST'),
+    ('/schedules/occurrences', 'GET'),
+    ('/schedules/conflicts', 'GET'),
+    ('/schedules/free-slots', 'GET'),
+    ('/schedules/<id>/exceptions', 'POST'),
+    ('/cache/stats', 'GET'),
+}
+
+
+@app.after_serving
+async def shutdown():
+    await close_async_client()
+
+
+@app.errorhandler(InvalidId)
+async def invalid_id(error):
+    """A path id that is not an ObjectId cannot name any document"""
+    return jsonify({'error': 'Not found'}), 404
+
+
+def collection(name):
+    return get_async_db()[name]
+
+
+# --- JWT ---
+def create_access_token(identity):
+    """Issue an access token with the same claims flask_jwt_extended uses"""
+    now = datetime.now(timezone.utc)
+    claims = {
+        'fresh': False,
+        'iat': now,
+        'jti': str(uuid.uuid4()),
+        'type': 'access',
+        'sub': identity,
+        'nbf': now,
+        'exp': now + app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    }
+    return pyjwt.encode(claims, app.config['JWT_SECRET_KEY'], algorithm='HS256')
+
+
+def jwt_required(fn):
+    """Async equivalent of flask_jwt_extended's @jwt_required(), same error bodies"""
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header:
+            return jsonify({'msg': 'Missing Authorization Header'}), 401
+        parts = auth_header.split()
+        if len(parts) != 2 or parts[0] != 'Bearer':
+            return jsonify({'msg': "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}), 422
+        try:
+            claims = pyjwt.decode(parts[1], current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+        except pyjwt.ExpiredSignatureError:
+            return jsonify({'msg': 'Token has expired'}), 401
+        except pyjwt.InvalidTokenError as e:
+            return jsonify({'msg': str(e)}), 422
+        if claims.get('type') != 'access':
+            return jsonify({'msg': 'Only non-refresh tokens are allowed'}), 422
+        if await is_revoked(claims['jti']):
+            return jsonify({'msg': 'Token has been revoked'}), 401
+        if not is_usable_identity(await resolve_identity(claims['sub'])):
+            return jsonify({'msg': ACCOUNT_UNAVAILABLE}), 401
+        g.jwt_identity = claims['sub']
+        g.jwt = claims
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+async def resolve_identity(user_id):
+    """Async read-through of identity_cache"""
+    hit, identity = identity_cache.cached(user_id)
+    if hit:
+        return identity
+    query = identity_filter(user_id)
+    user = await collection('users').find_one(query, IDENTITY_PROJECTION) if query else None
+    return identity_cache.store(user_id, user)
+
+
+async def is_revoked(jti):
+    """Async port of RevocationList.is_revoked"""
+    await refresh_revocations()
+    if not revocation_list.might_be_revoked(jti):
+        return False
+    revoked = revocation_list.confirmed(jti)
+    if revoked is None:
+        found = await collection('revoked_tokens').find_one({'_id': jti}, {'_id': 1})
+        revoked = revocation_list.remember(jti, found is not None)
+    return revoked
+
+
+async def refresh_revocations():
+    claimed = revocation_list.begin_refresh()
+    if claimed is None:
+        if not revocation_list.loaded.is_set():
+            await asyncio.to_thread(revocation_list.loaded.wait, LOAD_TIMEOUT)
+        return
+    if claimed[1] and revocation_list.loaded.is_set():
+        # Periodic rebuilds run in the background; the first load must finish first
+        asyncio.create_task(load_revocations(*claimed))
+    else:
+        await load_revocations(*claimed)
+
+
+async def load_revocations(query, rebuild):
+    try:
+        revocations = await collection('revoked_tokens').find(
+            query, REFRESH_PROJECTION, batch_size=REFRESH_BATCH_SIZE).to_list(None)
+    except Exception:
+        revocation_list.abort_refresh()
+        raise
+    # Filling a filter with a full rebuild takes a while; keep it off the event loop
+    await asyncio.to_thread(revocation_list.finish_refresh, revocations, rebuild)
+
+
+def get_jwt_identity():
+    return g.jwt_identity
+
+
+def get_jwt():
+    return g.jwt
+
+
+def hashing_busy_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+
+# --- Listing ---
+async def stream_json_array(cursor, batch_size, dumps):
+    # The body is sent after the request context is gone, so dumps is bound up front
+    yield '['
+    first = True
+    batch = []
+    async for document in cursor:
+        batch.append(dumps(to_public(document), separators=(',', ':')))
+        if len(batch) >= batch_size:
+            yield ('' if first else ',') + ','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield ']'
+
+
+async def list_user_documents(coll, user_id, views=None, window_field=None):
+    """Async port of app.list_user_documents (keyset pages, legacy array, stream, fields, window)"""
+    query = {'userId': user_id}
+    args = request.args
+    try:
+        projection = request_projection(args, current_app.config, views)
+        window = parse_window(args) if window_field else None
+        if window:
+            query[window_field] = window
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if args.get('stream', '').lower() == 'true':
+        batch_size = current_app.config['STREAM_BATCH_SIZE']
+        cursor = coll.find(query, projection, batch_size=batch_size).sort('_id', 1)
+        return Response(
+            stream_json_array(cursor, batch_size, current_app.json.dumps),
+            mimetype='application/json'
+        )
+    if current_app.config['LEGACY_LIST_RESPONSES'] and 'limit' not in args and 'cursor' not in args:
+        return jsonify(to_public(await coll.find(query, projection).to_list(None)))
+
+    try:
+        limit = parse_page_limit(args.get('limit'), current_app.config)
+        if args.get('cursor'):
+            query['_id'] = {'$gt': decode_cursor(args['cursor'])}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    documents = await coll.find(query, projection).sort('_id', 1).limit(limit + 1).to_list(None)
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = encode_cursor(documents[-1]['_id']) if has_more else None
+
+    return jsonify({
+        'items': to_public(documents),
+        'next': next_cursor
+    })
+
+
+async def bump(user_id, *kinds):
+    await collection('revisions').update_one({'_id': user_id}, revision_update(*kinds), upsert=True)
+
+
+def bumps_revision(*kinds):
+    """Async counterpart of app.bumps_revision, so ETags served by app.py stay valid"""
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            response = await current_app.make_response(await fn(*args, **kwargs))
+            if response.status_code < 400:
+                await bump(get_jwt_identity(), *kinds)
+                if 'users' in kinds:
+                    identity_cache.invalidate(get_jwt_identity())
+            return response
+        return wrapper
+    return decorator
+
+
+async def record_change(user_id, kind, before=None, after=None):
+    update = analytics_update(kind, before, after)
+    if update:
+        await collection('analytics').update_one({'userId': user_id}, update, upsert=True)
+    if kind == 'transactions':
+        operations = rollup_operations(user_id, [(before, after)])
+        if operations:
+            await collection('transaction_rollups').bulk_write(operations, ordered=False)
+
+
+async def insert_user_document(name, data, stamp=stamp_created):
+    """Shared body of the simple POST handlers: stamp, insert, update analytics, echo back"""
+    user_id = get_jwt_identity()
+    data = stamp(with_native_dates(name, data), user_id, datetime.utcnow())
+    await collection(name).insert_one(data)
+    if name == 'finances':
+        await collection('analytics').update_one({'userId': user_id}, budget_update(data), upsert=True)
+    else:
+        await record_change(user_id, name, after=data)
+    return jsonify(to_public(data)), 201
+
+
+@app.route('/')
+async def index():
+    return "Flask server is running!"
+
+
+# --- Authentication Endpoints ---
+@app.route('/auth/signup', methods=['POST'])
+async def signup():
+    try:
+        data = await request.get_json()
+
+        is_valid, message = validate_user_data(data, is_signup=True)
+        if not is_valid:
+            return jsonify({'error': message}), 400
+
+        new_user_document = new_user(data, await password_hasher.hash_async(data['password']), datetime.utcnow())
+        try:
+            result = await collection('users').insert_one(new_user_document)
+        except DuplicateKeyError:
+            return jsonify({'error': 'User already exists with this email'}), 400
+
+        access_token = create_access_token(str(result.inserted_id))
+        user_data = to_public(new_user_document)
+        del user_data['password']
+
+        return jsonify({
+            'message': 'User created successfully',
+            'user': user_data,
+            'access_token': access_token
+        }), 201
+
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/auth/login', methods=['POST'])
+async def login():
+    try:
+        data = await request.get_json()
+
+        is_valid, message = validate_user_data(data, is_signup=False)
+        if not is_valid:
+            return jsonify({'error': message}), 400
+
+        email = data['email'].strip().lower()
+        password = data['password']
+
+        user = await collection('users').find_one({'email': email})
+        if not user:
+            return jsonify({'error': 'Invalid email or password'}), 401
+
+        if not await password_hasher.verify_async(password, user['password']):
+            return jsonify({'error': 'Invalid email or password'}), 401
+
+        if not user.get('isActive', True):
+            return jsonify({'error': 'Account is deactivated'}), 401
+
+        access_token = create_access_token(str(user['_id']))
+
+        login_update = {'lastLogin': datetime.utcnow()}
+        if password_hasher.needs_rehash(user['password']):
+            login_update['password'] = await password_hasher.hash_async(password)
+        await collection('users').update_one({'_id': user['_id']}, {'$set': login_update})
+        await bump(str(user['_id']), 'users')
+
+        user_data = to_public(user)
+        del user_data['password']
+
+        return jsonify({
+            'message': 'Login successful',
+            'user': user_data,
+            'access_token': access_token
+        }), 200
+
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/auth/me', methods=['GET'])
+@jwt_required
+async def get_current_user():
+    try:
+        try:
+            projection = user_projection(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        user = await collection('users').find_one({'_id': ObjectId(get_jwt_identity())}, projection)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        return jsonify({'user': to_public(user)}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/auth/logout', methods=['POST'])
+@jwt_required
+async def logout():
+    try:
+        token = get_jwt()
+        await collection('revoked_tokens').update_one(
+            {'_id': token['jti']},
+            {'$setOnInsert': {
+                'userId': get_jwt_identity(),
+                'expiresAt': datetime.utcfromtimestamp(token['exp']),
+                'revokedAt': datetime.utcnow()
+            }},
+            upsert=True
+        )
+        revocation_list.add(token['jti'])
+        return jsonify({'message': 'Logged out successfully'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/auth/profile', methods=['PUT'])
+@jwt_required
+@bumps_revision('users')
+async def update_profile():
+    try:
+        data = await request.get_json()
+
+        try:
+            update_data = profile_update(data, datetime.utcnow())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            updated_user = await collection('users').find_one_and_update(
+                {'_id': ObjectId(get_jwt_identity())},
+                {'$set': update_data},
+                projection={'password': 0},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return jsonify({'error': 'Email already taken'}), 400
+
+        if not updated_user:
+            return jsonify({'error': 'Failed to update profile'}), 400
+
+        return jsonify({'user': to_public(updated_user), 'message': 'Profile updated successfully'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/auth/change-password', methods=['PUT'])
+@jwt_required
+@bumps_revision('users')
+async def change_password():
+    try:
+        data = await request.get_json()
+        current_user_id = ObjectId(get_jwt_identity())
+
+        if not data.get('currentPassword') or not data.get('newPassword'):
+            return jsonify({'error': 'Current password and new password are required'}), 400
+
+        user = await collection('users').find_one({'_id': current_user_id})
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if not await password_hasher.verify_async(data['currentPassword'], user['password']):
+            return jsonify({'error': 'Current password is incorrect'}), 400
+
+        new_password_hash = await password_hasher.hash_async(data['newPassword'])
+        result = await collection('users').update_one(
+            {'_id': current_user_id},
+            {'$set': {'password': new_password_hash, 'updatedAt': datetime.utcnow()}}
+        )
+        if result.modified_count == 0:
+            return jsonify({'error': 'Failed to change password'}), 400
+
+        return jsonify({'message': 'Password changed successfully'}), 200
+
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# --- Life Blocks Endpoints ---
+@app.route('/life_blocks', methods=['GET'])
+@jwt_required
+async def get_life_blocks():
+    return await list_user_documents(collection('life_blocks'), get_jwt_identity(), LIFE_BLOCK_VIEWS)
+
+
+@app.route('/life_blocks', methods=['POST'])
+@jwt_required
+@bumps_revision('life_blocks')
+async def create_life_block():
+    try:
+        data, contents = new_life_block(await request.get_json(), get_jwt_identity(), datetime.utcnow())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data['contents'] = contents
+
+    await collection('life_blocks').insert_one(data)
+    return jsonify(to_public(data)), 201
+
+
+@app.route('/life_blocks/<id>', methods=['PUT'])
+@jwt_required
+@bumps_revision('life_blocks')
+async def update_life_block(id):
+    data = life_block_update(await request.get_json(), datetime.utcnow(), contents_in_collection=False)
+
+    updated_block = await collection('life_blocks').find_one_and_update(
+        {'_id': ObjectId(id), 'userId': get_jwt_identity()},
+        {'$set': data},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_block:
+        return jsonify({'error': 'Life block not found or access denied'}), 404
+
+    return jsonify(to_public(updated_block))
+
+
+@app.route('/life_blocks/<id>', methods=['DELETE'])
+@jwt_required
+@bumps_revision('life_blocks')
+async def delete_life_block(id):
+    result = await collection('life_blocks').delete_one({'_id': ObjectId(id), 'userId': get_jwt_identity()})
+    if result.deleted_count == 0:
+        return jsonify({'error': 'Life block not found or access denied'}), 404
+
+    return jsonify({'message': 'Life block deleted successfully', 'deleted': True})
+
+
+@app.route('/life_blocks/<id>/contents', methods=['POST'])
+@jwt_required
+@bumps_revision('life_blocks')
+async def add_content_to_life_block(id):
+    data = await request.get_json()
+
+    now = datetime.utcnow()
+    content = new_content(data, now)
+    updated_block = await collection('life_blocks').find_one_and_update(
+        {'_id': ObjectId(id), 'userId': get_jwt_identity()},
+        {'$push': {'contents': content}, '$set': {'updatedAt': now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_block:
+        return jsonify({'error': 'Life block not found or access denied'}), 404
+
+    return jsonify(to_public(updated_block))
+
+
+@app.route('/life_blocks/<id>/contents/<content_id>', methods=['PUT'])
+@jwt_required
+@bumps_revision('life_blocks')
+async def update_content_in_life_block(id, content_id):
+    user_id = get_jwt_identity()
+    data = await request.get_json()
+
+    now = datetime.utcnow()
+    updated_block = await collection('life_blocks').find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id, 'contents.id': content_id},
+        {'$set': {
+            'contents.$.data': data.get('data', {}),
+            'contents.$.updatedAt': now,
+            'updatedAt': now
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_block:
+        if not await collection('life_blocks').find_one({'_id': ObjectId(id), 'userId': user_id}, {'_id': 1}):
+            return jsonify({'error': 'Life block not found or access denied'}), 404
+        return jsonify({'error': 'Content not found'}), 404
+
+    return jsonify(to_public(updated_block))
+
+
+@app.route('/life_blocks/<id>/contents/<content_id>', methods=['DELETE'])
+@jwt_required
+@bumps_revision('life_blocks')
+async def delete_content_from_life_block(id, content_id):
+    now = datetime.utcnow()
+    updated_block = await collection('life_blocks').find_one_and_update(
+        {'_id': ObjectId(id), 'userId': get_jwt_identity()},
+        {'$pull': {'contents': {'id': content_id}}, '$set': {'updatedAt': now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_block:
+        return jsonify({'error': 'Life block not found or access denied'}), 404
+
+    return jsonify(to_public(updated_block))
+
+
+# --- Tasks Endpoints ---
+@app.route('/tasks', methods=['GET'])
+@jwt_required
+async def get_tasks():
+    return await list_user_documents(collection('tasks'), get_jwt_identity(), window_field=WINDOW_FIELDS['tasks'])
+
+
+@app.route('/tasks', methods=['POST'])
+@jwt_required
+@bumps_revision('tasks')
+async def create_task():
+    return await insert_user_document('tasks', await request.get_json(), stamp_task)
+
+
+@app.route('/tasks/<id>', methods=['PUT'])
+@jwt_required
+@bumps_revision('tasks')
+async def update_task(id):
+    user_id = get_jwt_identity()
+    data = with_native_dates('tasks', updatable_fields(await request.get_json()))
+    data['updatedAt'] = datetime.utcnow()
+    previous_task = await collection('tasks').find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id},
+        {'$set': data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous_task:
+        return jsonify({'error': 'Task not found or access denied'}), 404
+    updated_task = {**previous_task, **data}
+    await record_change(user_id, 'tasks', before=previous_task, after=updated_task)
+    return jsonify(to_public(updated_task))
+
+
+@app.route('/tasks/<id>', methods=['DELETE'])
+@jwt_required
+@bumps_revision('tasks')
+async def delete_task(id):
+    user_id = get_jwt_identity()
+    deleted_task = await collection('tasks').find_one_and_delete({'_id': ObjectId(id), 'userId': user_id})
+    if deleted_task:
+        await record_change(user_id, 'tasks', before=deleted_task)
+    return jsonify({'message': 'Task deleted', 'deleted': deleted_task is not None})
+
+
+# --- Finances Endpoints ---
+@app.route('/finances', methods=['GET'])
+@jwt_required
+async def get_finances():
+    return await list_user_documents(collection('finances'), get_jwt_identity())
+
+
+@app.route('/finances', methods=['POST'])
+@jwt_required
+@bumps_revision('finances')
+async def create_finance():
+    return await insert_user_document('finances', await request.get_json())
+
+
+@app.route('/transactions', methods=['GET'])
+@jwt_required
+async def get_transactions():
+    return await list_user_documents(collection('transactions'), get_jwt_identity())
+
+
+@app.route('/transactions', methods=['POST'])
+@jwt_required
+@bumps_revision('transactions')
+async def add_transaction():
+    return await insert_user_document('transactions', await request.get_json())
+
+
+# --- Schedule Endpoints ---
+@app.route('/schedules', methods=['GET'])
+@jwt_required
+async def get_schedules():
+    """With ?from=&to=, the events in the window, recurring ones expanded (as in app.py)"""
+    user_id = get_jwt_identity()
+    if 'from' in request.args or 'to' in request.args:
+        if any(name in request.args for name in ('limit', 'cursor', 'stream')):
+            return jsonify({'error': 'A schedule window is not paginated or streamed'}), 400
+        try:
+            start, end = occurrence_window(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        single, series = window_queries(user_id, start, end)
+        events, series = await asyncio.gather(collection('schedules').find(single).to_list(None),
+                                              collection('schedules').find(series).to_list(None))
+        return jsonify(to_public(merge_occurrences(events, series, start, end)))
+    return await list_user_documents(collection('schedules'), user_id)
+
+
+@app.route('/schedules', methods=['POST'])
+@jwt_required
+@bumps_revision('schedules')
+async def create_schedule_item():
+    data = with_native_dates('schedules', await request.get_json())
+    try:
+        with_series_fields('schedules', data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return await insert_user_document('schedules', data)
+
+
+# --- Analytics Endpoints ---
+@app.route('/analytics', methods=['GET'])
+@jwt_required
+async def get_analytics():
+    analytics = await collection('analytics').find_one({'userId': get_jwt_identity()})
+    return jsonify(to_public(with_derived_metrics(analytics)) if analytics else {})
+
+
+@app.route('/analytics', methods=['POST'])
+@jwt_required
+@bumps_revision('analytics')
+async def create_analytics():
+    analytics = await collection('analytics').find_one_and_update(
+        {'userId': get_jwt_identity()},
+        client_analytics_update(await request.get_json(), datetime.utcnow()),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return jsonify(to_public(with_derived_metrics(analytics))), 201
+
+
+# --- Goals Endpoints ---
+@app.route('/goals', methods=['GET'])
+@jwt_required
+async def get_goals():
+    return await list_user_documents(collection('goals'), get_jwt_identity())
+
+
+@app.route('/goals', methods=['POST'])
+@jwt_required
+@bumps_revision('goals')
+async def create_goal():
+    return await insert_user_document('goals', await request.get_json(), stamp_goal)
+
+
+@app.route('/goals/<id>', methods=['PUT'])
+@jwt_required
+@bumps_revision('goals')
+async def update_goal(id):
+    user_id = get_jwt_identity()
+    data = updatable_fields(await request.get_json())
+    previous_goal = await collection('goals').find_one_and_update(
+        {'_id': ObjectId(id), 'userId': user_id},
+        {'$set': data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous_goal:
+        await record_change(user_id, 'goals', before=previous_goal, after={**previous_goal, **data})
+    return jsonify({'success': True})
+
+
+@app.route('/goals/<id>', methods=['DELETE'])
+@jwt_required
+@bumps_revision('goals')
+async def delete_goal(id):
+    user_id = get_jwt_identity()
+    deleted_goal = await collection('goals').find_one_and_delete({'_id': ObjectId(id), 'userId': user_id})
+    if deleted_goal:
+        await record_change(user_id, 'goals', before=deleted_goal)
+    return jsonify({'success': True})
+
+
+# --- Dashboard Endpoint ---
+@app.route('/dashboard', methods=['GET'])
+@jwt_required
+async def get_dashboard():
+    user_id = get_jwt_identity()
+    start, end = upcoming_window(datetime.utcnow())
+    single, series = window_queries(user_id, start, end)
+    names = list(DASHBOARD_SECTIONS)
+    *sections, events, series, analytics = await asyncio.gather(*[
+        collection(name).find({'userId': user_id}, projection).sort('_id', -1).limit(limit).to_list(None)
+        for name, (projection, limit) in DASHBOARD_SECTIONS.items()
+    ], collection('schedules').find(single).to_list(None), collection('schedules').find(series).to_list(None),
+        collection('analytics').find_one({'userId': user_id}))
+
+    dashboard = {name: to_public(section) for name, section in zip(names, sections)}
+    dashboard['schedules'] = to_public(upcoming_section(merge_occurrences(events, series, start, end)))
+    dashboard['analytics'] = with_derived_metrics(to_public(analytics)) or {}
+    return jsonify(dashboard)
+
+
+if __name__ == '__main__':
+    app.run(port=5001)
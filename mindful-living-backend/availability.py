@@ -0,0 +1,184 @@
+"""Double-bookings and free time in a user's calendar window.
+
+The busy blocks of a window are the events (single and recurring) plus,
+optionally, open tasks as a block ending at their due date. Both answers
+come from one sort of those blocks:
+
+  find_conflicts  sweeps start/end boundaries in time order, keeping the set
+                  of active blocks; a conflict is a maximal span where two
+                  or more are active
+  free_slots      walks the blocks by start, tracking where busy time ends;
+                  every gap of at least `duration` is a slot
+
+so both cost O(n log n) in the blocks of the window, plus the output.
+An event counts if it ends after the window starts, however long before it
+began: single events are found by endTime, and each series is expanded from
+its own longest occurrence before the window. Conflicts are reported
+clipped to the window. Events without an endTime occupy no time.
+"""
+from datetime import datetime, time, timedelta
+
+from recurrence import expand
+
+DEFAULT_DURATION_MINUTES = 60
+DEFAULT_TASK_MINUTES = 30
+
+
+def _minutes(args, name, default):
+    value = args.get(name)
+    if value in (None, ''):
+        return timedelta(minutes=default)
+    try:
+        minutes = int(value)
+    except ValueError:
+        minutes = 0
+    if minutes < 1:
+        raise ValueError(f'{name} must be a positive number of minutes')
+    return timedelta(minutes=minutes)
+
+
+def _time_of_day(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a HH:MM time')
+
+
+def _block(start, end, kind, document):
+    return start, end, {**document, 'kind': kind}
+
+
+def _duration(start, end):
+    if isinstance(start, datetime) and isinstance(end, datetime):
+        return max(end - start, timedelta(0))
+    return timedelta(0)
+
+
+def longest_occurrence(series):
+    """How long the longest occurrence of a stored series lasts, changed occurrences included"""
+    duration = _duration(series['startTime'], series.get('endTime'))
+    longest = duration
+    for exception in series.get('exceptions') or []:
+        if not isinstance(exception, dict) or exception.get('cancelled'):
+            continue
+        moved = exception.get('startTime', exception['occurrence'])
+        if 'endTime' in exception:
+            longest = max(longest, _duration(moved, exception['endTime']))
+        else:
+            longest = max(longest, duration)
+    return longest
+
+
+def overlapping_events(schedules, user_id, start, end):
+    """Single events and series occurrences that start before `end` and may end after `start`"""
+    events = list(schedules.find({'userId': user_id, 'recurrence': None,
+                                  'endTime': {'$gt': start}, 'startTime': {'$lt': end}}))
+    # Every series has a seriesEnd date: one that ended before the window may
+    # still have a long last occurrence reaching into it
+    for series in schedules.find({'userId': user_id, 'seriesEnd': {'$gte': datetime.min}, 'startTime': {'$lt': end}}):
+        events.extend(expand(series, start - longest_occurrence(series), end))
+    return events
+
+
+def calendar_blocks(schedules, tasks, user_id, start, end, include_tasks=False, task_minutes=None):
+    """(start, end, item) for every event and, if asked, open task overlapping [start, end)"""
+    blocks = [
+        _block(event['startTime'], event['endTime'], 'event', event)
+        for event in overlapping_events(schedules, user_id, start, end)
+        if isinstance(event.get('endTime'), datetime) and event['endTime'] > max(event['startTime'], start)
+    ]
+    if include_tasks:
+        task_minutes = task_minutes or timedelta(minutes=DEFAULT_TASK_MINUTES)
+        query = {'userId': user_id, 'dueDate': {'$gt': start, '$lt': end + task_minutes},
+                 'status': {'$ne': 'completed'}}
+        blocks.extend(
+            _block(task['dueDate'] - task_minutes, task['dueDate'], 'task', task)
+            for task in tasks.find(query, {'title': 1, 'dueDate': 1, 'status': 1, 'priority': 1})
+        )
+    return blocks
+
+
+def find_conflicts(blocks, start=None, end=None):
+    """Maximal spans where two or more blocks overlap, with the blocks involved.
+
+    Blocks that only touch (one ends when the next starts) do not conflict.
+    Spans are clipped to [start, end) when given; the blocks keep their times.
+    """
+    # Ends sort before starts at the same instant
+    boundaries = sorted(
+        [(start, 1, index) for index, (start, end, _) in enumerate(blocks) if end > start]
+        + [(end, 0, index) for index, (start, end, _) in enumerate(blocks) if end > start]
+    )
+    conflicts = []
+    active = set()
+    current = None
+    for moment, is_start, index in boundaries:
+        if is_start:
+            active.add(index)
+            if current:
+                current['members'].add(index)
+                current['maxOverlap'] = max(current['maxOverlap'], len(active))
+            elif len(active) == 2:
+                current = {'start': moment, 'members': set(active), 'maxOverlap': 2}
+        else:
+            active.discard(index)
+            if current and len(active) < 2:
+                current['end'] = moment
+                conflicts.append(current)
+                current = None
+
+    return [
+        {'start': max(conflict['start'], start) if start else conflict['start'],
+         'end': min(conflict['end'], end) if end else conflict['end'],
+         'maxOverlap': conflict['maxOverlap'],
+         'items': [blocks[index][2] for index in sorted(conflict['members'], key=lambda i: blocks[i][:2])]}
+        for conflict in conflicts
+        if (not start or conflict['end'] > start) and (not end or conflict['start'] < end)
+    ]
+
+
+def outside_hours(start, end, day_start, day_end):
+    """Blocks covering the time of each day in [start, end) outside day_start-day_end"""
+    if day_start is None and day_end is None:
+        return []
+    day_start, day_end = day_start or time.min, day_end or time.max
+    if day_end <= day_start:
+        raise ValueError('dayEnd must be after dayStart')
+    blocks = []
+    day = datetime.combine(start.date(), time.min)
+    while day < end:
+        blocks.append((day, datetime.combine(day.date(), day_start), None))
+        blocks.append((datetime.combine(day.date(), day_end), day + timedelta(days=1), None))
+        day += timedelta(days=1)
+    return blocks
+
+
+def free_slots(blocks, start, end, duration):
+    """Gaps of at least `duration` in [start, end) not covered by any block, as (start, end)"""
+    slots = []
+    free_from = start
+    for block_start, block_end, _ in sorted(blocks, key=lambda block: block[:2]):
+        if block_end <= free_from:
+            continue
+        if block_start >= end:
+            break
+        if block_start - free_from >= duration:
+            slots.append((free_from, block_start))
+        free_from = max(free_from, block_end)
+    if end - free_from >= duration:
+        slots.append((free_from, end))
+    return slots
+
+
+def parse_availability_args(args):
+    """Options shared by the conflict and free-slot endpoints, or ValueError"""
+    return {
+        'include_tasks': args.get('includeTasks', '').lower() == 'true',
+        'task_minutes': _minutes(args, 'taskMinutes', DEFAULT_TASK_MINUTES),
+        'duration': _minutes(args, 'duration', DEFAULT_DURATION_MINUTES),
+        'day_start': _time_of_day(args, 'dayStart'),
+        'day_end': _time_of_day(args, 'dayEnd'),
+    }
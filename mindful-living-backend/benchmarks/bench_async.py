@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Concurrency of the sync app under gunicorn versus async_app under hypercorn.
+
+Both serve GET /tasks?limit=50 for the user bench_routes.py seeds, from one
+process (WEB_CONCURRENCY=1; gunicorn keeps its GUNICORN_THREADS threads) and
+without the response cache, at growing numbers of open connections.
+
+Without MONGODB_URI the data lives in an in-process mongomock store, and
+every driver call is delayed by LATENCY_MS (default 20, a MongoDB across a
+network) to stand in for a server round trip: a thread sleep in the sync
+app, an awaited sleep in the async one. That is the waiting the async app
+is meant to overlap; the numbers say nothing about MongoDB itself.
+
+Usage: python benchmarks/bench_async.py [seconds] [connections ...]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_routes import PORT, access_token, load, seed, serve
+
+LATENCY = float(os.environ.get('LATENCY_MS', 20)) / 1000
+MOCKED = not os.environ.get('MONGODB_URI')
+
+
+class SlowCollection:
+    """Sync collection whose calls take LATENCY longer, like a network round trip"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            time.sleep(LATENCY)
+            return attribute(*args, **kwargs)
+        return call
+
+
+class SlowCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit):
+        self._cursor = self._cursor.limit(limit)
+        return self
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(LATENCY)
+        return list(self._cursor)
+
+
+class AsyncSlowCollection:
+    """The async driver calls async_app makes, LATENCY late, over a sync collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs):
+        kwargs.pop('batch_size', None)
+        return SlowCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(LATENCY)
+            return method(*args, **kwargs)
+        return call
+
+
+def mock_db():
+    import mongomock
+
+    import database
+    db = mongomock.MongoClient()[database.db_name]
+    seed(db)
+    return db
+
+
+class SlowDatabase:
+    def __init__(self, db, collection_class):
+        self._db = db
+        self._collection_class = collection_class
+
+    def __getitem__(self, name):
+        return self._collection_class(self._db[name])
+
+
+def create_sync_app():
+    """gunicorn entry point: app.py on the slow mock (or on MONGODB_URI)"""
+    import database
+    if MOCKED:
+        db = SlowDatabase(mock_db(), SlowCollection)
+        database.get_db = lambda: db
+    else:
+        seed(database.get_db())
+    import app
+    return app.create_app()
+
+
+def create_async_app():
+    """hypercorn entry point: async_app on the slow mock (or on MONGODB_URI)"""
+    import async_app
+    if MOCKED:
+        db = SlowDatabase(mock_db(), AsyncSlowCollection)
+        async_app.get_async_db = lambda: db
+    else:
+        import database
+        seed(database.get_db())
+    return async_app.app
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    connections = [int(n) for n in sys.argv[2:]] or [16, 64, 256]
+    here = os.path.dirname(os.path.abspath(__file__))
+    servers = {
+        'gunicorn (sync)': ['gunicorn', '-c', 'gunicorn.conf.py', '--pythonpath', here,
+                            '--bind', f'127.0.0.1:{PORT}', 'bench_async:create_sync_app()'],
+        'hypercorn (async)': ['hypercorn', '--bind', f'127.0.0.1:{PORT}', '--workers', '1',
+                              'bench_async:create_async_app()'],
+    }
+    env = {'WEB_CONCURRENCY': '1', 'RESPONSE_CACHE': 'none', 'ENSURE_INDEXES': 'false',
+           'PYTHONPATH': here}
+    token = access_token()
+    print(f"GET /tasks?limit=50, one process, {seconds:.0f}s, "
+          + (f'mongomock + {LATENCY * 1000:.0f} ms per driver call' if MOCKED else os.environ['MONGODB_URI']))
+    print(f'{"server":20s}' + ''.join(f'{n:>10d}c' for n in connections))
+    failed = False
+    for label, command in servers.items():
+        server = serve(env, command)
+        try:
+            url = f'http://127.0.0.1:{PORT}/tasks?limit=50'
+            load(url, 4, 1, token)
+            rates = [load(url, n, seconds, token) for n in connections]
+        finally:
+            server.terminate()
+            server.wait()
+        print(f'{label:20s}' + ''.join(f'{rate:7.0f}/s{"*" if errors else " "} ' for rate, errors in rates))
+        failed = failed or any(errors for _, errors in rates)
+    if failed:
+        print('* some requests failed')
+
+
+if __name__ == '__main__':
+    main()
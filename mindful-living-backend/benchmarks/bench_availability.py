@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Time conflict detection and the free-slot finder on dense calendars.
+
+Fills a one-week window with N events of 15 minutes to 2 hours at random
+starts, so calendars above a few hundred events are mostly double-booked,
+and compares the sweep in availability.py with the pairwise comparison a
+client does today. Both agree on which events are double-booked before
+anything is timed; the pairwise scan is skipped above PAIRWISE_LIMIT events.
+
+Usage: python benchmarks/bench_availability.py [events ...]
+"""
+
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, time, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from availability import find_conflicts, free_slots, outside_hours
+
+WINDOW_START = datetime(2026, 10, 19)
+WINDOW_END = WINDOW_START + timedelta(days=7)
+PAIRWISE_LIMIT = 5000
+
+
+def dense_calendar(count):
+    random.seed(count)
+    span = int((WINDOW_END - WINDOW_START).total_seconds() // 60)
+    blocks = []
+    for n in range(count):
+        start = WINDOW_START + timedelta(minutes=random.randrange(0, span, 5))
+        end = start + timedelta(minutes=random.randrange(15, 121, 5))
+        blocks.append((start, end, {'id': str(n), 'title': f'Event {n}', 'kind': 'event'}))
+    return blocks
+
+
+def pairwise_double_booked(blocks):
+    booked = set()
+    for i, (start, end, _) in enumerate(blocks):
+        for j in range(i + 1, len(blocks)):
+            other_start, other_end, _ = blocks[j]
+            if start < other_end and other_start < end:
+                booked.update((i, j))
+    return booked
+
+
+def best(run, number):
+    return min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [50, 500, 5000, 50000]
+    hours = outside_hours(WINDOW_START, WINDOW_END, time(9), time(17))
+    print(f'{"events":>7s} {"conflicts":>9s} {"sweep":>10s} {"free slots":>11s} {"pairwise":>11s}')
+    for size in sizes:
+        blocks = dense_calendar(size)
+        conflicts = find_conflicts(blocks)
+        if size <= PAIRWISE_LIMIT:
+            members = {int(item['id']) for conflict in conflicts for item in conflict['items']}
+            assert members == pairwise_double_booked(blocks), 'sweep and pairwise disagree'
+
+        number = max(1, 20000 // size)
+        sweep = best(lambda: find_conflicts(blocks), number)
+        slots = best(lambda: free_slots(blocks + hours, WINDOW_START, WINDOW_END, timedelta(minutes=30)), number)
+        pairwise = best(lambda: pairwise_double_booked(blocks), 1) if size <= PAIRWISE_LIMIT else None
+        print(f'{size:7d} {len(conflicts):9d} {sweep * 1e3:8.2f}ms {slots * 1e3:9.2f}ms '
+              + (f'{pairwise * 1e3:9.1f}ms' if pairwise is not None else f'{"-":>11s}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Size and CPU cost of each response coding on a long transactions list.
+
+Encodes N transactions the way GET /transactions does, then compresses the
+body with every installed coding at a few levels. brotli and zstd are only
+measured when the brotli and zstandard packages are installed.
+
+Usage: python benchmarks/bench_compression.py [transactions]
+"""
+
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson.objectid import ObjectId
+from flask import Flask
+
+from response_compression import available_encodings, compress
+from serialization import MongoJSONProvider, to_public
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 8, 11), 'zstd': (1, 3, 9, 19)}
+CATEGORIES = ['Food', 'Rent', 'Transport', 'Salary', 'Entertainment', 'Utilities', 'Health']
+PAYEES = ['Corner Coffee', 'City Metro', 'Grocery Mart', 'Acme Payroll', 'Power & Light',
+          'Cinema 8', 'Pharmacy Plus', 'Landlord LLC']
+
+
+def make_transactions(count):
+    random.seed(7)
+    user_id = str(ObjectId())
+    start = datetime(2020, 1, 1)
+    return [{
+        '_id': ObjectId(),
+        'userId': user_id,
+        'description': f'{random.choice(PAYEES)} #{random.randint(1000, 9999)}',
+        'amount': round(random.uniform(-250, 120), 2),
+        'category': random.choice(CATEGORIES),
+        'date': (start + timedelta(days=i // 4)).strftime('%Y-%m-%d'),
+        'createdAt': start + timedelta(days=i // 4, minutes=i),
+    } for i in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    app = Flask('bench')
+    app.json = MongoJSONProvider(app)
+    with app.app_context():
+        body = app.json.response(to_public(make_transactions(count))).get_data()
+    print(f'{count} transactions: {len(body) / 1024:.0f} KiB uncompressed')
+
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            size = len(compress(body, encoding, level))
+            best = min(timeit.repeat(lambda: compress(body, encoding, level), number=5, repeat=3)) / 5
+            print(f'{encoding:5s} level {level:2d}: {size / 1024:7.1f} KiB '
+                  f'({size / len(body):6.1%}), {best * 1000:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Time the finance insights on a synthetic long-tenured user.
+
+Generates transactions shaped like the API stores them (date strings,
+negative expenses, a dozen categories, monthly salary) spread over several
+years and times, in memory, turning the documents into columns and
+computing every insight from the columns, and decoding the documents from
+BSON as the driver must when they come off the wire.
+
+It then stores them and their rollups for a benchmark user and times
+user_insights() end to end - the queries, decoding and computation GET
+/finances/insights does - next to the same insights computed from a scan
+of the raw transactions. The data goes to MONGODB_URI; with
+BENCH_MONGOMOCK=true it goes to an in-process mongomock store instead,
+which runs queries in Python and skips BSON, so its fetch times are not
+MongoDB's.
+
+Usage: python benchmarks/bench_insights.py [transactions]
+"""
+
+import os
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+import bson
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+from finance_insights import TransactionColumns, _parse_day, _parse_days, compute_insights, parse_as_of, user_insights
+from rollups import UNCATEGORIZED, amount_of, category_key, day_key, rebuild_user_rollups
+
+USER_ID = 'bench-insights-user'
+
+CATEGORIES = ('Food', 'Rent', 'Transport', 'Entertainment', 'Utilities', 'Health',
+              'Shopping', 'Travel', 'Education', 'Gifts', 'Insurance', None)
+FINANCE = {
+    'budgets': [{'category': name, 'budget': 400} for name in CATEGORIES if name],
+    'savingsGoals': [{'name': 'Emergency Fund', 'goal': 10000, 'current': 2500},
+                     {'name': 'Vacation', 'goal': 3000, 'current': 800}],
+}
+
+
+_DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9]
+
+
+def scanned_columns(transactions):
+    """Columns of raw transaction documents, one entry per transaction.
+
+    What the insights read before rollups: the baseline the rollup path is
+    timed against.
+    """
+    transactions = list(transactions)
+    categories = [transaction.get('category') for transaction in transactions]
+    if not set(map(type, categories)) <= {str, type(None)}:
+        categories = [category_key(transaction) for transaction in transactions]
+    index = {}
+    codes = [index.setdefault(category, len(index)) for category in categories]
+    # None, '' and a missing category are all Uncategorized
+    names = {}
+    merged = np.array([names.setdefault(category or UNCATEGORIZED, len(names)) for category in index],
+                      dtype=np.int64)
+    days = _day_column(transactions)
+    valid = days[~np.isnat(days)]
+    return TransactionColumns(days, _amount_column(transactions),
+                              merged[np.array(codes, dtype=np.int64)] if codes else np.empty(0, dtype=np.int64),
+                              list(names), len(transactions), valid.min() if len(valid) else np.datetime64('NaT'))
+
+
+def _day_column(transactions):
+    """day_key() of every transaction, checking the common YYYY-MM-DD strings in bulk"""
+    heads = [value[:10] if type(value) is str else ''
+             for value in (transaction.get('date') for transaction in transactions)]
+    try:
+        text = np.array(heads, dtype='S10')  # numpy parses bytes several times faster than str
+    except UnicodeEncodeError:
+        text = np.array([head if head.isascii() else '' for head in heads], dtype='S10')
+    chars = text.view(np.uint8).reshape(-1, 10)
+    digits = (chars >= ord('0')) & (chars <= ord('9'))
+    well_formed = digits[:, _DIGIT_POSITIONS].all(axis=1) & (chars[:, [4, 7]] == ord('-')).all(axis=1)
+    days = np.empty(len(text), dtype='datetime64[D]')
+    days[well_formed] = _parse_days(text[well_formed])
+    for position in np.flatnonzero(~well_formed):
+        days[position] = _parse_day(day_key(transactions[position]))
+    return days
+
+
+def _amount_column(transactions):
+    amounts = [transaction.get('amount') for transaction in transactions]
+    if not set(map(type, amounts)) <= {int, float}:
+        amounts = [amount_of(transaction) for transaction in transactions]
+    return np.array(amounts, dtype=np.float64)
+
+
+def synthetic_transactions(count, end, years=5):
+    random.seed(22)
+    start = end - timedelta(days=365 * years)
+    span = (end - start).days
+    created = datetime(end.year, end.month, end.day)
+    transactions = []
+    for n in range(count):
+        day = start + timedelta(days=random.randrange(span + 1))
+        if n % 40 == 0:
+            amount, category = 4500.0, 'Salary'
+        else:
+            amount, category = -round(random.uniform(2, 120), 2), random.choice(CATEGORIES)
+        transactions.append({'amount': amount, 'category': category,
+                             'date': day.isoformat(), 'createdAt': created})
+    return transactions
+
+
+def timed(name, run, number, repeat=5):
+    best = min(timeit.repeat(run, number=number, repeat=repeat)) / number
+    print(f'{name:32s} {best * 1e3:8.2f} ms')
+
+
+def store(transactions):
+    """Replace the benchmark user's transactions and rollups"""
+    if os.environ.get('BENCH_MONGOMOCK', '').lower() == 'true':
+        import mongomock
+        database.MongoClient = lambda uri: mongomock.MongoClient()
+    db = database.get_db()
+    db.transactions.delete_many({'userId': USER_ID})
+    db.finances.delete_many({'userId': USER_ID})
+    db.transactions.insert_many([{**transaction, 'userId': USER_ID} for transaction in transactions])
+    db.finances.insert_one({**FINANCE, 'userId': USER_ID})
+    return rebuild_user_rollups(USER_ID)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    end = date(2026, 10, 15)
+    as_of = parse_as_of(end.isoformat())
+    transactions = synthetic_transactions(count, end)
+
+    columns = scanned_columns(transactions)
+    insights = compute_insights(columns, FINANCE, as_of)
+    print(f'{len(columns)} transactions, {len(columns.categories)} categories, '
+          f'{len(insights["trend"]["months"])} trend months, '
+          f'burn rate {insights["burnRate"]["last30Days"]}/day')
+
+    encoded = [bson.encode(transaction) for transaction in transactions]
+    for name, run, number in (
+        ('BSON -> documents', lambda: [bson.decode(raw) for raw in encoded], 3),
+        ('documents -> columns', lambda: scanned_columns(transactions), 5),
+        ('insights from columns', lambda: compute_insights(columns, FINANCE, as_of), 50),
+        ('both', lambda: compute_insights(scanned_columns(transactions), FINANCE, as_of), 5),
+    ):
+        timed(name, run, number)
+
+    buckets = store(transactions)
+    print(f'stored with {buckets} rollup buckets in '
+          + ('mongomock' if os.environ.get('BENCH_MONGOMOCK', '').lower() == 'true' else database.MONGODB_URI))
+    # What user_insights() reads: every month bucket and the day buckets of the 12-month window
+    window_start = date(end.year - (end.month < 12), end.month % 12 + 1, 1).isoformat()
+    read = list(database.transaction_rollups_collection.find({'userId': USER_ID, '$or': [
+        {'granularity': 'month'}, {'granularity': 'day', 'period': {'$gte': window_start, '$lte': end.isoformat()}}
+    ]}, {'_id': 0}))
+    encoded = [bson.encode(bucket) for bucket in read]
+    timed(f'BSON -> {len(read)} rollup buckets', lambda: [bson.decode(raw) for raw in encoded], 5)
+    scan = {'_id': 0, 'amount': 1, 'category': 1, 'date': 1, 'createdAt': 1}
+    timed('end to end, from rollups', lambda: user_insights(USER_ID, end.isoformat()), 5)
+    timed('end to end, transaction scan', lambda: compute_insights(scanned_columns(
+        database.transactions_collection.find({'userId': USER_ID}, scan, batch_size=10000)), FINANCE, as_of), 1, 1)
+
+
+if __name__ == '__main__':
+    main()
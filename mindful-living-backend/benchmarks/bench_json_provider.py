@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Compare the stdlib and orjson JSON providers on the seed data.
+
+Runs init_user_db.py against a recorder instead of a server to capture the
+request bodies it sends, stores them the way the API does (ObjectIds,
+userId, datetime stamps), and scales them up to a long-tenured user. Each
+payload is then encoded as a response and decoded as a request body by both
+providers, after checking that their output is byte-identical.
+
+Usage: python benchmarks/bench_json_provider.py [copies]
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson.objectid import ObjectId
+from flask import Flask
+
+from serialization import MongoJSONProvider, OrjsonProvider, to_public
+
+
+class _Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.text = ''
+
+    def json(self):
+        return self._body
+
+
+class Recorder:
+    """Stands in for the requests module and keeps every posted body"""
+
+    def __init__(self):
+        self.posted = []
+
+    def post(self, url, json=None, headers=None):
+        path = url.split('//', 1)[-1].split('/', 1)[-1]
+        self.posted.append((path, json))
+        if path.startswith('auth/'):
+            user = {'id': str(ObjectId()), 'firstName': json.get('firstName', 'John'),
+                    'lastName': json.get('lastName', 'Doe')}
+            return _Response(201 if path == 'auth/signup' else 200, {'access_token': 'bench', 'user': user})
+        if path.endswith('/bulk'):
+            return _Response(200, {'results': [{'status': 'inserted'} for _ in json]})
+        if path.endswith('/contents'):
+            return _Response(200, json)
+        body = {**json, 'id': str(ObjectId())}
+        if 'contentTypes' in body:
+            body['contentTypes'] = [{**ct, 'id': str(uuid.uuid4())} for ct in body['contentTypes']]
+        return _Response(201, body)
+
+
+def capture_seed():
+    recorder = Recorder()
+    sys.modules.setdefault('requests', recorder)
+    import init_user_db
+    init_user_db.requests = recorder
+    init_user_db.print = lambda *args, **kwargs: None
+    init_user_db.main()
+    return recorder.posted
+
+
+def stored(document, user_id, now):
+    return {**document, '_id': ObjectId(), 'userId': user_id, 'createdAt': now, 'updatedAt': now}
+
+
+def build_payloads(posted, copies):
+    """Response bodies per endpoint for a user with `copies` times the seed data"""
+    user_id = str(ObjectId())
+    now = datetime.utcnow()
+    collections = {'life_blocks': [], 'tasks': [], 'schedules': [], 'finances': [], 'analytics': [], 'goals': []}
+    contents = []
+    for path, body in posted:
+        kind = path.split('/')[0]
+        if path.endswith('/contents'):
+            contents.append(body)
+        elif path.endswith('/bulk'):
+            collections[kind].extend(op['document'] for op in body)
+        elif kind in collections:
+            collections[kind].append(body)
+
+    payloads = {}
+    for kind, documents in collections.items():
+        payloads[f'GET /{kind}'] = [
+            stored(document, user_id, now - timedelta(days=copy))
+            for copy in range(copies) for document in documents
+        ]
+    block = payloads['GET /life_blocks'][0]
+    block['contents'] = [
+        {**content, 'id': str(uuid.uuid4()), 'createdAt': now - timedelta(hours=n), 'updatedAt': now}
+        for n in range(copies * 20) for content in contents
+    ]
+    payloads['GET /life_blocks/<id>'] = block
+    return {name: to_public(payload) for name, payload in payloads.items()}
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    posted = capture_seed()
+    payloads = build_payloads(posted, copies)
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.json = MongoJSONProvider(stdlib_app)
+    orjson_app = Flask('orjson')
+    orjson_app.json = OrjsonProvider(orjson_app)
+
+    print(f'{len(posted)} seed requests captured, scaled {copies}x')
+    print(f'{"payload":24s} {"KiB":>7s} {"stdlib":>10s} {"orjson":>10s} {"speedup":>8s}')
+    for name, payload in payloads.items():
+        with stdlib_app.app_context():
+            expected = stdlib_app.json.response(payload).get_data()
+        with orjson_app.app_context():
+            actual = orjson_app.json.response(payload).get_data()
+        assert actual == expected, f'{name}: providers disagree'
+
+        timings = []
+        for app in (stdlib_app, orjson_app):
+            with app.app_context():
+                run = lambda: app.json.response(payload)
+                number = max(1, 2000000 // len(expected))
+                timings.append(min(timeit.repeat(run, number=number, repeat=5)) / number)
+        print(f'{"dumps " + name:24s} {len(expected) / 1024:7.1f} '
+              f'{timings[0] * 1e6:8.0f}us {timings[1] * 1e6:8.0f}us {timings[0] / timings[1]:7.1f}x')
+
+    for path, body in posted:
+        with stdlib_app.app_context():
+            raw = stdlib_app.json.dumps(body).encode('utf-8')
+        timings = []
+        for app in (stdlib_app, orjson_app):
+            with app.app_context():
+                timings.append(min(timeit.repeat(lambda: app.json.loads(raw), number=20000, repeat=3)) / 20000)
+        print(f'{"loads POST /" + path:24.24s} {len(raw) / 1024:7.1f} '
+              f'{timings[0] * 1e6:8.1f}us {timings[1] * 1e6:8.1f}us {timings[0] / timings[1]:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Login throughput under concurrency: inline bcrypt on request threads versus
+the bounded PasswordHasher pool with admission control.
+
+Each simulated request verifies one password. With the pool, requests beyond
+the queue limit are rejected immediately (the API answers 503 + Retry-After)
+instead of piling up on every worker.
+
+Usage: python benchmarks/bench_login.py [concurrency] [requests_per_client] [rounds]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import bcrypt
+
+from passwords import HashingPoolSaturated, PasswordHasher
+
+
+def run(concurrency, per_client, verify):
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(per_client):
+            start = time.perf_counter()
+            try:
+                verify()
+            except HashingPoolSaturated:
+                with lock:
+                    rejected[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    return len(latencies) / elapsed, p99, rejected[0]
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    password = b'password123'
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    workers = os.cpu_count() or 1
+    hasher = PasswordHasher(workers=workers, max_queue=workers * 4, rounds=rounds)
+
+    results = {
+        'inline': run(concurrency, per_client, lambda: bcrypt.checkpw(password, hashed)),
+        'pool': run(concurrency, per_client,
+                    lambda: hasher.verify(password.decode(), hashed.decode())),
+    }
+    print(f'{concurrency} concurrent clients x {per_client} logins, cost {rounds}, {workers} hash workers')
+    for name, (throughput, p99, rejected) in results.items():
+        print(f'{name:8s} {throughput:8.1f} logins/s  p99 {p99:8.1f} ms  rejected {rejected}')
+    print(f'calibrated cost for a 250 ms budget on this machine: {PasswordHasher(1, 0).rounds}')
+
+
+if __name__ == '__main__':
+    main()
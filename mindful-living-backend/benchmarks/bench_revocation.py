@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""What the revocation check adds to each authenticated request.
+
+Loads N revoked jtis (1M by default) into a RevocationList the way a worker
+does, streamed through a full refresh, and times is_revoked() - the check
+every request makes, refresh bookkeeping included - for tokens that were
+never revoked, next to the bare filter probe, a plain Python set and the JWT
+decode every request already pays. Also reports the filter's memory and its
+observed false-positive rate (each false positive costs one MongoDB lookup,
+then is cached). No MongoDB is needed: the refresh interval is set beyond
+the run, so is_revoked() never reaches the database for these tokens.
+
+Usage: python benchmarks/bench_revocation.py [revoked] [probes]
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import jwt as pyjwt
+
+from revocation import RevocationList
+
+
+def main():
+    revoked = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    probes = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    revocations = RevocationList(capacity=revoked, error_rate=0.001,
+                                 refresh_seconds=3600, rebuild_seconds=6 * 3600)
+    jtis = [str(uuid.uuid4()) for _ in range(revoked)]
+    now = datetime.utcnow()
+    query, rebuild = revocations.begin_refresh()
+    elapsed = timeit.timeit(lambda: revocations.finish_refresh(
+        ({'_id': jti, 'revokedAt': now} for jti in jtis), rebuild), number=1)
+    print(f'loaded {revoked} jtis in {elapsed:.1f}s')
+
+    as_set = set(jtis)
+    set_bytes = sys.getsizeof(as_set) + sum(sys.getsizeof(jti) for jti in jtis)
+    stats = revocations.stats()
+    print(f'memory: bloom filter {stats["filterBytes"] / 2**20:.1f} MiB '
+          f'({stats["hashes"]} hashes), set of jtis {set_bytes / 2**20:.1f} MiB')
+
+    fresh = [str(uuid.uuid4()) for _ in range(probes)]
+    false_positives = sum(revocations.might_be_revoked(jti) for jti in fresh)
+    print(f'false positives: {false_positives}/{probes} ({false_positives / probes:.4%})')
+
+    # False positives would be confirmed in MongoDB; leave them out of the timed run
+    clean = [jti for jti in fresh if not revocations.might_be_revoked(jti)]
+
+    secret = 'benchmark-secret-key-of-32-bytes!'
+    token = pyjwt.encode({'sub': 'user', 'jti': fresh[0], 'type': 'access',
+                          'exp': 2**31 - 1}, secret, algorithm='HS256')
+    cases = [
+        ('is_revoked, not revoked', lambda: [revocations.is_revoked(jti) for jti in clean]),
+        ('bloom check, not revoked', lambda: [revocations.might_be_revoked(jti) for jti in fresh]),
+        ('bloom check, revoked', lambda: [revocations.might_be_revoked(jti) for jti in jtis[:probes]]),
+        ('set lookup', lambda: [jti in as_set for jti in fresh]),
+        ('jwt decode (for scale)', lambda: [pyjwt.decode(token, secret, algorithms=['HS256'])
+                                            for _ in range(probes // 10)]),
+    ]
+    for name, run in cases:
+        count = probes // 10 if name.startswith('jwt') else len(clean) if name.startswith('is_') else probes
+        best = min(timeit.repeat(run, number=1, repeat=3))
+        print(f'{name:24s} {best / count * 1e6:7.2f} us per request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Throughput of authenticated routes under gunicorn with the production config.
+
+Starts `gunicorn -c gunicorn.conf.py` (preloaded app, gthread workers) on a
+seeded user with TASKS tasks, then loads GET /, /auth/me, /tasks?limit=50
+and /tasks?limit=50 with the response cache off, with the same closed-loop
+client as bench_server.py.
+
+The data goes to MONGODB_URI. With BENCH_MONGOMOCK=true it lives in an
+in-process mongomock store instead, seeded in the master and inherited by
+every worker, for machines without a mongod; mongomock runs queries in
+Python, so Mongo-backed routes come out slower than against a real server.
+
+Usage: python benchmarks/bench_routes.py [concurrency] [seconds]
+"""
+
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson.objectid import ObjectId
+
+from bench_server import load
+
+USER_ID = ObjectId('64b000000000000000000001')
+TASKS = 200
+PORT = int(os.environ.get('BENCH_PORT', 5099))
+ROUTES = [
+    ('GET / (no auth, no Mongo)', '/', {}),
+    ('GET /auth/me', '/auth/me', {}),
+    ('GET /tasks?limit=50', '/tasks?limit=50', {}),
+    ('GET /tasks?limit=50, no response cache', '/tasks?limit=50', {'RESPONSE_CACHE': 'none'}),
+]
+
+
+def seed(db):
+    db.users.update_one({'_id': USER_ID}, {'$setOnInsert': {
+        'email': 'bench@example.com', 'firstName': 'Bench', 'lastName': 'User', 'isActive': True,
+        'password': '$2b$12$' + 'x' * 53, 'createdAt': datetime.utcnow()
+    }}, upsert=True)
+    if not db.tasks.count_documents({'userId': str(USER_ID)}):
+        start = datetime(2026, 10, 1)
+        db.tasks.insert_many([
+            {'userId': str(USER_ID), 'title': f'Task {n}', 'description': 'Benchmark task ' * 4,
+             'status': ('pending', 'in-progress', 'completed')[n % 3], 'priority': ('low', 'medium', 'high')[n % 3],
+             'dueDate': start + timedelta(hours=n), 'createdAt': start, 'updatedAt': start}
+            for n in range(TASKS)
+        ])
+
+
+def create_app():
+    """gunicorn entry point: the real app, over the seeded database"""
+    import database
+    if os.environ.get('BENCH_MONGOMOCK', '').lower() == 'true':
+        import mongomock
+        store = mongomock.MongoClient()._store
+        # Workers open their own client after fork, on the store they inherited
+        database.MongoClient = lambda uri: mongomock.MongoClient(_store=store)
+    seed(database.get_db())
+    database.close_client()
+
+    import app
+    return app.create_app()
+
+
+def access_token():
+    import app
+    flask_app = app.create_app()
+    with flask_app.app_context():
+        return app.create_access_token(identity=str(USER_ID))
+
+
+def serve(env, command=None):
+    """Start a server (gunicorn on create_app() by default) and wait until it answers"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    command = command or ['gunicorn', '-c', 'gunicorn.conf.py', '--pythonpath', here,
+                          '--bind', f'127.0.0.1:{PORT}', 'bench_routes:create_app()']
+    server = subprocess.Popen(
+        command, cwd=os.path.dirname(here), env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(300):
+        if server.poll() is not None:
+            break
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{PORT}/', timeout=1).read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    env = {'ENSURE_INDEXES': 'false'} if os.environ.get('BENCH_MONGOMOCK', '').lower() == 'true' else {}
+    token = access_token()
+    print(f'gunicorn, {os.environ.get("WEB_CONCURRENCY", "default")} workers, {concurrency} connections, {seconds:.0f}s')
+    for label, path, overrides in ROUTES:
+        server = serve({**env, **overrides})
+        try:
+            load(f'http://127.0.0.1:{PORT}{path}', concurrency, 1, token)  # warm up every worker
+            rate, errors = load(f'http://127.0.0.1:{PORT}{path}', concurrency, seconds, token)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f'{label:42s} {rate:7.0f} req/s ({errors} errors)')
+
+
+if __name__ == '__main__':
+    main()
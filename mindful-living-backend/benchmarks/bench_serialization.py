@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Compare the legacy convert_objectid_to_string + jsonify path against
+MongoJSONProvider on deeply nested life blocks.
+
+Usage: python benchmarks/bench_serialization.py [blocks] [contents_per_block]
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson.objectid import ObjectId
+from flask import Flask
+
+from serialization import MongoJSONProvider, to_public
+
+
+def convert_objectid_to_string(data):
+    """The pre-provider implementation, kept here for comparison"""
+    if isinstance(data, list):
+        return [convert_objectid_to_string(item) for item in data]
+    elif isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            if key == '_id' and isinstance(value, ObjectId):
+                result['id'] = str(value)
+            elif isinstance(value, ObjectId):
+                result[key] = str(value)
+            elif isinstance(value, (dict, list)):
+                result[key] = convert_objectid_to_string(value)
+            else:
+                result[key] = value
+        return result
+    else:
+        return data
+
+
+def make_life_blocks(blocks, contents_per_block):
+    now = datetime.utcnow()
+    fields = [{'id': str(uuid.uuid4()), 'name': f'Field {i}', 'type': 'text', 'required': False,
+               'options': ['Easy', 'Medium', 'Hard']} for i in range(6)]
+    return [{
+        '_id': ObjectId(),
+        'userId': str(ObjectId()),
+        'name': f'Block {b}',
+        'icon': '🍳',
+        'color': 'bg-orange-500',
+        'contentTypes': [{'id': str(uuid.uuid4()), 'name': 'Recipe', 'fields': fields}],
+        'contents': [{
+            'id': str(uuid.uuid4()),
+            'contentTypeId': 'recipe',
+            'data': {'Recipe Name': f'Recipe {c}', 'Ingredients': 'flour, eggs, milk',
+                     'Steps': [{'order': n, 'text': 'Stir well'} for n in range(5)],
+                     'Prep Time': 30, 'Tried': True},
+            'createdAt': now,
+            'updatedAt': now,
+        } for c in range(contents_per_block)],
+        'createdAt': now,
+        'updatedAt': now,
+    } for b in range(blocks)]
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    contents = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    legacy_app = Flask('legacy')
+    provider_app = Flask('provider')
+    provider_app.json = MongoJSONProvider(provider_app)
+
+    def legacy():
+        docs = make_life_blocks(blocks, contents)
+        with legacy_app.app_context():
+            return legacy_app.json.response(convert_objectid_to_string(docs)).get_data()
+
+    def provider():
+        docs = make_life_blocks(blocks, contents)
+        with provider_app.app_context():
+            return provider_app.json.response(to_public(docs)).get_data()
+
+    assert legacy() != b'' and len(legacy()) == len(provider())
+    build = min(timeit.repeat(lambda: make_life_blocks(blocks, contents), number=5, repeat=3)) / 5
+    for name, fn in (('convert_objectid_to_string', legacy), ('MongoJSONProvider', provider)):
+        best = min(timeit.repeat(fn, number=5, repeat=3)) / 5
+        print(f'{name:28s} {(best - build) * 1000:8.2f} ms per response '
+              f'({blocks} blocks x {contents} contents)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Closed-loop HTTP load generator for comparing serving modes.
+
+Usage: python benchmarks/bench_server.py URL [concurrency] [seconds] [auth_token]
+"""
+
+import http.client
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def load(target, concurrency=32, seconds=10, token=None):
+    """GET `target` from `concurrency` keep-alive connections for `seconds`: (req/s, errors)"""
+    url = urlsplit(target)
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    path = url.path + (f'?{url.query}' if url.query else '')
+
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    deadline = time.perf_counter() + seconds
+
+    def client(i):
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        while time.perf_counter() < deadline:
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if time.perf_counter() > deadline:
+                    break  # Requests queued behind the deadline would inflate the rate
+                if response.status < 400:
+                    counts[i] += 1
+                else:
+                    errors[i] += 1
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds, sum(errors)
+
+
+def main():
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    rate, errors = load(sys.argv[1], concurrency, seconds, sys.argv[4] if len(sys.argv) > 4 else None)
+    print(f'{sys.argv[1]}: {rate:.0f} req/s ({concurrency} connections, {seconds:.0f}s, {errors} errors)')
+
+
+if __name__ == '__main__':
+    main()
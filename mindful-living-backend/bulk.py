@@ -0,0 +1,132 @@
+"""Bulk create/update/delete for the user-scoped collections.
+
+A request carries a list of operations:
+
+    {"op": "insert", "document": {...}}
+    {"op": "update", "id": "<id>", "document": {...fields to set...}}
+    {"op": "delete", "id": "<id>"}
+
+They are applied in batches through one unordered bulk_write each, so a bad
+item never stops the rest. Every operation gets a result at its own index,
+and the analytics counters move by one combined update per batch.
+"""
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from analytics_engine import record_changes
+from api_common import updatable_fields
+from calendar_dates import with_native_dates
+from recurrence import with_series_fields
+
+OPERATIONS = ('insert', 'update', 'delete')
+
+
+def _error(index, message):
+    return {'index': index, 'status': 'error', 'error': message}
+
+
+def _parse(index, operation):
+    """Validate one operation, returning (op, ObjectId or None, document) or an error result"""
+    if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+        return _error(index, f"op must be one of {', '.join(OPERATIONS)}")
+    op = operation['op']
+    document = operation.get('document')
+    if op != 'delete' and not isinstance(document, dict):
+        return _error(index, 'document must be an object')
+    if op == 'insert':
+        return op, None, document
+    try:
+        object_id = ObjectId(operation.get('id'))
+    except (InvalidId, TypeError):
+        return _error(index, 'id is not a valid id')
+    if op == 'update':
+        document = updatable_fields(document)
+    return op, object_id, document
+
+
+def run_bulk(collection, kind, user_id, operations, batch_size, prepare_insert, now):
+    """Apply `operations` for one user, returning one result per operation.
+
+    prepare_insert(document, user_id, now) stamps a new document the same way
+    the single-item POST handler does.
+    """
+    results = [None] * len(operations)
+    for start in range(0, len(operations), batch_size):
+        _run_batch(collection, kind, user_id, operations[start:start + batch_size], start,
+                   results, prepare_insert, now)
+    return results
+
+
+def _run_batch(collection, kind, user_id, operations, offset, results, prepare_insert, now):
+    parsed = []
+    targeted = set()
+    for position, operation in enumerate(operations):
+        index = offset + position
+        item = _parse(index, operation)
+        if isinstance(item, dict):
+            results[index] = item
+            continue
+        op, object_id, _ = item
+        if object_id is not None:
+            # Unordered writes to the same document would race each other
+            if object_id in targeted:
+                results[index] = _error(index, 'Document targeted twice in one batch')
+                continue
+            targeted.add(object_id)
+        parsed.append((index, item))
+
+    # Previous versions, for ownership, not-found results and analytics deltas
+    previous = {}
+    if targeted:
+        previous = {
+            document['_id']: document
+            for document in collection.find({'_id': {'$in': list(targeted)}, 'userId': user_id})
+        }
+
+    requests = []
+    pending = []
+    for index, (op, object_id, document) in parsed:
+        if op != 'insert' and object_id not in previous:
+            results[index] = _error(index, 'Not found or access denied')
+            continue
+        if op != 'delete':
+            try:
+                document = with_series_fields(kind, with_native_dates(kind, dict(document)), previous.get(object_id))
+            except ValueError as e:
+                results[index] = _error(index, str(e))
+                continue
+        if op == 'insert':
+            document = prepare_insert(document, user_id, now)
+            requests.append(InsertOne(document))
+        elif op == 'update':
+            document = {**document, 'updatedAt': now}
+            requests.append(UpdateOne({'_id': object_id, 'userId': user_id}, {'$set': document}))
+        else:
+            requests.append(DeleteOne({'_id': object_id, 'userId': user_id}))
+        pending.append((index, op, object_id, document))
+
+    if not requests:
+        return
+    write_errors = {}
+    try:
+        collection.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        write_errors = {error['index']: error['errmsg'] for error in e.details['writeErrors']}
+
+    changes = []
+    for position, (index, op, object_id, document) in enumerate(pending):
+        if position in write_errors:
+            results[index] = _error(index, write_errors[position])
+            continue
+        if op == 'insert':
+            changes.append((None, document))
+            results[index] = {'index': index, 'status': 'inserted', 'id': str(document['_id'])}
+        elif op == 'update':
+            changes.append((previous[object_id], {**previous[object_id], **document}))
+            results[index] = {'index': index, 'status': 'updated', 'id': str(object_id)}
+        else:
+            changes.append((previous[object_id], None))
+            results[index] = {'index': index, 'status': 'deleted', 'id': str(object_id)}
+    record_changes(user_id, kind, changes)
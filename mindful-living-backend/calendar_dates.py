@@ -0,0 +1,94 @@
+"""Native datetimes for the calendar fields of schedules and tasks.
+
+Clients send startTime/endTime and dueDate as ISO 8601 strings. They are
+stored as BSON datetimes (naive UTC, the way PyMongo hands them back), so a
+?from=&to= window is a range scan on the (userId, startTime) or
+(userId, dueDate) index instead of a read of every document the user has.
+convert_string_dates() migrates documents written before this.
+"""
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from revisions import bump
+
+DATE_FIELDS = {'schedules': ('startTime', 'endTime'), 'tasks': ('dueDate',)}
+# The field a ?from=&to= window filters on
+WINDOW_FIELDS = {'schedules': 'startTime', 'tasks': 'dueDate'}
+
+
+def parse_datetime(value):
+    """Naive UTC datetime for an ISO 8601 date or datetime string, or ValueError.
+
+    Strings without an offset are taken to be UTC already.
+    """
+    parsed = datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def with_native_dates(kind, document):
+    """Convert the ISO string date fields of a `kind` document in place.
+
+    Strings that are not ISO 8601 are stored as given, as before.
+    """
+    for field in DATE_FIELDS.get(kind, ()):
+        value = document.get(field)
+        if isinstance(value, str):
+            try:
+                document[field] = parse_datetime(value)
+            except ValueError:
+                pass
+    return document
+
+
+def parse_window(args):
+    """The {'$gte': from, '$lt': to} range asked for with ?from=&to=, or None"""
+    window = {}
+    for name, operator in (('from', '$gte'), ('to', '$lt')):
+        if args.get(name):
+            try:
+                window[operator] = parse_datetime(args[name])
+            except ValueError:
+                raise ValueError(f'{name} must be an ISO 8601 date or datetime')
+    if '$gte' in window and '$lt' in window and window['$lt'] <= window['$gte']:
+        raise ValueError('to must be after from')
+    return window or None
+
+
+def convert_string_dates(collection, kind, batch_size=500):
+    """Rewrite string date fields of existing `kind` documents as datetimes.
+
+    Returns (converted, unparseable) document counts. Users whose documents
+    changed get a revision bump so no stale ETag or cached body survives.
+    """
+    fields = DATE_FIELDS[kind]
+    query = {'$or': [{field: {'$type': 'string'}} for field in fields]}
+    converted = unparseable = 0
+    users = set()
+    requests = []
+    for document in collection.find(query, {'userId': 1, **dict.fromkeys(fields, 1)}, batch_size=batch_size):
+        update = {}
+        for field in fields:
+            value = document.get(field)
+            if isinstance(value, str):
+                try:
+                    update[field] = parse_datetime(value)
+                except ValueError:
+                    pass
+        if not update:
+            unparseable += 1
+            continue
+        requests.append(UpdateOne({'_id': document['_id']}, {'$set': update}))
+        users.add(document.get('userId'))
+        converted += 1
+        if len(requests) >= batch_size:
+            collection.bulk_write(requests, ordered=False)
+            requests = []
+    if requests:
+        collection.bulk_write(requests, ordered=False)
+    for user_id in users:
+        if user_id:
+            bump(user_id, kind)
+    return converted, unparseable
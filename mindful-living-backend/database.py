@@ -0,0 +1,93 @@
+import os
+import threading
+
+from pymongo import MongoClient
+
+# MongoDB Configuration
+MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
+db_name = 'lifesync' if 'mongodb://' in MONGODB_URI and '@' in MONGODB_URI else 'mindful_living'
+
+# Server error code for a write that breaks a unique index
+DUPLICATE_KEY = 11000
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return this process's MongoClient, creating it on first use.
+
+    Clients are never shared across fork(): a worker that inherits one from a
+    preloading master gets a fresh client the first time it touches Mongo.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = MongoClient(MONGODB_URI)
+                _client_pid = pid
+    return _client
+
+
+def close_client():
+    """Close this process's client, e.g. before a preloading master forks"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def get_db():
+    return get_client()[db_name]
+
+
+_async_client = None
+
+
+def get_async_db():
+    """Database handle on this process's AsyncMongoClient (asyncio serving mode).
+
+    The async driver is imported on first use so the sync app never pays for it.
+    """
+    global _async_client
+    if _async_client is None:
+        from pymongo import AsyncMongoClient
+        _async_client = AsyncMongoClient(MONGODB_URI)
+    return _async_client[db_name]
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+class LazyCollection:
+    """Module-level stand-in for a collection, resolved per process on use"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+
+# Collections
+users_collection = LazyCollection('users')
+life_blocks_collection = LazyCollection('life_blocks')
+life_block_contents_collection = LazyCollection('life_block_contents')
+tasks_collection = LazyCollection('tasks')
+finances_collection = LazyCollection('finances')
+transactions_collection = LazyCollection('transactions')
+transaction_rollups_collection = LazyCollection('transaction_rollups')
+schedules_collection = LazyCollection('schedules')
+analytics_collection = LazyCollection('analytics')
+goals_collection = LazyCollection('goals')
+import_jobs_collection = LazyCollection('import_jobs')
+revisions_collection = LazyCollection('revisions')
+revoked_tokens_collection = LazyCollection('revoked_tokens')
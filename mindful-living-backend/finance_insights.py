@@ -0,0 +1,279 @@
+"""Forward-looking finance metrics computed over a user's transaction history.
+
+load_columns() reads the user's transaction rollups (see rollups.py) into
+columnar NumPy arrays (day, amount, category code): the day buckets of the
+trend window, each as an income and a spending entry, plus the month
+buckets for the history's size and start. What is read grows with the days
+and categories in the window, not with the number of transactions. Every
+metric is then a handful of masks and bincounts over those arrays:
+
+  burnRate   average daily spending over the trailing 30 and 90 days
+  trend      income/spending/net for the last TREND_MONTHS months, the
+             month-over-month spending change and a least-squares slope
+  savings    ETA of each savings goal at the recent monthly net savings rate
+  overspend  month-to-date spending per budget projected to the month's end
+"""
+from datetime import date, datetime
+
+import numpy as np
+
+from database import finances_collection, transaction_rollups_collection
+from rollups import UNCATEGORIZED, number
+
+TREND_MONTHS = 12
+SAVINGS_RATE_MONTHS = 3  # complete months averaged into the savings rate
+BURN_WINDOWS = (30, 90)
+DAYS_PER_MONTH = 365.2425 / 12
+
+_DAY_PROJECTION = {'_id': 0, 'period': 1, 'category': 1, 'count': 1, 'income': 1, 'spending': 1}
+_MONTH_PROJECTION = {'_id': 0, 'period': 1, 'count': 1}
+
+
+class TransactionColumns:
+    """A user's transactions as parallel arrays: day, signed amount, category code"""
+
+    def __init__(self, days, amounts, codes, categories, count, first_day):
+        self.days = days              # datetime64[D]
+        self.amounts = amounts        # float64, expenses negative
+        self.codes = codes            # int64 index into categories
+        self.categories = categories  # category names in code order
+        # The arrays hold aggregates of part of the history: the number of
+        # transactions in all of it and the earliest day among them
+        self.count = count
+        self.first_day = first_day
+
+    @classmethod
+    def from_buckets(cls, buckets, count, first_day):
+        """Columns of day buckets ({period, category, income, spending}).
+
+        A bucket's income and its spending are separate entries (zero amounts
+        are dropped), in no particular order. The fields are read out of the
+        documents in one list pass per column; parsing and the rest are array
+        operations.
+        """
+        index = {}
+        codes = np.array([index.setdefault(bucket['category'] or UNCATEGORIZED, len(index)) for bucket in buckets],
+                         dtype=np.int64)
+        days = _parse_days([bucket['period'] for bucket in buckets])
+        income = np.array([number(bucket.get('income')) for bucket in buckets], dtype=np.float64)
+        spending = np.array([number(bucket.get('spending')) for bucket in buckets], dtype=np.float64)
+        amounts = np.concatenate([income, -spending])
+        kept = amounts != 0
+        return cls(np.concatenate([days, days])[kept], amounts[kept], np.concatenate([codes, codes])[kept],
+                   list(index), count, first_day)
+
+    def __len__(self):
+        return self.count
+
+
+def _parse_days(days):
+    try:
+        return np.array(days, dtype='datetime64[D]')
+    except ValueError:
+        # A malformed date (2026-02-31) would fail the whole batch; give just it NaT
+        return np.array([_parse_day(day) for day in days], dtype='datetime64[D]')
+
+
+def _parse_day(day):
+    try:
+        return np.datetime64(day, 'D')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def load_columns(user_id, as_of):
+    """Columns for the insights as of a day, from the user's rollup buckets"""
+    count, first_day = 0, np.datetime64('NaT')
+    months = transaction_rollups_collection.find({'userId': user_id, 'granularity': 'month'}, _MONTH_PROJECTION)
+    for bucket in months:
+        if bucket.get('count'):  # empty once every transaction in it was deleted or moved
+            count += bucket['count']
+            # The first month is all the trend needs to know about where the history starts
+            day = _parse_day(f"{bucket['period']}-01")
+            if not np.isnat(day) and (np.isnat(first_day) or day < first_day):
+                first_day = day
+    if not count:
+        return TransactionColumns.from_buckets([], 0, first_day)
+
+    window_start = (as_of.astype('datetime64[M]') - (TREND_MONTHS - 1)).astype('datetime64[D]')
+    days = transaction_rollups_collection.find({
+        'userId': user_id, 'granularity': 'day',
+        'period': {'$gte': _day_string(window_start), '$lte': _day_string(as_of)}
+    }, _DAY_PROJECTION)
+    buckets = [bucket for bucket in days if bucket.get('count')]
+    return TransactionColumns.from_buckets(buckets, count, first_day)
+
+
+def parse_as_of(value):
+    """The day insights are computed for: a YYYY-MM-DD string, or today (UTC)"""
+    if not value:
+        return np.datetime64(datetime.utcnow().date(), 'D')
+    try:
+        return np.datetime64(date.fromisoformat(value), 'D')
+    except ValueError:
+        raise ValueError('asOf must be a YYYY-MM-DD date')
+
+
+def _money(value):
+    return round(float(value), 2)
+
+
+def _day_string(day):
+    return str(day.astype('datetime64[D]'))
+
+
+def burn_rate(columns, as_of):
+    spending = np.where(columns.amounts < 0, -columns.amounts, 0.0)
+    age = (as_of - columns.days).astype(np.int64)  # NaT turns into a huge negative age
+    return {
+        f'last{window}Days': _money(spending[(age >= 0) & (age < window)].sum() / window)
+        for window in BURN_WINDOWS
+    }
+
+
+def monthly_totals(columns, as_of, months=TREND_MONTHS):
+    """(first month, income, spending) arrays for the `months` months ending at as_of's month"""
+    last = as_of.astype('datetime64[M]')
+    first = last - (months - 1)
+    offsets = (columns.days.astype('datetime64[M]') - first).astype(np.int64)
+    mask = (offsets >= 0) & (offsets < months) & (columns.days <= as_of)
+    offsets, amounts = offsets[mask], columns.amounts[mask]
+    income = np.bincount(offsets, weights=np.where(amounts > 0, amounts, 0.0), minlength=months)
+    spending = np.bincount(offsets, weights=np.where(amounts < 0, -amounts, 0.0), minlength=months)
+    return first, income, spending
+
+
+def _active_months(columns, first, months):
+    """Months of the window since the user's first transaction"""
+    if np.isnat(columns.first_day):
+        return 0
+    start = max(int((columns.first_day.astype('datetime64[M]') - first).astype(np.int64)), 0)
+    return max(months - start, 0)
+
+
+def _slope(values):
+    if len(values) < 2:
+        return None
+    x = np.arange(len(values), dtype=np.float64)
+    x -= x.mean()
+    return float((x * (values - values.mean())).sum() / (x * x).sum())
+
+
+def spending_trend(columns, as_of):
+    first, income, spending = monthly_totals(columns, as_of)
+    net = income - spending
+    # The current month is still running; compare and fit complete months only
+    active = _active_months(columns, first, TREND_MONTHS)
+    complete = spending[TREND_MONTHS - active:-1]
+    change = None
+    if len(complete) >= 2 and complete[-2] > 0:
+        change = round(float((complete[-1] - complete[-2]) * 100 / complete[-2]), 1)
+    slope = _slope(complete)
+    return {
+        'months': [
+            {'month': str(first + offset), 'income': _money(income[offset]),
+             'spending': _money(spending[offset]), 'net': _money(net[offset])}
+            for offset in range(TREND_MONTHS - active, TREND_MONTHS)
+        ],
+        'spendingChange': change,
+        'spendingSlope': _money(slope) if slope is not None else None,
+    }, net[TREND_MONTHS - active:-1]
+
+
+def _savings_goals(finance):
+    """(name, goal, current) for the goals on either finances document shape"""
+    goals = [
+        (str(goal.get('name') or 'Savings'), float(number(goal.get('goal'))), float(number(goal.get('current'))))
+        for goal in finance.get('savingsGoals') or [] if isinstance(goal, dict)
+    ]
+    if not goals and finance.get('savingsGoal') is not None:
+        goals.append(('Savings', float(number(finance.get('savingsGoal'))), float(number(finance.get('savings')))))
+    return goals
+
+
+def savings_forecast(finance, monthly_net, as_of):
+    recent = monthly_net[-SAVINGS_RATE_MONTHS:]
+    rate = float(recent.mean()) if len(recent) else 0.0
+    goals = _savings_goals(finance)
+    forecast = {'monthlyRate': _money(rate), 'goals': []}
+    if not goals:
+        return forecast
+
+    target = np.array([goal for _, goal, _ in goals])
+    current = np.array([saved for _, _, saved in goals])
+    remaining = np.maximum(target - current, 0.0)
+    months = remaining / rate if rate > 0 else np.where(remaining > 0, np.inf, 0.0)
+    eta_days = np.ceil(np.where(np.isfinite(months), months, 0.0) * DAYS_PER_MONTH).astype(np.int64)
+    for (name, goal, saved), left, needed, days in zip(goals, remaining, months, eta_days):
+        reachable = bool(np.isfinite(needed))
+        forecast['goals'].append({
+            'name': name,
+            'goal': _money(goal),
+            'current': _money(saved),
+            'remaining': _money(left),
+            'monthsToGoal': round(float(needed), 1) if reachable else None,
+            'eta': _day_string(as_of + days) if reachable else None,
+        })
+    return forecast
+
+
+def overspend_forecast(columns, finance, as_of):
+    month = as_of.astype('datetime64[M]')
+    month_start = month.astype('datetime64[D]')
+    elapsed = int((as_of - month_start).astype(np.int64)) + 1
+    length = int(((month + 1).astype('datetime64[D]') - month_start).astype(np.int64))
+
+    mask = (columns.days >= month_start) & (columns.days <= as_of) & (columns.amounts < 0)
+    spent = np.bincount(columns.codes[mask], weights=-columns.amounts[mask],
+                        minlength=len(columns.categories))
+    codes = {name.casefold(): code for code, name in enumerate(columns.categories)}
+
+    budgets = [
+        budget for budget in finance.get('budgets') or []
+        if isinstance(budget, dict) and budget.get('category')
+    ]
+    limits = np.array([float(number(budget.get('budget'))) for budget in budgets])
+    spent_so_far = np.array([
+        spent[codes[key]] if (key := str(budget['category']).casefold()) in codes else 0.0
+        for budget in budgets
+    ])
+    projected = spent_so_far * length / elapsed
+    over = np.maximum(projected - limits, 0.0)
+    return {
+        'month': str(month),
+        'daysElapsed': elapsed,
+        'daysInMonth': length,
+        'categories': [
+            {'category': str(budget['category']), 'budget': _money(limit), 'spent': _money(so_far),
+             'projected': _money(projection), 'projectedOverBy': _money(by), 'overspend': bool(by > 0)}
+            for budget, limit, so_far, projection, by in zip(budgets, limits, spent_so_far, projected, over)
+        ],
+        'total': {
+            'budget': _money(limits.sum()), 'spent': _money(spent_so_far.sum()),
+            'projected': _money(projected.sum()), 'overspend': bool(projected.sum() > limits.sum() > 0),
+        },
+    }
+
+
+def compute_insights(columns, finance, as_of):
+    """Every insight for already-loaded columns and the user's latest finances document"""
+    finance = finance or {}
+    trend, monthly_net = spending_trend(columns, as_of)
+    return {
+        'asOf': _day_string(as_of),
+        'transactions': len(columns),
+        'burnRate': burn_rate(columns, as_of),
+        'trend': trend,
+        'savings': savings_forecast(finance, monthly_net, as_of),
+        'overspend': overspend_forecast(columns, finance, as_of),
+    }
+
+
+def user_insights(user_id, as_of=None):
+    as_of = parse_as_of(as_of)
+    finance = finances_collection.find_one(
+        {'userId': user_id},
+        {'budgets': 1, 'savingsGoals': 1, 'savingsGoal': 1, 'savings': 1},
+        sort=[('_id', -1)]
+    )
+    return compute_insights(load_columns(user_id, as_of), finance, as_of)
@@ -0,0 +1,44 @@
+# Production server configuration: gunicorn -c gunicorn.conf.py
+#
+# The app is imported once in the master (preload_app) and shared copy-on-write
+# with the workers. No MongoClient exists at fork time; each worker opens its
+# own on first use (see database.get_client).
+#
+# Graceful reload: `kill -HUP <master>` restarts workers one by one with the
+# current code and config. Because the app is preloaded, deploying new code
+# needs `kill -USR2 <master>` (start a new master) followed by
+# `kill -TERM <old master>`.
+import os
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+
+
+def on_starting(server):
+    """Create indexes once in the master before any worker forks"""
+    if os.environ.get('ENSURE_INDEXES', 'true').lower() == 'true':
+        from app import bootstrap_indexes
+        bootstrap_indexes()
+
+
+def post_fork(server, worker):
+    """Load the revoked-token filter before the worker takes its first request"""
+    from app import revocation_list
+    try:
+        revocation_list.refresh_if_due()
+    except Exception as e:
+        # The first authenticated request retries the load
+        server.log.warning('Worker %s could not load revoked tokens: %s', worker.pid, e)
@@ -0,0 +1,81 @@
+"""Short-lived cache of who a token's user is and whether they may still act.
+
+Protected endpoints resolve the JWT identity through this cache, so account
+state (isActive) is enforced on every request without a users lookup each
+time. Writes to the user invalidate the entry in this process; other
+processes pick the change up within the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from database import users_collection
+
+# The trimmed record kept per user; never includes the password hash
+IDENTITY_PROJECTION = {'email': 1, 'firstName': 1, 'lastName': 1, 'isActive': 1}
+
+
+def identity_record(user):
+    """Trimmed identity of a users document, or None if there is no such user"""
+    if user is None:
+        return None
+    return {
+        'id': str(user['_id']),
+        'email': user.get('email'),
+        'firstName': user.get('firstName'),
+        'lastName': user.get('lastName'),
+        'isActive': user.get('isActive', True)
+    }
+
+
+def identity_filter(user_id):
+    """Query for a token subject, or None if it cannot be a user id"""
+    try:
+        return {'_id': ObjectId(user_id)}
+    except (InvalidId, TypeError):
+        return None
+
+
+class IdentityCache:
+    """LRU of user id -> identity record (or None for unknown users) with a TTL"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user id -> (expires, record)
+        self._lock = threading.Lock()
+
+    def cached(self, user_id):
+        """(True, record) on a fresh hit, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                return False, None
+            self._entries.move_to_end(user_id)
+            return True, entry[1]
+
+    def store(self, user_id, user):
+        """Cache the identity of a users document (None caches "no such user")"""
+        record = identity_record(user)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, record)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return record
+
+    def get(self, user_id):
+        """Read-through lookup for the synchronous app"""
+        hit, record = self.cached(user_id)
+        if hit:
+            return record
+        query = identity_filter(user_id)
+        user = users_collection.find_one(query, IDENTITY_PROJECTION) if query else None
+        return self.store(user_id, user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
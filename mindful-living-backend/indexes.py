@@ -0,0 +1,114 @@
+from pymongo import ASCENDING, IndexModel
+
+# Every index the API relies on, declared in one place. create_indexes() is
+# idempotent, so this can run on every startup.
+USER_SCOPED_COLLECTIONS = ['life_blocks', 'tasks', 'finances', 'transactions', 'schedules', 'goals']
+
+REQUIRED_INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+    ],
+    'analytics': [
+        # One materialized document per user (run dedupe_analytics() first)
+        IndexModel([('userId', ASCENDING)], name='userId_unique', unique=True),
+    ],
+}
+for _name in USER_SCOPED_COLLECTIONS:
+    # Serves both the {'userId': ...} filter and the keyset pagination sort
+    REQUIRED_INDEXES[_name] = [
+        IndexModel([('userId', ASCENDING), ('_id', ASCENDING)], name='userId__id'),
+    ]
+REQUIRED_INDEXES['life_blocks'].append(
+    IndexModel([('contents.id', ASCENDING)], name='contents_id')
+)
+REQUIRED_INDEXES['transactions'].append(
+    # Rejects re-imported statement rows; transactions entered by hand have no importHash
+    IndexModel([('userId', ASCENDING), ('importHash', ASCENDING)], name='userId_importHash_unique',
+               unique=True, partialFilterExpression={'importHash': {'$exists': True}})
+)
+REQUIRED_INDEXES['schedules'].extend([
+    # Serves ?from=&to= calendar windows
+    IndexModel([('userId', ASCENDING), ('startTime', ASCENDING)], name='userId_startTime'),
+    # Finds the events still running when a conflict or free-slot window starts
+    IndexModel([('userId', ASCENDING), ('endTime', ASCENDING)], name='userId_endTime'),
+    # Finds the recurring events that still have occurrences from a given day on
+    IndexModel([('userId', ASCENDING), ('seriesEnd', ASCENDING)], name='userId_seriesEnd'),
+])
+REQUIRED_INDEXES['tasks'].append(
+    IndexModel([('userId', ASCENDING), ('dueDate', ASCENDING)], name='userId_dueDate')
+)
+REQUIRED_INDEXES['transaction_rollups'] = [
+    # One bucket per key; also serves the summary's period-range scan
+    IndexModel([('userId', ASCENDING), ('granularity', ASCENDING), ('period', ASCENDING), ('category', ASCENDING)],
+               name='userId_granularity_period_category_unique', unique=True),
+]
+REQUIRED_INDEXES['import_jobs'] = [
+    # Finished and abandoned import jobs expire after a week
+    IndexModel([('createdAt', ASCENDING)], name='createdAt_ttl', expireAfterSeconds=7 * 24 * 3600),
+]
+REQUIRED_INDEXES['revoked_tokens'] = [
+    # A revocation is dropped once the token would have expired anyway
+    IndexModel([('expiresAt', ASCENDING)], name='expiresAt_ttl', expireAfterSeconds=0),
+    # Serves the incremental refresh of each process's revocation filter
+    IndexModel([('revokedAt', ASCENDING)], name='revokedAt'),
+]
+REQUIRED_INDEXES['life_block_contents'] = [
+    # Serves the paginated contents listing in (createdAt, id) order
+    IndexModel([('lifeBlockId', ASCENDING), ('createdAt', ASCENDING), ('id', ASCENDING)],
+               name='lifeBlockId_createdAt_id'),
+    IndexModel([('lifeBlockId', ASCENDING), ('id', ASCENDING)], name='lifeBlockId_id_unique', unique=True),
+]
+
+# The canonical query behind each endpoint: (collection, filter, sort)
+_PROBE_ID = 'index-probe'
+CANONICAL_QUERIES = [
+    ('users', {'email': _PROBE_ID}, None),
+    ('analytics', {'userId': _PROBE_ID}, None),
+    ('life_blocks', {'contents.id': _PROBE_ID}, None),
+    ('life_block_contents', {'lifeBlockId': _PROBE_ID}, [('createdAt', ASCENDING), ('id', ASCENDING)]),
+    ('life_block_contents', {'lifeBlockId': _PROBE_ID, 'id': _PROBE_ID}, None),
+    ('revoked_tokens', {'revokedAt': {'$gte': _PROBE_ID}}, None),
+    ('schedules', {'userId': _PROBE_ID, 'startTime': {'$gte': _PROBE_ID}}, None),
+    ('schedules', {'userId': _PROBE_ID, 'seriesEnd': {'$gte': _PROBE_ID}}, None),
+    ('schedules', {'userId': _PROBE_ID, 'endTime': {'$gt': _PROBE_ID}}, None),
+    ('tasks', {'userId': _PROBE_ID, 'dueDate': {'$gte': _PROBE_ID}}, None),
+    ('transaction_rollups', {'userId': _PROBE_ID, 'granularity': 'month', 'period': {'$gte': _PROBE_ID}},
+     [('period', ASCENDING), ('category', ASCENDING)]),
+] + [
+    (name, {'userId': _PROBE_ID}, [('_id', ASCENDING)]) for name in USER_SCOPED_COLLECTIONS
+]
+
+
+def ensure_indexes(db):
+    """Create any missing required indexes, returning the names per collection"""
+    created = {}
+    for collection_name, models in REQUIRED_INDEXES.items():
+        created[collection_name] = db[collection_name].create_indexes(models)
+    return created
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def verify_query_plans(db):
+    """Explain each canonical query and raise RuntimeError if any plans a COLLSCAN"""
+    collection_scans = []
+    for collection_name, query, sort in CANONICAL_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain()['queryPlanner']['winningPlan']
+        if 'COLLSCAN' in _plan_stages(winning_plan):
+            collection_scans.append(f'{collection_name} {query}')
+
+    if collection_scans:
+        raise RuntimeError('Queries still plan a COLLSCAN: ' + '; '.join(collection_scans))
@@ -152,15 +152,19 @@ def create_sample_tasks(auth_token):
         }
     ]
     
-    for task in tasks:
-        try:
-            response = requests.post(f'{API_URL}/tasks', json=task, headers=headers)
-            if response.status_code == 201:
-                print(f"✅ Created task: {task['title']}")
-            else:
-                print(f"❌ Error creating task: {response.text}")
-        except Exception as e:
-            print(f"❌ Error creating task: {str(e)}")
+    try:
+        operations = [{'op': 'insert', 'document': task} for task in tasks]
+        response = requests.post(f'{API_URL}/tasks/bulk', json=operations, headers=headers)
+        if response.status_code == 200:
+            for task, result in zip(tasks, response.json()['results']):
+                if result['status'] == 'inserted':
+                    print(f"✅ Created task: {task['title']}")
+                else:
+                    print(f"❌ Error creating task: {result['error']}")
+        else:
+            print(f"❌ Error creating tasks: {response.text}")
+    except Exception as e:
+        print(f"❌ Error creating tasks: {str(e)}")
 
 def create_sample_events(auth_token):
     """Create sample schedule events"""
@@ -206,15 +210,19 @@ def create_sample_events(auth_token):
         }
     ]
     
-    for event in events:
-        try:
-            response = requests.post(f'{API_URL}/schedules', json=event, headers=headers)
-            if response.status_code == 201:
-                print(f"✅ Created event: {event['title']}")
-            else:
-                print(f"❌ Error creating event: {response.text}")
-        except Exception as e:
-            print(f"❌ Error creating event: {str(e)}")
+    try:
+        operations = [{'op': 'insert', 'document': event} for event in events]
+        response = requests.post(f'{API_URL}/schedules/bulk', json=operations, headers=headers)
+        if response.status_code == 200:
+            for event, result in zip(events, response.json()['results']):
+                if result['status'] == 'inserted':
+                    print(f"✅ Created event: {event['title']}")
+                else:
+                    print(f"❌ Error creating event: {result['error']}")
+        else:
+            print(f"❌ Error creating events: {response.text}")
+    except Exception as e:
+        print(f"❌ Error creating events: {str(e)}")
 
 def create_sample_finance_data(auth_token):
     """Create sample financial data"""
@@ -0,0 +1,313 @@
+"""Life-block contents stored as their own documents.
+
+In the original layout every content item lives in the parent block's
+`contents` array, so each write returns (and every read loads) the whole
+block, and busy blocks grow towards the 16MB document limit. In 'collection'
+mode each item is one document in life_block_contents, keyed by lifeBlockId
+and read in (createdAt, id) order. The parent keeps an empty `contents` array
+for compatibility and a `contentCount`.
+
+Both layouts page through contents with the same keyset cursor, the
+(createdAt, id) of the last item returned; a process never hands out the
+same createdAt twice. Embedded arrays are sorted on that key when paged, as
+items pushed by different workers may land out of order.
+
+Items stored before ids and creation times were stamped by the server (or
+sent back by clients as ISO strings) are brought into that shape by
+normalize_content(); normalize_legacy_contents() does it for stored blocks.
+migrate_embedded_contents() moves existing blocks over; it is idempotent, so
+it can be rerun after an interruption.
+"""
+import base64
+import struct
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from calendar_dates import parse_datetime
+from database import DUPLICATE_KEY, life_block_contents_collection, life_blocks_collection
+from revisions import bump
+
+EMBEDDED = 'embedded'
+COLLECTION = 'collection'
+STORAGE_MODES = (EMBEDDED, COLLECTION)
+
+# Fields of a content item as clients see them, in either storage mode
+CONTENT_PROJECTION = {'id': 1, 'contentTypeId': 1, 'data': 1, 'createdAt': 1, 'updatedAt': 1}
+
+# Sort key of items whose creation time is unknown: before everything else
+EPOCH = datetime(1970, 1, 1)
+# Embedded items that still lack a string id or a native createdAt
+LEGACY_CONTENTS = {'contents': {'$elemMatch': {'$or': [
+    {'id': {'$not': {'$type': 'string'}}}, {'createdAt': {'$not': {'$type': 'date'}}}
+]}}}
+
+_MILLISECOND = timedelta(milliseconds=1)
+_clock_lock = threading.Lock()
+_last_created_at = datetime.min
+
+
+def _created_at(now):
+    """`now` at BSON's millisecond precision, but later than any creation time handed out before"""
+    global _last_created_at
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    with _clock_lock:
+        _last_created_at = max(now, _last_created_at + _MILLISECOND)
+        return _last_created_at
+
+
+def new_content(data, now):
+    """Build a content item from a request body"""
+    return {
+        'id': str(uuid.uuid4()),
+        'contentTypeId': data.get('contentTypeId'),
+        'data': data.get('data', {}),
+        'createdAt': _created_at(now),
+        'updatedAt': now
+    }
+
+
+def normalize_content(item, fallback):
+    """`item` with a string id and a native createdAt (parsed from a string, else `fallback`)"""
+    content = dict(item)
+    content.pop('_id', None)
+    if not isinstance(content.get('id'), str) or not content['id']:
+        content['id'] = str(uuid.uuid4())
+    created_at = content.get('createdAt')
+    if isinstance(created_at, str):
+        try:
+            created_at = parse_datetime(created_at)
+        except ValueError:
+            created_at = None
+    content['createdAt'] = created_at if isinstance(created_at, datetime) else fallback
+    return content
+
+
+def normalize_contents(items, fallback):
+    """normalize_content() over a contents array, dropping entries that are not objects"""
+    return [normalize_content(item, fallback) for item in items or [] if isinstance(item, dict)]
+
+
+def encode_content_cursor(document):
+    """Opaque cursor for the position just after `document` in (createdAt, id) order.
+
+    Items that predate normalization sort as if created at EPOCH with an
+    empty id, so paging over them answers instead of failing.
+    """
+    created_at = document.get('createdAt')
+    if not isinstance(created_at, datetime):
+        created_at = EPOCH
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    millis = int(created_at.timestamp() * 1000)
+    content_id = document.get('id')
+    raw = struct.pack('>q', millis) + (content_id if isinstance(content_id, str) else '').encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_content_cursor(token):
+    """Decode a content cursor into (createdAt, id), raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        millis, = struct.unpack('>q', raw[:8])
+        created_at = datetime.fromtimestamp(millis / 1000, tz=timezone.utc).replace(tzinfo=None)
+        content_id = raw[8:].decode('utf-8')
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return created_at, content_id
+
+
+def _page(documents, limit):
+    """(the first `limit` items, cursor to the next page or None) of limit + 1 fetched items"""
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    return documents, encode_content_cursor(documents[-1]) if has_more else None
+
+
+def page_contents(life_block_id, user_id, limit, cursor=None):
+    """One page of a block's contents from the collection: (items, next_cursor), or None if no block.
+
+    Each page is a bounded range scan of the (lifeBlockId, createdAt, id)
+    index; the cursor holds the sort key of the last item returned.
+    """
+    query = {'lifeBlockId': life_block_id, 'userId': user_id}
+    if cursor:
+        created_at, last_id = decode_content_cursor(cursor)
+        query['$or'] = [
+            {'createdAt': {'$gt': created_at}},
+            {'createdAt': created_at, 'id': {'$gt': last_id}}
+        ]
+    documents = list(
+        life_block_contents_collection.find(query, {**CONTENT_PROJECTION, '_id': 0})
+        .sort([('createdAt', 1), ('id', 1)])
+        .limit(limit + 1)
+    )
+    if not documents and not cursor:
+        # Only an empty first page needs to tell "no contents" from "no such block"
+        if not life_blocks_collection.find_one({'_id': ObjectId(life_block_id), 'userId': user_id}, {'_id': 1}):
+            return None
+    return _page(documents, limit)
+
+
+def page_embedded_contents(life_block_id, user_id, limit, cursor=None):
+    """One page of a block's embedded contents array: (items, next_cursor), or None if no block.
+
+    The array is unwound, filtered past the cursor, sorted and limited in
+    the database, so only the page is sent back, however long the array.
+    """
+    pipeline = [
+        {'$match': {'_id': ObjectId(life_block_id), 'userId': user_id}},
+        {'$unwind': '$contents'},
+        {'$replaceRoot': {'newRoot': '$contents'}},
+    ]
+    if cursor:
+        created_at, last_id = decode_content_cursor(cursor)
+        pipeline.append({'$match': {'$or': [
+            {'createdAt': {'$gt': created_at}},
+            {'createdAt': created_at, 'id': {'$gt': last_id}}
+        ]}})
+    pipeline += [{'$sort': {'createdAt': 1, 'id': 1}}, {'$limit': limit + 1}]
+    documents = list(life_blocks_collection.aggregate(pipeline))
+    if not documents and not cursor:
+        if not life_blocks_collection.find_one({'_id': ObjectId(life_block_id), 'userId': user_id}, {'_id': 1}):
+            return None
+    return _page(documents, limit)
+
+
+def stamp_new_contents(items, now):
+    """Content items for a new block, from its request body, in the order given.
+
+    Each gets a later createdAt than the one before, so (createdAt, id)
+    order is the order they were sent in; a client may choose the id but
+    not the timestamps. Raises ValueError for ids that are not unique
+    strings, before anything is written.
+    """
+    contents = [
+        {**{field: value for field, value in item.items() if field != '_id'}, **new_content(item, now),
+         **({'id': item['id']} if 'id' in item else {})}
+        for item in items
+    ]
+    seen = set()
+    for content in contents:
+        if not isinstance(content['id'], str) or not content['id']:
+            raise ValueError('Content ids must be non-empty strings')
+        if content['id'] in seen:
+            raise ValueError(f"Duplicate content id: {content['id']}")
+        seen.add(content['id'])
+    return contents
+
+
+def add_content(life_block_id, user_id, content):
+    """Store a new item for a block the user owns; returns it, or None if no such block"""
+    # The parent update doubles as the ownership check
+    result = life_blocks_collection.update_one(
+        {'_id': ObjectId(life_block_id), 'userId': user_id},
+        {'$inc': {'contentCount': 1}, '$set': {'updatedAt': content['updatedAt']}}
+    )
+    if result.matched_count == 0:
+        return None
+    life_block_contents_collection.insert_one(
+        {**content, 'lifeBlockId': life_block_id, 'userId': user_id}
+    )
+    return content
+
+
+def insert_block_contents(life_block_id, user_id, contents):
+    """Store the items a new block was created with"""
+    if contents:
+        life_block_contents_collection.insert_many(
+            [{**content, 'lifeBlockId': life_block_id, 'userId': user_id} for content in contents]
+        )
+
+
+def update_content(life_block_id, user_id, content_id, data, now):
+    """Replace an item's data; returns the updated item, or None if not found"""
+    document = life_block_contents_collection.find_one_and_update(
+        {'lifeBlockId': life_block_id, 'id': content_id, 'userId': user_id},
+        {'$set': {'data': data, 'updatedAt': now}},
+        projection={**CONTENT_PROJECTION, '_id': 0},
+        return_document=ReturnDocument.AFTER
+    )
+    return document
+
+
+def delete_content(life_block_id, user_id, content_id, now):
+    """Delete one item, returning True if it existed"""
+    result = life_block_contents_collection.delete_one(
+        {'lifeBlockId': life_block_id, 'id': content_id, 'userId': user_id}
+    )
+    if result.deleted_count == 0:
+        return False
+    life_blocks_collection.update_one(
+        {'_id': ObjectId(life_block_id), 'userId': user_id},
+        {'$inc': {'contentCount': -1}, '$set': {'updatedAt': now}}
+    )
+    return True
+
+
+def delete_block_contents(life_block_id, user_id):
+    life_block_contents_collection.delete_many({'lifeBlockId': life_block_id, 'userId': user_id})
+
+
+def _insert_ignoring_duplicates(documents):
+    """insert_many that treats items copied by an earlier, interrupted run as done"""
+    try:
+        life_block_contents_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']):
+            raise
+
+
+def migrate_embedded_contents():
+    """Move every embedded contents array into life_block_contents.
+
+    Items are copied before the array is cleared, and the unique
+    (lifeBlockId, id) index makes a rerun skip what was already copied.
+    Returns (blocks migrated, items moved).
+    """
+    blocks = items = 0
+    cursor = life_blocks_collection.find(
+        {'contents.0': {'$exists': True}}, {'userId': 1, 'createdAt': 1, 'contents': 1}
+    )
+    for block in cursor:
+        life_block_id = str(block['_id'])
+        documents = [
+            {**content, 'lifeBlockId': life_block_id, 'userId': block['userId']}
+            for content in normalize_contents(block['contents'], _block_created_at(block))
+        ]
+        _insert_ignoring_duplicates(documents)
+        count = life_block_contents_collection.count_documents({'lifeBlockId': life_block_id})
+        life_blocks_collection.update_one(
+            {'_id': block['_id']},
+            {'$set': {'contents': [], 'contentCount': count}}
+        )
+        bump(block['userId'], 'life_blocks')
+        blocks += 1
+        items += len(documents)
+    return blocks, items
+
+
+def _block_created_at(block):
+    return block['createdAt'] if isinstance(block.get('createdAt'), datetime) else EPOCH
+
+
+def normalize_legacy_contents():
+    """Give every stored embedded item a string id and a native createdAt, returning the blocks fixed.
+
+    Items without a usable createdAt take their block's. A block edited
+    since it was read is left for the next run.
+    """
+    fixed = 0
+    for block in life_blocks_collection.find(LEGACY_CONTENTS, {'userId': 1, 'createdAt': 1, 'contents': 1}):
+        result = life_blocks_collection.update_one(
+            {'_id': block['_id'], 'contents': block['contents']},
+            {'$set': {'contents': normalize_contents(block['contents'], _block_created_at(block))}}
+        )
+        if result.modified_count:
+            bump(block['userId'], 'life_blocks')
+            fixed += 1
+    return fixed
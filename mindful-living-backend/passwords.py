@@ -0,0 +1,103 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# Calibration never picks a cost below MIN_ROUNDS, however slow the machine
+MIN_ROUNDS = 12
+MAX_ROUNDS = 16
+# Calibration times several cheap hashes and extrapolates from their median
+CALIBRATION_ROUNDS = 8
+CALIBRATION_SAMPLES = 5
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the password hashing queue is full"""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing is busy, please retry')
+        self.retry_after = retry_after
+
+
+def calibrate_rounds(target_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS,
+                     samples=CALIBRATION_SAMPLES, probe_rounds=CALIBRATION_ROUNDS):
+    """Return the highest bcrypt cost whose hash time fits within target_ms, but at least min_rounds.
+
+    Each extra round doubles the work, so the median of a few hashes at
+    probe_rounds is enough to extrapolate the rest; the median keeps one
+    hash slowed down by a busy CPU from skewing the result.
+    """
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=probe_rounds)
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration-password', salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    elapsed_ms = statistics.median(timings)
+
+    rounds = probe_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return max(rounds, min_rounds)
+
+
+def hash_rounds(hashed):
+    """Read the cost factor out of a $2b$<rounds>$... bcrypt hash"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool instead of the request thread.
+
+    At most `workers` hashes run at once (bcrypt releases the GIL) and at most
+    `max_queue` more may wait; anything beyond that raises
+    HashingPoolSaturated so the caller can answer 503 straight away.
+    """
+
+    def __init__(self, workers, max_queue, rounds=None, target_ms=250, retry_after=1):
+        self.rounds = rounds or calibrate_rounds(target_ms)
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated(self.retry_after)
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _submit_hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._submit(bcrypt.hashpw, password.encode('utf-8'), salt)
+
+    def _submit_verify(self, password, hashed):
+        return self._submit(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def hash(self, password):
+        return self._submit_hash(password).result().decode('utf-8')
+
+    def verify(self, password, hashed):
+        return self._submit_verify(password, hashed).result()
+
+    async def hash_async(self, password):
+        """hash() for event-loop callers: awaits the pool without blocking the loop"""
+        return (await asyncio.wrap_future(self._submit_hash(password))).decode('utf-8')
+
+    async def verify_async(self, password, hashed):
+        return await asyncio.wrap_future(self._submit_verify(password, hashed))
+
+    def needs_rehash(self, hashed):
+        """True if the hash was made with a lower cost than the current one"""
+        return hash_rounds(hashed) < self.rounds
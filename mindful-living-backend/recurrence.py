@@ -0,0 +1,317 @@
+"""Recurring schedule events, stored once and expanded on read.
+
+A schedule document with an `rrule` is a series. Its startTime/endTime are
+the first occurrence, and the rule is an RFC 5545 RRULE subset:
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY, INTERVAL=n, BYDAY=MO,WE (WEEKLY only),
+    COUNT=n or UNTIL=YYYYMMDD[THHMMSSZ]
+
+On write the rule is normalised into `recurrence` ({freq, interval, byDay,
+until}, COUNT resolved to the start of the last occurrence) and `seriesEnd`,
+so finding the series that reach into a window is one index range scan.
+`exceptions` holds per-occurrence changes keyed by the original start:
+{occurrence, cancelled: true} or {occurrence, ...fields to override}.
+
+Expansion jumps straight to the requested window, so its cost depends on the
+occurrences in the window and not on how long the series has been running.
+Occurrence starts per (rule, window) are memoised, so hot ranges such as the
+current week are computed once per process. Occurrences are generated in
+UTC, like the stored datetimes.
+"""
+from calendar import monthrange
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+
+from calendar_dates import parse_datetime, parse_window, with_native_dates
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+RULE_PARTS = ('FREQ', 'INTERVAL', 'BYDAY', 'COUNT', 'UNTIL')
+MAX_COUNT = 10000
+MAX_WINDOW_DAYS = 366
+EXPANSION_CACHE_SIZE = 4096
+# seriesEnd of a series without COUNT or UNTIL
+OPEN_END = datetime(9999, 12, 31)
+
+# Maintained by the server; clients change them only through rrule and the exceptions endpoint
+DERIVED_FIELDS = ('recurrence', 'seriesEnd', 'exceptions')
+# Belong to the series as a whole and are never copied onto an occurrence
+SERIES_FIELDS = ('rrule',) + DERIVED_FIELDS
+EXCEPTION_PROTECTED_FIELDS = ('_id', 'id', 'userId', 'createdAt', 'seriesId', 'occurrenceStart') + SERIES_FIELDS
+
+
+def _positive(parts, name, default):
+    if name not in parts:
+        return default
+    try:
+        value = int(parts[name])
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise ValueError(f'{name} must be a positive integer')
+    return value
+
+
+def _parse_until(value):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        # A date-only UNTIL includes occurrences later that day
+        return until.replace(hour=23, minute=59, second=59) if fmt == '%Y%m%d' else until
+    raise ValueError('UNTIL must be YYYYMMDD or YYYYMMDDTHHMMSSZ')
+
+
+def parse_rrule(text):
+    """{freq, interval, byDay, count, until} for an RRULE string, or ValueError"""
+    if not isinstance(text, str):
+        raise ValueError('rrule must be a string')
+    body = text.strip()
+    if body.upper().startswith('RRULE:'):
+        body = body[len('RRULE:'):]
+    parts = {}
+    for part in filter(None, body.split(';')):
+        name, separator, value = part.partition('=')
+        name = name.strip().upper()
+        if not separator or name in parts:
+            raise ValueError(f'Malformed rrule part: {part}')
+        parts[name] = value.strip().upper()
+    unsupported = sorted(set(parts) - set(RULE_PARTS))
+    if unsupported:
+        raise ValueError(f"Unsupported rrule parts: {', '.join(unsupported)}")
+    if parts.get('FREQ') not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+
+    rule = {'freq': parts['FREQ'], 'interval': _positive(parts, 'INTERVAL', 1),
+            'byDay': None, 'count': None, 'until': None}
+    if 'BYDAY' in parts:
+        if rule['freq'] != 'WEEKLY':
+            raise ValueError('BYDAY is only supported with FREQ=WEEKLY')
+        days = parts['BYDAY'].split(',')
+        if any(day not in WEEKDAYS for day in days):
+            raise ValueError(f"BYDAY takes {', '.join(WEEKDAYS)}")
+        rule['byDay'] = sorted(set(days), key=WEEKDAYS.index)
+    if 'COUNT' in parts and 'UNTIL' in parts:
+        raise ValueError('Use either COUNT or UNTIL, not both')
+    if 'COUNT' in parts:
+        rule['count'] = _positive(parts, 'COUNT', None)
+        if rule['count'] > MAX_COUNT:
+            raise ValueError(f'COUNT may be at most {MAX_COUNT}')
+    if 'UNTIL' in parts:
+        rule['until'] = _parse_until(parts['UNTIL'])
+    return rule
+
+
+def _starts(freq, interval, by_day, first, until, start, end):
+    """Occurrence starts of a series in [start, end), in order"""
+    start = max(start, first)
+    if until is not None:
+        end = min(end, until + timedelta(microseconds=1))
+    if start >= end:
+        return
+
+    if freq == 'DAILY':
+        step = timedelta(days=interval)
+        occurrence = first + -(-(start - first) // step) * step
+        while occurrence < end:
+            yield occurrence
+            occurrence += step
+
+    elif freq == 'WEEKLY':
+        offsets = [WEEKDAYS.index(day) for day in by_day] if by_day else [first.weekday()]
+        week = first - timedelta(days=first.weekday())  # Monday of the first week, at the same time
+        step = timedelta(weeks=interval)
+        week += (start - week) // step * step
+        while week < end:
+            for offset in offsets:
+                occurrence = week + timedelta(days=offset)
+                if occurrence >= end:
+                    return
+                if occurrence >= start:
+                    yield occurrence
+            week += step
+
+    else:
+        step = interval * (12 if freq == 'YEARLY' else 1)
+        months = (start.year - first.year) * 12 + start.month - first.month
+        period = months // step
+        while True:
+            total = first.month - 1 + period * step
+            year, month = first.year + total // 12, total % 12 + 1
+            if year > OPEN_END.year or datetime(year, month, 1) >= end:
+                return
+            # Like RFC 5545, months without the day (the 31st, Feb 29) are skipped
+            if first.day <= monthrange(year, month)[1]:
+                occurrence = first.replace(year=year, month=month)
+                if occurrence >= end:
+                    return
+                if occurrence >= start:
+                    yield occurrence
+            period += 1
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def _window_starts(freq, interval, by_day, first, until, start, end):
+    return tuple(_starts(freq, interval, by_day, first, until, start, end))
+
+
+def series_fields(document):
+    """The recurrence and seriesEnd of a schedule document with an rrule, or ValueError"""
+    first, last = document.get('startTime'), document.get('endTime')
+    if not isinstance(first, datetime):
+        raise ValueError('A recurring event needs an ISO 8601 startTime')
+    if last is not None and not (isinstance(last, datetime) and last >= first):
+        raise ValueError('endTime must be an ISO 8601 datetime after startTime')
+    rule = parse_rrule(document['rrule'])
+    until = rule['until']
+    if rule['count']:
+        starts = _starts(rule['freq'], rule['interval'], rule['byDay'], first, None, first, OPEN_END)
+        until = max(islice(starts, rule['count']), default=first)
+    return {
+        'recurrence': {'freq': rule['freq'], 'interval': rule['interval'], 'byDay': rule['byDay'], 'until': until},
+        'seriesEnd': until or OPEN_END,
+    }
+
+
+def with_series_fields(kind, document, previous=None):
+    """Derive recurrence/seriesEnd for a schedule insert, or an update given the stored `previous`.
+
+    Client-supplied server fields are dropped. Changing the rule or the first
+    start of a series clears its exceptions, which are keyed by the old starts.
+    Raises ValueError for an invalid rule.
+    """
+    if kind != 'schedules':
+        return document
+    for field in DERIVED_FIELDS:
+        document.pop(field, None)
+    if previous is None:
+        merged = document
+    elif any(field in document for field in ('rrule', 'startTime', 'endTime')):
+        merged = {**previous, **document}
+    else:
+        return document
+
+    if merged.get('rrule'):
+        document.update(series_fields(merged))
+        if previous is not None and previous.get('exceptions') and (
+                merged['rrule'] != previous.get('rrule') or merged['startTime'] != previous.get('startTime')):
+            document['exceptions'] = []
+    elif previous is not None and previous.get('recurrence'):
+        document.update({'recurrence': None, 'seriesEnd': None, 'exceptions': []})
+    return document
+
+
+def is_occurrence(series, when):
+    recurrence = series['recurrence']
+    starts = _starts(recurrence['freq'], recurrence['interval'], recurrence['byDay'],
+                     series['startTime'], recurrence['until'], when, when + timedelta(microseconds=1))
+    return next(starts, None) == when
+
+
+def parse_exception(body):
+    """The exception entry a request body describes for one occurrence, or ValueError.
+
+    Whether it is an occurrence of the series is checked against the stored
+    rule with is_occurrence() before the entry is written. A changed
+    startTime or endTime must be an ISO 8601 datetime.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get('occurrence'), str):
+        raise ValueError('occurrence must be the ISO 8601 start of an occurrence')
+    try:
+        when = parse_datetime(body['occurrence'])
+    except ValueError:
+        raise ValueError('occurrence must be the ISO 8601 start of an occurrence')
+
+    if body.get('cancelled'):
+        return {'occurrence': when, 'cancelled': True}
+    overrides = with_native_dates('schedules', {
+        field: value for field, value in body.items()
+        if field not in EXCEPTION_PROTECTED_FIELDS and field not in ('occurrence', 'cancelled')
+    })
+    for field in ('startTime', 'endTime'):
+        if field in overrides and not isinstance(overrides[field], datetime):
+            raise ValueError(f'{field} must be an ISO 8601 datetime')
+    return {'occurrence': when, **overrides}
+
+
+def exception_update(exception):
+    """Update pipeline replacing the series' exception for the same occurrence, if any, with `exception`"""
+    return [{'$set': {'exceptions': {'$concatArrays': [
+        {'$filter': {'input': {'$ifNull': ['$exceptions', []]},
+                     'cond': {'$ne': ['$$this.occurrence', exception['occurrence']]}}},
+        # $literal: override values such as '$5 lunch' are data, not field paths
+        {'$literal': [exception]},
+    ]}}}]
+
+
+def occurrence_id(series_id, start):
+    return f'{series_id}_{start:%Y%m%dT%H%M%S}'
+
+
+def expand(series, start, end):
+    """Occurrences of a stored series that start in [start, end), exceptions applied"""
+    recurrence = series['recurrence']
+    first = series['startTime']
+    duration = series['endTime'] - first if isinstance(series.get('endTime'), datetime) else None
+    base = {field: value for field, value in series.items() if field not in SERIES_FIELDS and field != '_id'}
+    exceptions = {
+        exception['occurrence']: exception
+        for exception in series.get('exceptions') or [] if isinstance(exception, dict)
+    }
+
+    def occurrence(original, overrides):
+        item = {**base, 'id': occurrence_id(series['_id'], original), 'seriesId': str(series['_id']),
+                'occurrenceStart': original, 'startTime': original, **overrides}
+        if duration is not None and 'endTime' not in overrides:
+            item['endTime'] = item['startTime'] + duration
+        return item
+
+    by_day = tuple(recurrence['byDay']) if recurrence.get('byDay') else None
+    occurrences = [
+        occurrence(original, {})
+        for original in _window_starts(recurrence['freq'], recurrence['interval'], by_day,
+                                       first, recurrence.get('until'), start, end)
+        if original not in exceptions
+    ]
+    # A changed occurrence may have been moved into (or out of) the window
+    for original, exception in exceptions.items():
+        if exception.get('cancelled'):
+            continue
+        overrides = {field: value for field, value in exception.items() if field != 'occurrence'}
+        moved = overrides.get('startTime', original)
+        if isinstance(moved, datetime) and start <= moved < end:
+            occurrences.append(occurrence(original, overrides))
+    return occurrences
+
+
+def occurrence_window(args):
+    """(from, to) of an occurrence listing, or ValueError"""
+    window = parse_window(args)
+    if not window or '$gte' not in window or '$lt' not in window:
+        raise ValueError('from and to are required')
+    if window['$lt'] - window['$gte'] > timedelta(days=MAX_WINDOW_DAYS):
+        raise ValueError(f'The window may span at most {MAX_WINDOW_DAYS} days')
+    return window['$gte'], window['$lt']
+
+
+def window_queries(user_id, start, end):
+    """(single events, series) queries for the schedule documents behind a window"""
+    return ({'userId': user_id, 'startTime': {'$gte': start, '$lt': end}, 'recurrence': None},
+            {'userId': user_id, 'seriesEnd': {'$gte': start}, 'startTime': {'$lt': end}})
+
+
+def merge_occurrences(events, series_documents, start, end):
+    """The single events plus every series' occurrences in [start, end), by startTime"""
+    events = list(events)
+    for series in series_documents:
+        events.extend(expand(series, start, end))
+    events.sort(key=lambda event: event['startTime'])
+    return events
+
+
+def occurrences_in_window(collection, user_id, start, end):
+    """Single events and expanded series occurrences starting in [start, end), by startTime"""
+    single, series = window_queries(user_id, start, end)
+    return merge_occurrences(collection.find(single), collection.find(series), start, end)
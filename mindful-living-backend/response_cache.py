@@ -0,0 +1,159 @@
+"""Read-through cache for serialized GET responses.
+
+Entries are keyed by the response ETag, which already hashes the user, path,
+query and the user's revision counters (see revisions.py). A write bumps the
+counters, so stale entries can never be served again, even by other workers.
+Writes additionally invalidate the user's entries for the touched collections
+so they stop taking up room.
+
+Backends:
+  memory  per-process LRU with a TTL and a byte cap
+  redis   any Redis-compatible server (Redis, Valkey, KeyDB) shared by the
+          workers of a node; size it with maxmemory + allkeys-lru
+"""
+import threading
+import time
+from collections import OrderedDict
+
+BACKENDS = ('memory', 'redis', 'none')
+
+
+class ResponseCache:
+    """Hit/miss accounting shared by the backends"""
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class MemoryCache(ResponseCache):
+    backend = 'memory'
+
+    def __init__(self, max_bytes, ttl, max_entry_bytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # key -> (expires, body, tags), oldest first
+        self._tags = {}                # tag -> set of keys
+        self._bytes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        _, body, tags = self._entries.pop(key)
+        self._bytes -= len(body)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self._count(entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key, body, tags):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body, tags)
+            self._bytes += len(body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats.update(entries=len(self._entries), bytes=self._bytes,
+                         maxBytes=self.max_bytes, evictions=self.evictions)
+        return stats
+
+
+class RedisCache(ResponseCache):
+    backend = 'redis'
+
+    def __init__(self, url, ttl, max_entry_bytes):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPONSE_CACHE=redis needs the redis package (pip install redis)')
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+
+    def get(self, key):
+        body = self._redis.get(f'resp:{key}')
+        self._count(body is not None)
+        return body
+
+    def set(self, key, body, tags):
+        if len(body) > self.max_entry_bytes:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(f'resp:{key}', body, ex=self.ttl)
+        for tag in tags:
+            pipe.sadd(f'resptag:{tag}', key)
+            pipe.expire(f'resptag:{tag}', self.ttl)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        for tag in tags:
+            keys = self._redis.smembers(f'resptag:{tag}')
+            pipe = self._redis.pipeline(transaction=False)
+            if keys:
+                pipe.delete(*(b'resp:' + key for key in keys))
+            pipe.delete(f'resptag:{tag}')
+            pipe.execute()
+
+
+def cache_tags(user_id, kinds):
+    return [f'{user_id}:{kind}' for kind in kinds]
+
+
+def create_response_cache(backend, url, max_bytes, ttl, max_entry_bytes):
+    """Build the configured backend, or None when caching is off"""
+    if backend == 'memory':
+        return MemoryCache(max_bytes, ttl, max_entry_bytes)
+    if backend == 'redis':
+        return RedisCache(url, ttl, max_entry_bytes)
+    if backend == 'none':
+        return None
+    raise ValueError(f"RESPONSE_CACHE must be one of {', '.join(BACKENDS)}")
@@ -0,0 +1,142 @@
+"""Content-Encoding negotiation for API responses.
+
+Responses are compressed with the best coding the client accepts, by the
+server's order of preference among the available ones. gzip is always
+available. brotli ('br') and zstd are used when the brotli and zstandard
+packages are installed. Bodies below the size threshold are sent as they are.
+Streamed responses have no known size and are always compressed, flushed per
+chunk so the client still sees each batch as it is produced.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/csv', 'text/plain', 'text/html')
+# Codings nobody should rewrite: no body, or a byte range of the original
+_SKIPPED_STATUSES = (204, 206, 304)
+
+
+class _Encoder:
+    """One incremental compressor: compress(), flush() (sync point) and finish()"""
+
+    def __init__(self, compress, flush, finish):
+        self.compress = compress
+        self.flush = flush
+        self.finish = finish
+
+
+def _gzip(level):
+    encoder = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return _Encoder(encoder.compress, lambda: encoder.flush(zlib.Z_SYNC_FLUSH), encoder.flush)
+
+
+def _brotli(level):
+    encoder = brotli.Compressor(quality=level)
+    return _Encoder(encoder.process, encoder.flush, encoder.finish)
+
+
+def _zstd(level):
+    encoder = zstandard.ZstdCompressor(level=level).compressobj()
+    return _Encoder(encoder.compress, lambda: encoder.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+                    encoder.flush)
+
+
+ENCODERS = {'zstd': _zstd, 'br': _brotli, 'gzip': _gzip}
+DEFAULT_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+PACKAGES = {'zstd': 'zstandard', 'br': 'brotli'}
+
+
+def available_encodings():
+    return [name for name, module in (('zstd', zstandard), ('br', brotli), ('gzip', zlib)) if module]
+
+
+def negotiate(accept_encodings, offered):
+    """The offered coding with the highest q-value in Accept-Encoding, or None.
+
+    Ties go to the earlier entry of `offered`.
+    """
+    best, best_quality = None, 0
+    for name in offered:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(data, encoding, level):
+    encoder = ENCODERS[encoding](level)
+    return encoder.compress(data) + encoder.finish()
+
+
+def _compress_stream(body, chunks, encoder):
+    try:
+        for chunk in chunks:
+            output = encoder.compress(chunk) + encoder.flush()
+            if output:
+                yield output
+        yield encoder.finish()
+    finally:
+        close = getattr(body, 'close', None)
+        if close is not None:
+            close()
+
+
+class ResponseCompression:
+    """after_request hook that applies the negotiated Content-Encoding"""
+
+    def __init__(self, encodings, min_size, levels):
+        unknown = [name for name in encodings if name not in ENCODERS]
+        if unknown:
+            raise ValueError(f"Unknown compression algorithm(s): {', '.join(unknown)}")
+        missing = [name for name in encodings if name not in available_encodings()]
+        if missing:
+            packages = ' '.join(PACKAGES[name] for name in missing)
+            raise RuntimeError(f"COMPRESSION_ALGORITHMS lists {', '.join(missing)}; pip install {packages}")
+        self.encodings = list(encodings)
+        self.min_size = min_size
+        self.levels = {**DEFAULT_LEVELS, **levels}
+
+    def init_app(self, app):
+        app.extensions['compression'] = self
+        app.after_request(self.process_response)
+
+    def process_response(self, response):
+        if (not self.encodings
+                or response.mimetype not in COMPRESSIBLE_TYPES
+                or response.status_code < 200 or response.status_code in _SKIPPED_STATUSES
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = negotiate(request.accept_encodings, self.encodings)
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+
+        if response.is_streamed:
+            # Bound now: the generator runs after response.response has been replaced
+            response.response = _compress_stream(response.response, response.iter_encoded(),
+                                                 ENCODERS[encoding](level))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressed = compress(data, encoding, level)
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
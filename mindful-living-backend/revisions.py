@@ -0,0 +1,37 @@
+"""Per-user revision counters for conditional GETs.
+
+Every successful write bumps the writer's counter for the collections it
+touched (one small document per user in the revisions collection). A GET
+derives its ETag from the counters it depends on, so an unchanged list can be
+answered with 304 after one _id lookup instead of the collection query.
+"""
+import hashlib
+
+from database import revisions_collection
+
+# What each readable resource depends on; analytics moves with every counted write
+ANALYTICS_SOURCES = ('analytics', 'tasks', 'goals', 'schedules', 'transactions', 'finances')
+
+
+def revision_update(*kinds):
+    return {'$inc': {kind: 1 for kind in kinds}}
+
+
+def bump(user_id, *kinds):
+    """Mark `kinds` as changed for this user"""
+    revisions_collection.update_one({'_id': user_id}, revision_update(*kinds), upsert=True)
+
+
+def current_revisions(user_id, kinds):
+    document = revisions_collection.find_one({'_id': user_id}, {kind: 1 for kind in kinds}) or {}
+    return [document.get(kind, 0) for kind in kinds]
+
+
+def revision_etag(user_id, revisions, path, query):
+    """Opaque ETag for one user's view of `path?query` at the given revisions.
+
+    The user id is part of the hash so two accounts in one browser never share
+    a validator.
+    """
+    key = f"{user_id}|{path}|{query}|{'.'.join(map(str, revisions))}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
@@ -0,0 +1,218 @@
+"""Revoked access tokens.
+
+Revoked jtis are stored in revoked_tokens until the token would have expired
+anyway (a TTL index removes them). Each process mirrors them in a Bloom
+filter, so checking a token that was never revoked (nearly every request)
+is a few hash probes in memory. Only a filter hit is confirmed against
+MongoDB, and confirmations are cached.
+
+The filter is refreshed incrementally by reading what was revoked since the
+last refresh, and rebuilt from scratch now and then so expired tokens stop
+taking up room.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from database import revoked_tokens_collection
+
+# Overlap between incremental refreshes, to tolerate clock skew between workers
+REFRESH_OVERLAP = timedelta(seconds=5)
+# How long a request waits for another thread's first load before going ahead
+LOAD_TIMEOUT = 30
+# Only what the filter needs, fetched a batch at a time however many tokens are revoked
+REFRESH_PROJECTION = {'revokedAt': 1}
+REFRESH_BATCH_SIZE = 10000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, using double hashing of one blake2b digest"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        size = self.size
+        position = int.from_bytes(digest[:8], 'little') % size
+        step = (int.from_bytes(digest[8:], 'little') | 1) % size
+        for _ in range(self.hashes):
+            yield position
+            position = (position + step) % size
+
+    def add(self, item):
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self._bits
+        # Most probes stop at the first unset bit
+        for position in self._positions(item):
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+class RevocationList:
+    """Per-process view of revoked_tokens"""
+
+    def __init__(self, capacity, error_rate, refresh_seconds, rebuild_seconds, confirmed_size=10000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.confirmed_size = confirmed_size
+        self._filter = BloomFilter(capacity, error_rate)
+        self._confirmed = OrderedDict()  # jti -> revoked?, for filter hits only
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._added_during_rebuild = None
+        self._refresh_started = None
+        self._synced_until = None  # revokedAt high-water mark
+        self.loaded = threading.Event()  # set once the first full load has finished
+        self._next_refresh = 0.0
+        self._next_rebuild = time.monotonic() + rebuild_seconds
+
+    # --- Writes ---
+    def revoke(self, jti, user_id, expires_at):
+        """Persist a revocation and apply it to this process immediately"""
+        revoked_tokens_collection.update_one(
+            {'_id': jti},
+            {'$setOnInsert': {'userId': user_id, 'expiresAt': expires_at, 'revokedAt': datetime.utcnow()}},
+            upsert=True
+        )
+        self.add(jti)
+
+    def add(self, jti):
+        with self._lock:
+            self._filter.add(jti)
+            self._confirmed.pop(jti, None)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(jti)
+
+    # --- Checks ---
+    def might_be_revoked(self, jti):
+        """False means definitely not revoked; True needs confirming"""
+        return jti in self._filter
+
+    def confirmed(self, jti):
+        """Cached confirmation of a filter hit: True, False or None if unknown"""
+        with self._lock:
+            return self._confirmed.get(jti)
+
+    def remember(self, jti, revoked):
+        with self._lock:
+            self._confirmed[jti] = revoked
+            while len(self._confirmed) > self.confirmed_size:
+                self._confirmed.popitem(last=False)
+        return revoked
+
+    def is_revoked(self, jti):
+        """Blocklist check for the synchronous app"""
+        self.refresh_if_due()
+        if not self.might_be_revoked(jti):
+            return False
+        revoked = self.confirmed(jti)
+        if revoked is None:
+            revoked = self.remember(jti, revoked_tokens_collection.find_one({'_id': jti}, {'_id': 1}) is not None)
+        return revoked
+
+    # --- Refresh ---
+    def begin_refresh(self):
+        """Claim the next refresh for this caller: (query, rebuild), or None if not due.
+
+        Only one caller refreshes at a time, and only once refresh_seconds have
+        passed, so requests in between never wait on it. A rebuild reads every
+        live revocation into a new filter; otherwise only recent ones are read.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._refreshing or now < self._next_refresh:
+                return None
+            self._refreshing = True
+            self._next_refresh = now + self.refresh_seconds
+            self._refresh_started = datetime.utcnow()
+            if self._synced_until is None or now >= self._next_rebuild:
+                self._added_during_rebuild = []
+                return {}, True
+            return {'revokedAt': {'$gte': self._synced_until - REFRESH_OVERLAP}}, False
+
+    def finish_refresh(self, revocations, rebuild):
+        """Apply the documents read for begin_refresh()'s query.
+
+        `revocations` may be a live cursor: a rebuild streams it into the new
+        filter one batch at a time instead of holding every document.
+        """
+        synced_until = None if rebuild else self._synced_until
+        # A rebuild fills a new filter off to the side; the old one keeps answering
+        target = BloomFilter(self.capacity, self.error_rate) if rebuild else None
+        if rebuild:
+            for revocation in revocations:
+                target.add(revocation['_id'])
+                synced_until = max(synced_until or revocation['revokedAt'], revocation['revokedAt'])
+        else:
+            # Read the (few) recent revocations before taking the lock requests check under
+            revocations = [{'_id': revocation['_id'], 'revokedAt': revocation['revokedAt']}
+                           for revocation in revocations]
+        with self._lock:
+            if rebuild:
+                for jti in self._added_during_rebuild:
+                    target.add(jti)
+                self._filter = target
+                self._confirmed.clear()
+                self._added_during_rebuild = None
+                self._next_rebuild = time.monotonic() + self.rebuild_seconds
+            else:
+                for revocation in revocations:
+                    self._filter.add(revocation['_id'])
+                    synced_until = max(synced_until, revocation['revokedAt'])
+            self._synced_until = synced_until or self._refresh_started
+            self._refreshing = False
+        self.loaded.set()
+
+    def abort_refresh(self):
+        with self._lock:
+            self._added_during_rebuild = None
+            self._refreshing = False
+
+    def _run_refresh(self, query, rebuild):
+        try:
+            self.finish_refresh(
+                revoked_tokens_collection.find(query, REFRESH_PROJECTION, batch_size=REFRESH_BATCH_SIZE), rebuild
+            )
+        except Exception:
+            self.abort_refresh()
+            raise
+
+    def refresh_if_due(self):
+        claimed = self.begin_refresh()
+        if claimed is None:
+            if not self.loaded.is_set():
+                # Another thread is doing the first load; an empty filter would let revoked tokens through
+                self.loaded.wait(LOAD_TIMEOUT)
+            return
+        query, rebuild = claimed
+        if rebuild and self._synced_until is not None:
+            # Periodic rebuilds run in the background; the first load must finish first
+            threading.Thread(target=self._run_refresh, args=claimed, daemon=True).start()
+        else:
+            self._run_refresh(query, rebuild)
+
+    def stats(self):
+        return {
+            'tokens': self._filter.count,
+            'filterBytes': self._filter.nbytes,
+            'hashes': self._filter.hashes
+        }
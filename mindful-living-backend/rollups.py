@@ -0,0 +1,185 @@
+"""Per-user transaction rollups by day and by month, per category.
+
+Every transaction write turns its (before, after) pair into $inc deltas on
+one bucket per granularity, so the finance summary reads a user's buckets
+for a date range instead of scanning their transactions.
+rebuild_user_rollups() recomputes the buckets from the raw transactions.
+
+Bucket documents in transaction_rollups:
+  {userId, granularity: 'day'|'month', period: 'YYYY-MM-DD'|'YYYY-MM',
+   category, count, income, spending, net}
+"""
+import re
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from database import transaction_rollups_collection, transactions_collection, users_collection
+from revisions import bump
+
+GRANULARITIES = {'day': 10, 'month': 7}  # granularity -> length of its period key
+UNCATEGORIZED = 'Uncategorized'
+ROLLUP_FIELDS = ('count', 'income', 'spending', 'net')
+
+_DAY = re.compile(r'^\d{4}-\d{2}-\d{2}')
+_BOUND = re.compile(r'\d{4}-\d{2}(-\d{2})?')
+
+
+def day_key(transaction):
+    """YYYY-MM-DD bucket of a transaction: its own date if given, else createdAt"""
+    value = transaction.get('date')
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, str) and _DAY.match(value):
+        return value[:10]
+    return (transaction.get('createdAt') or datetime.utcnow()).strftime('%Y-%m-%d')
+
+
+def category_key(transaction):
+    category = transaction.get('category')
+    return str(category) if category not in (None, '') else UNCATEGORIZED
+
+
+def number(value):
+    """A stored amount as a number; anything else (missing, strings, booleans) counts as 0"""
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def amount_of(transaction):
+    return number(transaction.get('amount'))
+
+
+def _bucket_delta(transaction, sign):
+    # Expenses are stored as negative amounts
+    amount = amount_of(transaction)
+    return {
+        'count': sign,
+        'income': sign * amount if amount > 0 else 0,
+        'spending': sign * -amount if amount < 0 else 0,
+        'net': sign * amount,
+    }
+
+
+def rollup_deltas(changes):
+    """Summed deltas per (granularity, period, category) for (before, after) pairs"""
+    deltas = {}
+    for before, after in changes:
+        for transaction, sign in ((before, -1), (after, 1)):
+            if transaction is None:
+                continue
+            day, category = day_key(transaction), category_key(transaction)
+            for granularity, length in GRANULARITIES.items():
+                bucket = deltas.setdefault((granularity, day[:length], category), dict.fromkeys(ROLLUP_FIELDS, 0))
+                for field, value in _bucket_delta(transaction, sign).items():
+                    bucket[field] += value
+    # An edit that moves nothing (e.g. a new description) leaves all-zero deltas
+    return {key: inc for key, inc in deltas.items() if any(inc.values())}
+
+
+def rollup_operations(user_id, changes):
+    """Upserting $inc writes that apply `changes` to the user's buckets"""
+    return [
+        UpdateOne(
+            {'userId': user_id, 'granularity': granularity, 'period': period, 'category': category},
+            {'$inc': {field: value for field, value in inc.items() if value}},
+            upsert=True
+        )
+        for (granularity, period, category), inc in rollup_deltas(changes).items()
+    ]
+
+
+def record_rollups(user_id, changes):
+    operations = rollup_operations(user_id, changes)
+    if operations:
+        transaction_rollups_collection.bulk_write(operations, ordered=False)
+
+
+def _valid_bound(value, length):
+    """A zero-padded YYYY-MM-DD or YYYY-MM date at least as precise as the period key"""
+    if len(value) < length or not _BOUND.fullmatch(value):
+        return False
+    try:
+        datetime.strptime(value, '%Y-%m-%d' if len(value) == 10 else '%Y-%m')
+    except ValueError:
+        return False
+    return True
+
+
+def period_bounds(granularity, start=None, end=None):
+    """Inclusive period range for YYYY-MM-DD / YYYY-MM bounds, or ValueError"""
+    length = GRANULARITIES.get(granularity)
+    if length is None:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    bounds = {}
+    for name, value, operator in (('from', start, '$gte'), ('to', end, '$lte')):
+        if not value:
+            continue
+        if not _valid_bound(value, length):
+            accepted = 'YYYY-MM-DD' if length == 10 else 'YYYY-MM-DD or YYYY-MM'
+            raise ValueError(f'{name} must be a {accepted} date for {granularity} granularity')
+        bounds[operator] = value[:length]
+    return bounds
+
+
+def _rounded(totals):
+    return {field: round(value, 2) if field != 'count' else value for field, value in totals.items()}
+
+
+def summarize(user_id, granularity, start=None, end=None):
+    """Totals per period and category between two dates, read from the buckets"""
+    query = {'userId': user_id, 'granularity': granularity}
+    bounds = period_bounds(granularity, start, end)
+    if bounds:
+        query['period'] = bounds
+
+    periods = {}
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    categories = {}
+    buckets = transaction_rollups_collection.find(query, {'_id': 0, 'period': 1, 'category': 1, **dict.fromkeys(ROLLUP_FIELDS, 1)})
+    for bucket in buckets.sort([('period', 1), ('category', 1)]):
+        if not bucket.get('count'):
+            continue  # every transaction in it was deleted or moved
+        period = periods.setdefault(bucket['period'], {**dict.fromkeys(ROLLUP_FIELDS, 0), 'categories': {}})
+        category_total = categories.setdefault(bucket['category'], dict.fromkeys(ROLLUP_FIELDS, 0))
+        values = {field: bucket.get(field, 0) for field in ROLLUP_FIELDS}
+        period['categories'][bucket['category']] = _rounded(values)
+        for target in (period, category_total, totals):
+            for field, value in values.items():
+                target[field] += value
+
+    return {
+        'granularity': granularity,
+        'from': start,
+        'to': end,
+        'periods': [
+            {'period': key, **_rounded({field: period[field] for field in ROLLUP_FIELDS}),
+             'categories': period['categories']}
+            for key, period in periods.items()
+        ],
+        'totals': {**_rounded(totals), 'categories': {name: _rounded(values) for name, values in categories.items()}},
+    }
+
+
+def rebuild_user_rollups(user_id):
+    """Recompute one user's buckets from their transactions, returning how many there are"""
+    projection = {'amount': 1, 'category': 1, 'date': 1, 'createdAt': 1}
+    deltas = rollup_deltas(
+        (None, transaction) for transaction in transactions_collection.find({'userId': user_id}, projection)
+    )
+    transaction_rollups_collection.delete_many({'userId': user_id})
+    if deltas:
+        transaction_rollups_collection.insert_many([
+            {'userId': user_id, 'granularity': granularity, 'period': period, 'category': category, **inc}
+            for (granularity, period, category), inc in deltas.items()
+        ])
+    bump(user_id, 'transactions')
+    return len(deltas)
+
+
+def rebuild_all_rollups():
+    """Rebuild the buckets of every user, returning how many users were processed"""
+    count = 0
+    for user in users_collection.find({}, {'_id': 1}):
+        rebuild_user_rollups(str(user['_id']))
+        count += 1
+    return count
@@ -0,0 +1,189 @@
+from flask.json.provider import DefaultJSONProvider
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+import codecs
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_PROVIDERS = ('orjson', 'stdlib')
+DEFAULT_JSON_PROVIDER = 'orjson' if orjson else 'stdlib'
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Calendar times go out as ISO 8601, like the strings clients send for them;
+# every other datetime (createdAt, lastLogin, ...) keeps the HTTP-date format
+CALENDAR_FIELDS = ('dueDate', 'startTime', 'endTime', 'occurrenceStart')
+# Calendar times nested in schedule documents: field -> its calendar fields
+NESTED_CALENDAR_FIELDS = {'exceptions': ('occurrence', 'startTime', 'endTime'), 'recurrence': ('until',)}
+
+
+def to_public(data):
+    """Rename Mongo's _id to id on a document (or list of documents) in place.
+
+    Calendar times are formatted with iso_utc() as well. Only those and the
+    top-level key are touched; ObjectIds and other datetimes anywhere in the
+    tree are handled by MongoJSONProvider while the response is encoded, so
+    documents are walked exactly once.
+    """
+    if isinstance(data, list):
+        for item in data:
+            to_public(item)
+    elif isinstance(data, dict):
+        if isinstance(data.get('_id'), ObjectId):
+            data['id'] = str(data.pop('_id'))
+        with_iso_dates(data, CALENDAR_FIELDS)
+        for field, fields in NESTED_CALENDAR_FIELDS.items():
+            nested = data.get(field)
+            for item in nested if isinstance(nested, list) else [nested]:
+                if isinstance(item, dict):
+                    with_iso_dates(item, fields)
+    return data
+
+
+def with_iso_dates(document, fields):
+    """Format the datetimes among `fields` of `document` with iso_utc(), in place"""
+    for field in fields:
+        if isinstance(document.get(field), datetime):
+            document[field] = iso_utc(document[field])
+    return document
+
+
+def iso_utc(dt):
+    """ISO 8601 in UTC with a Z suffix, to the millisecond BSON keeps (naive datetimes are UTC).
+
+    Whole seconds are written without a fraction, so a value that went in
+    as '2026-10-20T09:00:00Z' comes back the same.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat(timespec='milliseconds' if dt.microsecond >= 1000 else 'seconds') + 'Z'
+
+
+def http_date(dt):
+    """Format a datetime exactly like werkzeug.http.http_date, without the
+    timetuple/email.utils round trip (naive datetimes are treated as UTC)"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return '%s, %02d %s %04d %02d:%02d:%02d GMT' % (
+        _WEEKDAYS[dt.weekday()], dt.day, _MONTHS[dt.month - 1], dt.year,
+        dt.hour, dt.minute, dt.second
+    )
+
+
+def _default(o):
+    if isinstance(o, datetime):
+        return http_date(o)
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, Decimal128):
+        return str(o.to_decimal())
+    return DefaultJSONProvider.default(o)
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes BSON types directly during serialization"""
+
+    default = staticmethod(_default)
+
+
+# Floats the stdlib writes in exponent form and orjson does not, or writes
+# differently: |x| >= 1e16 and 0 < |x| < 1e-4. orjson writes the former and
+# anything below 1e-5 as e.g. 1e16 / 1.5e-7, so with digits, '.' and '-'
+# deleted and the value delimiters folded into ':', they leave ':e'. The rest
+# start with 0.0000. Matches inside strings just cost a fallback.
+_EXPONENT_SCAN = bytes.maketrans(b',[', b'::')
+_NUMBER_CHARS = b'0123456789.-'
+# Integers past 64 bits, which orjson would decode as floats, are 19+ digit runs
+_DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+_LONG_INTEGER = b'0' * 19
+
+
+def _escape_non_ascii(error):
+    """Codec error handler escaping a run of characters exactly like json's ensure_ascii"""
+    escaped = []
+    for char in error.object[error.start:error.end]:
+        n = ord(char)
+        if n < 0x10000:
+            escaped.append('\\u%04x' % n)
+        else:
+            n -= 0x10000
+            escaped.append('\\u%04x\\u%04x' % (0xd800 | (n >> 10), 0xdc00 | (n & 0x3ff)))
+    return ''.join(escaped), error.end
+
+
+codecs.register_error('json_ensure_ascii', _escape_non_ascii)
+
+
+def _diverges_from_stdlib(data):
+    scan = data.translate(_EXPONENT_SCAN, _NUMBER_CHARS)
+    return scan[:1] == b'e' or b':e' in scan or b'0.0000' in data
+
+
+class OrjsonProvider(MongoJSONProvider):
+    """MongoJSONProvider with orjson doing the encoding and decoding.
+
+    Output is byte-identical to MongoJSONProvider: keys are sorted, datetimes
+    go through the same http_date default, and non-ASCII is escaped
+    afterwards. Payloads that orjson would encode differently (exponent-form
+    floats, integers past 64 bits, formatting options other than compact) are
+    handed to the stdlib. The one exception is NaN and Infinity, which orjson
+    writes as null instead of the stdlib's non-JSON NaN tokens.
+    """
+
+    _OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+    def _encode(self, obj):
+        """Compact JSON as bytes, or None if only the stdlib gets it right"""
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self._OPTIONS)
+        except TypeError:
+            return None
+        if _diverges_from_stdlib(data):
+            return None
+        if not data.isascii():
+            data = data.decode('utf-8').encode('ascii', 'json_ensure_ascii')
+        # DEL is ASCII but escaped by the stdlib; raw, it can only occur inside strings
+        return data.replace(b'\x7f', b'\\u007f')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs == {'separators': (',', ':')}:
+            data = self._encode(obj)
+            if data is not None:
+                return data.decode('ascii')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if not kwargs:
+            raw = s.encode('utf-8', 'surrogatepass') if isinstance(s, str) else s
+            if _LONG_INTEGER not in raw.translate(_DIGITS_TO_ZERO):
+                try:
+                    return orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    pass  # let the stdlib accept NaN etc. or raise its own error
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not (self.compact is None and self._app.debug) and self.compact is not False:
+            data = self._encode(self._prepare_response_obj(args, kwargs))
+            if data is not None:
+                return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+        return super().response(*args, **kwargs)
+
+
+def create_json_provider(app, name):
+    """The configured JSON provider for `app` ('orjson' or 'stdlib')"""
+    if name == 'stdlib':
+        return MongoJSONProvider(app)
+    if name == 'orjson':
+        if orjson is None:
+            raise RuntimeError('JSON_PROVIDER=orjson needs the orjson package (pip install orjson)')
+        return OrjsonProvider(app)
+    raise ValueError(f"JSON_PROVIDER must be one of {', '.join(JSON_PROVIDERS)}")
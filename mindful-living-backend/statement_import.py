@@ -0,0 +1,309 @@
+"""Bank-statement import: CSV and OFX files streamed into transactions.
+
+Files are read one row at a time and inserted in batches, so memory stays
+flat however long the statement is. Each row is normalized to the shape the
+app uses ({description, amount, category, date}, expenses negative) and
+carries an importHash; a unique (userId, importHash) index turns re-imported
+rows into duplicate-key errors that are counted instead of stored twice.
+
+Background jobs record a heartbeat with every batch; expire_stale_job()
+marks a job whose worker went away as failed instead of leaving it running.
+"""
+import codecs
+import csv
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from analytics_engine import record_changes
+from database import DUPLICATE_KEY, import_jobs_collection, transactions_collection
+from revisions import bump
+
+FORMATS = ('csv', 'ofx')
+
+_READ_SIZE = 64 * 1024
+# Rejected rows reported back with their line numbers; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+# A running job whose heartbeat is older than this has lost its worker
+STALE_JOB_AFTER = timedelta(minutes=15)
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d.%m.%Y', '%Y/%m/%d', '%d %b %Y', '%b %d, %Y')
+
+# Header names (lowercased) that banks use for each field
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'posted date', 'posting date', 'booking date', 'value date'),
+    'description': ('description', 'payee', 'name', 'details', 'narrative', 'memo', 'merchant'),
+    'amount': ('amount', 'transaction amount', 'value'),
+    'debit': ('debit', 'withdrawal', 'withdrawals', 'money out', 'paid out'),
+    'credit': ('credit', 'deposit', 'deposits', 'money in', 'paid in'),
+    'category': ('category',),
+}
+
+
+class RowError(ValueError):
+    """A row that cannot be turned into a transaction"""
+
+
+def detect_format(filename, head):
+    """Guess csv or ofx from the file name, then from the first bytes"""
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    if extension == 'csv':
+        return 'csv'
+    sample = head.lstrip().upper()
+    if sample.startswith(b'OFXHEADER') or sample.startswith(b'<?XML') or b'<OFX>' in sample:
+        return 'ofx'
+    return 'csv'
+
+
+def parse_amount(value):
+    """'1,234.56', '-$12.00' and '(12.00)' style amounts as a float"""
+    text = (value or '').strip()
+    if not text:
+        raise RowError('missing amount')
+    negative = text.startswith('(') and text.endswith(')')
+    text = re.sub(r'[^\d.\-+]', '', text)
+    try:
+        amount = float(text)
+    except ValueError:
+        raise RowError(f'invalid amount: {value}')
+    return -abs(amount) if negative else amount
+
+
+def parse_date(value, date_format=None):
+    """A statement date as an ISO YYYY-MM-DD string"""
+    text = (value or '').strip()
+    for candidate in ((date_format,) if date_format else DATE_FORMATS):
+        try:
+            return datetime.strptime(text, candidate).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise RowError(f'invalid date: {value}')
+
+
+def _column_map(fieldnames):
+    lowered = {name.strip().lower(): name for name in fieldnames or [] if name}
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in lowered:
+                columns[field] = lowered[alias]
+                break
+    if 'date' not in columns or not ('amount' in columns or 'debit' in columns or 'credit' in columns):
+        raise RowError('CSV needs a date column and an amount (or debit/credit) column')
+    return columns
+
+
+def parse_csv(stream, date_format=None):
+    """Yield (line number, transaction dict or RowError) for each CSV row.
+
+    A file the csv module cannot read on (an oversized field, a stray NUL)
+    raises RowError: the reader cannot resume after such a row.
+    """
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    try:
+        columns = _column_map(reader.fieldnames)
+        for row in reader:
+            yield reader.line_num, _csv_transaction(row, columns, date_format)
+    except csv.Error as e:
+        raise RowError(f'after line {reader.line_num}: {e}')
+
+
+def _csv_transaction(row, columns, date_format):
+    """One CSV row as a transaction dict, or the RowError explaining why not"""
+    values = {field: (row.get(column) or '').strip() for field, column in columns.items()}
+    try:
+        if values.get('amount'):
+            amount = parse_amount(values['amount'])
+        elif values.get('debit'):
+            amount = -abs(parse_amount(values['debit']))
+        else:
+            amount = abs(parse_amount(values.get('credit')))
+        return {
+            'description': values.get('description', ''),
+            'amount': amount,
+            'category': values.get('category') or 'Uncategorized',
+            'date': parse_date(values['date'], date_format),
+        }
+    except RowError as e:
+        return e
+
+
+_OFX_TAG = re.compile(rb'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_tokens(stream):
+    """Yield (closing, tag, text) from an SGML or XML OFX file, chunk by chunk"""
+    pending = b''
+    while True:
+        chunk = stream.read(_READ_SIZE)
+        data = pending + chunk
+        # Keep a possibly cut-off tag for the next chunk
+        cut = data.rfind(b'<') if chunk else len(data)
+        end = 0
+        for match in _OFX_TAG.finditer(data, 0, cut):
+            end = match.end()
+            yield match.group(1) == b'/', match.group(2).upper().decode('ascii'), match.group(3)
+        pending = data[end:] if chunk else b''
+        if not chunk:
+            return
+
+
+def parse_ofx(stream):
+    """Yield (transaction number, transaction dict or RowError) for each STMTTRN.
+
+    Each transaction carries the ACCTID of the statement it appears in.
+    """
+    number = 0
+    current = None
+    account = None
+    for closing, tag, text in _ofx_tokens(stream):
+        if tag == 'STMTTRN':
+            if not closing:
+                current = {}
+                continue
+            if current is None:
+                continue
+            number += 1
+            try:
+                if not current.get('DTPOSTED'):
+                    raise RowError('missing DTPOSTED')
+                description = current.get('NAME') or current.get('MEMO') or ''
+                yield number, {
+                    'description': description,
+                    'amount': parse_amount(current.get('TRNAMT')),
+                    'category': 'Uncategorized',
+                    'date': parse_date(current['DTPOSTED'][:8], '%Y%m%d'),
+                    'fitId': current.get('FITID') or None,
+                    'account': account,
+                }
+            except RowError as e:
+                yield number, e
+            current = None
+        elif current is not None and not closing:
+            current[tag] = text.decode('utf-8', 'replace').strip()
+        elif tag == 'ACCTID' and not closing:
+            account = text.decode('utf-8', 'replace').strip() or None
+
+
+def import_hash(user_id, transaction, occurrence):
+    """Stable identity of an imported row.
+
+    OFX FITIDs are the bank's own ids, unique only within an account, so
+    they are keyed by the statement's ACCTID too. CSV rows have none, so
+    identical rows on the same date are told apart by their occurrence
+    number in the file: two equal coffees in one export are both kept, but
+    re-importing the export adds neither.
+    """
+    if transaction.get('fitId') and transaction.get('account'):
+        key = f"{user_id}|fitid|{transaction['account']}|{transaction['fitId']}"
+    elif transaction.get('fitId'):
+        # Statements without an ACCTID keep the key they were first imported under
+        key = f"{user_id}|fitid|{transaction['fitId']}"
+    else:
+        key = f"{user_id}|{transaction['date']}|{_row_key(transaction)}|{occurrence}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _row_key(transaction):
+    description = ' '.join(transaction['description'].lower().split())
+    return f"{transaction['amount']:.2f}|{description}"
+
+
+def _insert_batch(user_id, documents, counts):
+    failed = {}
+    try:
+        transactions_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        failed = {error['index']: error['code'] for error in e.details['writeErrors']}
+    for code in failed.values():
+        counts['duplicates' if code == DUPLICATE_KEY else 'rejected'] += 1
+    inserted = [document for index, document in enumerate(documents) if index not in failed]
+    counts['inserted'] += len(inserted)
+    record_changes(user_id, 'transactions', [(None, document) for document in inserted])
+
+
+def import_transactions(user_id, stream, fmt, batch_size, date_format=None, on_progress=None):
+    """Parse `stream` and insert its transactions, returning the counts.
+
+    on_progress(counts) is called after every batch.
+    """
+    counts = {'processed': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0, 'errors': []}
+    rows = parse_ofx(stream) if fmt == 'ofx' else parse_csv(stream, date_format)
+    now = datetime.utcnow()
+    batch = []
+    # Occurrences are counted per (date, row) over the whole file, which need not be date-ordered
+    occurrences = {}
+
+    for line, row in rows:
+        counts['processed'] += 1
+        if isinstance(row, RowError):
+            counts['rejected'] += 1
+            if len(counts['errors']) < MAX_REPORTED_ERRORS:
+                counts['errors'].append({'line': line, 'error': str(row)})
+            continue
+        base = (row['date'], _row_key(row))
+        occurrences[base] = occurrences.get(base, 0) + 1
+
+        identity = {'fitId': row.pop('fitId', None), 'account': row.pop('account', None)}
+        document = {
+            **row,
+            'userId': user_id,
+            'createdAt': now,
+            'source': 'import',
+            'importHash': import_hash(user_id, {**row, **identity}, occurrences[base]),
+        }
+        batch.append(document)
+        if len(batch) >= batch_size:
+            _insert_batch(user_id, batch, counts)
+            batch = []
+            if on_progress:
+                on_progress(counts)
+    if batch:
+        _insert_batch(user_id, batch, counts)
+    if on_progress:
+        on_progress(counts)
+    return counts
+
+
+def run_import_job(job_id, user_id, path, fmt, batch_size, date_format=None):
+    """Import a spooled upload in the background, recording progress on the job document.
+
+    A job that expire_stale_job() gave up on while it was queued is not run.
+    """
+    def save(counts, **fields):
+        import_jobs_collection.update_one(
+            {'_id': job_id}, {'$set': {**counts, **fields, 'heartbeatAt': datetime.utcnow()}}
+        )
+
+    def progress(counts):
+        save(counts)
+        bump(user_id, 'transactions')
+
+    try:
+        started = import_jobs_collection.update_one(
+            {'_id': job_id, 'status': 'running'}, {'$set': {'heartbeatAt': datetime.utcnow()}}
+        )
+        if not started.matched_count:
+            return
+        with open(path, 'rb') as stream:
+            counts = import_transactions(user_id, stream, fmt, batch_size, date_format,
+                                         on_progress=progress)
+        save(counts, status='completed', finishedAt=datetime.utcnow())
+    except Exception as e:
+        save({}, status='failed', error=str(e), finishedAt=datetime.utcnow())
+    finally:
+        os.remove(path)
+
+
+def expire_stale_job(job_id, user_id, max_age=STALE_JOB_AFTER):
+    """Mark the job failed if it is still running but has not reported for `max_age`"""
+    now = datetime.utcnow()
+    import_jobs_collection.update_one(
+        {'_id': job_id, 'userId': user_id, 'status': 'running', 'heartbeatAt': {'$lt': now - max_age}},
+        {'$set': {'status': 'failed', 'error': 'The import stopped responding', 'finishedAt': now}}
+    )
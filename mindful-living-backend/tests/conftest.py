@@ -0,0 +1,239 @@
+"""Shared fixtures: the app on an in-memory MongoDB, with every command recorded.
+
+Tests run against mongomock unless MONGO_TEST_URI points at a real server
+(a throwaway database is created and dropped per test). Tests marked
+`server` need query features mongomock lacks (such as $size projections);
+without MONGO_TEST_URI they run on a mongod started by pymongo_inmemory,
+and are skipped when it is not installed. Either way a
+pymongo CommandListener sees one started event per command the app sends;
+mongomock has no wire protocol, so its collection methods are mapped to the
+command PyMongo would send for them.
+"""
+import os
+import sys
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from pymongo import MongoClient, monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Hashing cost is not under test; keep signups fast
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+import database  # noqa: E402
+
+# Collection method -> command name, as PyMongo sends them
+MOCK_COMMANDS = {
+    'find': 'find', 'find_one': 'find',
+    'insert_one': 'insert', 'insert_many': 'insert',
+    'update_one': 'update', 'update_many': 'update', 'replace_one': 'update',
+    'delete_one': 'delete', 'delete_many': 'delete',
+    'find_one_and_update': 'findAndModify', 'find_one_and_delete': 'findAndModify',
+    'find_one_and_replace': 'findAndModify',
+    'count_documents': 'aggregate', 'aggregate': 'aggregate', 'distinct': 'distinct',
+}
+BULK_COMMANDS = {
+    'InsertOne': 'insert', 'UpdateOne': 'update', 'UpdateMany': 'update', 'ReplaceOne': 'update',
+    'DeleteOne': 'delete', 'DeleteMany': 'delete',
+}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """(command, collection) of every command started, in order"""
+
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        self.commands.append((event.command_name, event.command.get(event.command_name)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def clear(self):
+        self.commands.clear()
+
+    def on(self, collection):
+        """Command names sent to `collection`"""
+        return [name for name, target in self.commands if target == collection]
+
+
+def _bulk_commands(requests, ordered):
+    names = [BULK_COMMANDS[type(request).__name__] for request in requests]
+    if not ordered:
+        return list(dict.fromkeys(names))
+    # An ordered bulk write sends one command per run of the same operation
+    return [name for index, name in enumerate(names) if index == 0 or names[index - 1] != name]
+
+
+def _instrument_mongomock(monkeypatch, recorder):
+    """Report mongomock collection calls to `recorder` as started command events"""
+    import mongomock
+    from mongomock.collection import BulkOperationBuilder, Collection
+
+    # mongomock's bulk builder does not accept the `sort` PyMongo's UpdateOne passes along
+    add_update = BulkOperationBuilder.add_update
+    monkeypatch.setattr(BulkOperationBuilder, 'add_update',
+                        lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+
+    # mongomock implements some methods on top of others; only the outer call is a command
+    depth = threading.local()
+
+    def emit(collection, names):
+        for name in names:
+            recorder.started(SimpleNamespace(command_name=name, command={name: collection.name}))
+
+    def wrap(method, names_for):
+        original = getattr(Collection, method)
+
+        def instrumented(self, *args, **kwargs):
+            if not getattr(depth, 'value', 0):
+                emit(self, names_for(args, kwargs))
+            depth.value = getattr(depth, 'value', 0) + 1
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                depth.value -= 1
+        monkeypatch.setattr(Collection, method, instrumented)
+
+    for method, name in MOCK_COMMANDS.items():
+        wrap(method, lambda args, kwargs, name=name: [name])
+    wrap('bulk_write', lambda args, kwargs: _bulk_commands(
+        args[0] if args else kwargs['requests'], args[1] if len(args) > 1 else kwargs.get('ordered', True)))
+    return mongomock.MongoClient()
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'server: needs a real MongoDB (MONGO_TEST_URI or pymongo_inmemory)')
+
+
+@pytest.fixture(scope='session')
+def inmemory_server():
+    """URI of a mongod run by pymongo_inmemory for the whole session"""
+    pymongo_inmemory = pytest.importorskip('pymongo_inmemory')
+    with pymongo_inmemory.Mongod() as mongod:
+        yield mongod.connection_string
+
+
+@pytest.fixture
+def commands():
+    return CommandRecorder()
+
+
+@pytest.fixture
+def db(request, monkeypatch, commands):
+    """A fresh database for the app, its commands going to `commands`"""
+    uri = os.environ.get('MONGO_TEST_URI')
+    if not uri and request.node.get_closest_marker('server'):
+        uri = request.getfixturevalue('inmemory_server')
+    if uri:
+        client = MongoClient(uri, event_listeners=[commands])
+        name = f'lifesync_test_{uuid.uuid4().hex[:8]}'
+    else:
+        client = _instrument_mongomock(monkeypatch, commands)
+        name = database.db_name
+    monkeypatch.setattr(database, 'db_name', name)
+    monkeypatch.setattr(database, '_client', client)
+    monkeypatch.setattr(database, '_client_pid', os.getpid())
+
+    from indexes import ensure_indexes
+    ensure_indexes(client[name])
+    if not uri:
+        # mongomock treats the partial unique index as unique over every document
+        client[name].transactions.drop_index('userId_importHash_unique')
+    commands.clear()
+    yield client[name]
+    if uri:
+        client.drop_database(name)
+    client.close()
+
+
+@pytest.fixture
+def app(db):
+    import app as backend
+    flask_app = backend.create_app()
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class AsyncCursor:
+    """The part of PyMongo's async cursor async_app uses, over a synchronous one"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit):
+        self._cursor = self._cursor.limit(limit)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._cursor)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncCollection:
+    """Awaitable methods over a synchronous collection, for async_app"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self._db[name])
+
+
+@pytest.fixture
+def async_app(monkeypatch, db):
+    """async_app.app on the same database; its driver calls run inline"""
+    import async_app as backend
+    monkeypatch.setattr(backend, 'get_async_db', lambda: AsyncDatabase(db))
+    return backend.app
+
+
+@pytest.fixture
+def auth(client):
+    """Sign up a fresh user: (Authorization headers, user id)"""
+    response = client.post('/auth/signup', json={
+        'email': f'{uuid.uuid4().hex[:12]}@example.com', 'password': 'secret1',
+        'firstName': 'Test', 'lastName': 'User'
+    })
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    return {'Authorization': f"Bearer {body['access_token']}"}, body['user']['id']
@@ -0,0 +1,66 @@
+from analytics_engine import rebuild_legacy_analytics, rebuild_user_analytics
+
+COUNTERS = ('totalTasks', 'tasksCompleted', 'productivityScore')
+
+
+def counters(client, headers):
+    analytics = client.get('/analytics', headers=headers).get_json()
+    return tuple(analytics.get(field, 0) for field in COUNTERS)
+
+
+def test_task_status_changes_and_deletes_move_the_counters(client, auth):
+    headers, user_id = auth
+    ids = [client.post('/tasks', json={'title': title, 'status': status}, headers=headers).get_json()['id']
+           for title, status in (('Plan', 'completed'), ('Write', 'pending'), ('Ship', 'pending'))]
+    assert counters(client, headers) == (3, 1, 33)
+
+    client.put(f'/tasks/{ids[1]}', json={'status': 'completed'}, headers=headers)
+    assert counters(client, headers) == (3, 2, 67)
+    # Saving a task without changing its status leaves the counters alone
+    client.put(f'/tasks/{ids[1]}', json={'title': 'Write more', 'status': 'completed'}, headers=headers)
+    assert counters(client, headers) == (3, 2, 67)
+    client.put(f'/tasks/{ids[0]}', json={'status': 'pending'}, headers=headers)
+    assert counters(client, headers) == (3, 1, 33)
+
+    client.delete(f'/tasks/{ids[1]}', headers=headers)
+    assert counters(client, headers) == (2, 0, 0)
+    client.delete(f'/tasks/{ids[1]}', headers=headers)
+    assert counters(client, headers) == (2, 0, 0)
+
+    response = client.post('/tasks/bulk', json=[
+        {'op': 'update', 'id': ids[2], 'document': {'status': 'completed'}},
+        {'op': 'delete', 'id': ids[0]},
+    ], headers=headers)
+    assert response.get_json()['failed'] == 0
+    assert counters(client, headers) == (1, 1, 100)
+
+    incremental = client.get('/analytics', headers=headers).get_json()
+    rebuilt = rebuild_user_analytics(user_id)
+    assert (incremental['totalTasks'], incremental['tasksCompleted']) == (rebuilt['totalTasks'],
+                                                                          rebuilt['tasksCompleted'])
+
+
+def test_legacy_documents_are_rebuilt_before_deltas_apply(client, auth, db):
+    headers, user_id = auth
+    db.tasks.insert_many([{'userId': user_id, 'title': 'Old', 'status': 'completed'},
+                          {'userId': user_id, 'title': 'Older', 'status': 'pending'}])
+    # Posted by a client before the engine owned these counters
+    db.analytics.insert_one({'userId': user_id, 'totalTasks': 40, 'tasksCompleted': 30, 'weeklyData': [1, 2]})
+
+    assert rebuild_legacy_analytics(batch_size=1) == 1
+    assert rebuild_legacy_analytics(batch_size=1) == 0
+    assert counters(client, headers) == (2, 1, 50)
+    assert client.get('/analytics', headers=headers).get_json()['weeklyData'] == [1, 2]
+
+    client.post('/tasks', json={'title': 'New', 'status': 'completed'}, headers=headers)
+    assert counters(client, headers) == (3, 2, 67)
+
+
+def test_users_without_analytics_are_rebuilt_too(client, auth, db):
+    headers, user_id = auth
+    db.tasks.insert_one({'userId': user_id, 'title': 'Old', 'status': 'pending'})
+    assert rebuild_legacy_analytics() == 1
+    client.post('/tasks', json={'title': 'New', 'status': 'pending'}, headers=headers)
+    assert counters(client, headers) == (2, 0, 0)
+    # Documents the engine created are left alone
+    assert rebuild_legacy_analytics() == 0
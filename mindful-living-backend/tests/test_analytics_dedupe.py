@@ -0,0 +1,30 @@
+from indexes import ensure_indexes
+
+
+def test_duplicates_are_merged_before_the_unique_index(app, client, auth, db):
+    headers, user_id = auth
+    for title, status in (('Plan', 'completed'), ('Write', 'pending'), ('Ship', 'pending')):
+        client.post('/tasks', json={'title': title, 'status': status}, headers=headers)
+
+    # A deployment from before the unique index, where racing upserts split the counters
+    db.analytics.drop_index('userId_unique')
+    db.analytics.delete_many({})
+    db.analytics.insert_many([
+        {'userId': user_id, 'totalTasks': 2, 'tasksCompleted': 1, 'weeklyData': [1, 2]},
+        {'userId': user_id, 'totalTasks': 1, 'insights': ['Busy week'], 'weeklyData': [9]},
+        {'userId': 'other-user', 'totalTasks': 0},
+    ])
+
+    import app as backend
+    assert backend.dedupe_for_unique_indexes(db) == 1
+    ensure_indexes(db)
+
+    indexes = db.analytics.index_information()
+    assert indexes['userId_unique']['unique']
+    analytics = list(db.analytics.find({'userId': user_id}))
+    assert len(analytics) == 1
+    assert analytics[0]['totalTasks'] == 3 and analytics[0]['tasksCompleted'] == 1
+    # Client fields: the oldest document's win, the others fill the gaps
+    assert analytics[0]['weeklyData'] == [1, 2] and analytics[0]['insights'] == ['Busy week']
+    # Nothing left to do once the index exists
+    assert backend.dedupe_for_unique_indexes(db) == 0
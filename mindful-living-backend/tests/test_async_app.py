@@ -0,0 +1,176 @@
+"""async_app.py serves app.py's routes minus SYNC_ONLY_ROUTES, with the same shapes and tokens."""
+import asyncio
+import uuid
+
+from revocation import RevocationList
+
+
+def methods(url_map):
+    return {(rule.rule, method) for rule in url_map.iter_rules()
+            for method in rule.methods - {'HEAD', 'OPTIONS'} if rule.endpoint != 'static'}
+
+
+def test_route_tables_differ_by_the_sync_only_routes(app, async_app):
+    import async_app as backend
+    assert methods(async_app.url_map) <= methods(app.url_map)
+    assert methods(app.url_map) - methods(async_app.url_map) == backend.SYNC_ONLY_ROUTES
+
+
+def shape(value):
+    """`value` with its strings (ids, dates, tokens) replaced by 'str'"""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [shape(item) for item in value]
+    return 'str' if isinstance(value, str) else value
+
+
+async def exercise(call):
+    """Send a request to every route async_app serves: [(rule, method, status, shape of the body)]"""
+    answers = []
+    headers = {}
+
+    async def step(method, rule, path=None, body=None):
+        status, answer = await call(method, path or rule, body, headers)
+        answers.append((rule, method, status, shape(answer)))
+        return answer
+
+    email = f'{uuid.uuid4().hex[:12]}@example.com'
+    await step('GET', '/')
+    signed_up = await step('POST', '/auth/signup', body={
+        'email': email, 'password': 'secret1', 'firstName': 'Par', 'lastName': 'Ity'})
+    headers['Authorization'] = f"Bearer {signed_up['access_token']}"
+    await step('POST', '/auth/login', body={'email': email, 'password': 'wrong-password'})
+    await step('GET', '/auth/me', path='/auth/me?fields=firstName,password')
+    await step('GET', '/auth/me', path='/auth/me?fields=bad field')
+    await step('PUT', '/auth/profile', body={'firstName': 'Par'})
+    await step('PUT', '/auth/profile', body={'firstName': 'Par', 'lastName': 'Ity', 'email': email})
+    await step('PUT', '/auth/change-password', body={'currentPassword': 'secret1', 'newPassword': 'secret2'})
+    logged_in = await step('POST', '/auth/login', body={'email': email, 'password': 'secret2'})
+    headers['Authorization'] = f"Bearer {logged_in['access_token']}"
+
+    block = await step('POST', '/life_blocks', body={
+        'name': 'Reading', 'contentTypes': [{'name': 'Book', 'fields': [{'name': 'Title'}]}],
+        'contents': [{'data': {'n': 0}}]})
+    await step('POST', '/life_blocks', body={'name': 'Twins', 'contents': [{'id': 'x'}, {'id': 'x'}]})
+    block_path = f"/life_blocks/{block['id']}"
+    await step('GET', '/life_blocks', path='/life_blocks?fields=name,contentTypes.name')
+    await step('PUT', '/life_blocks/<id>', path=block_path, body={'name': 'Books', 'contents': block['contents']})
+    with_content = await step('POST', '/life_blocks/<id>/contents', path=f'{block_path}/contents',
+                              body={'data': {'n': 1}})
+    content_path = f"{block_path}/contents/{with_content['contents'][-1]['id']}"
+    await step('PUT', '/life_blocks/<id>/contents/<content_id>', path=content_path, body={'data': {'n': 2}})
+    await step('PUT', '/life_blocks/<id>/contents/<content_id>', path=f'{block_path}/contents/missing',
+               body={'data': {}})
+    await step('DELETE', '/life_blocks/<id>/contents/<content_id>', path=content_path)
+    await step('DELETE', '/life_blocks/<id>', path=block_path)
+    await step('DELETE', '/life_blocks/<id>', path=block_path)
+
+    task = await step('POST', '/tasks', body={'title': 'Write', 'status': 'pending', 'dueDate': '2026-10-20T09:00:00Z'})
+    await step('GET', '/tasks', path='/tasks?limit=1')
+    await step('GET', '/tasks', path='/tasks?from=2026-10-19&to=2026-10-21')
+    await step('PUT', '/tasks/<id>', path=f"/tasks/{task['id']}", body={'status': 'completed'})
+    await step('DELETE', '/tasks/<id>', path=f"/tasks/{task['id']}")
+    await step('PUT', '/tasks/<id>', path='/tasks/not-an-id', body={'status': 'completed'})
+
+    await step('POST', '/finances', body={'budgets': [{'category': 'Food', 'budgeted': 100}]})
+    await step('GET', '/finances')
+    await step('POST', '/transactions', body={'description': 'Bread', 'amount': -2, 'category': 'Food',
+                                              'date': '2026-10-18'})
+    await step('GET', '/transactions', path='/transactions?stream=true')
+
+    await step('POST', '/schedules', body={'title': 'Standup', 'startTime': '2026-10-19T09:00:00Z',
+                                           'endTime': '2026-10-19T09:15:00Z', 'rrule': 'FREQ=DAILY;COUNT=3'})
+    await step('POST', '/schedules', body={'title': 'Bad', 'startTime': '2026-10-19T09:00:00Z', 'rrule': 'FREQ=HOURLY'})
+    await step('GET', '/schedules')
+    await step('GET', '/schedules', path='/schedules?from=2026-10-19&to=2026-10-22')
+
+    await step('POST', '/analytics', body={'weeklyData': [1, 2], 'tasksCompleted': 99})
+    await step('GET', '/analytics')
+
+    goal = await step('POST', '/goals', body={'title': 'Run', 'targetValue': 10, 'currentValue': 1})
+    await step('GET', '/goals')
+    await step('PUT', '/goals/<id>', path=f"/goals/{goal['id']}", body={'status': 'completed'})
+    await step('DELETE', '/goals/<id>', path=f"/goals/{goal['id']}")
+
+    await step('GET', '/dashboard')
+    await step('POST', '/auth/logout')
+    await step('GET', '/auth/me')
+    return answers
+
+
+def test_every_async_route_answers_like_the_sync_app(client, async_app):
+    async def sync_call(method, path, body, headers):
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json() if response.is_json else response.get_data(as_text=True)
+
+    quart = async_app.test_client()
+
+    async def async_call(method, path, body, headers):
+        response = await quart.open(path, method=method, json=body, headers=headers)
+        if response.mimetype == 'application/json':
+            return response.status_code, await response.get_json()
+        return response.status_code, await response.get_data(as_text=True)
+
+    expected = asyncio.run(exercise(sync_call))
+    answered = asyncio.run(exercise(async_call))
+    assert {(rule, method) for rule, method, _, _ in answered} == methods(async_app.url_map)
+    assert len(answered) == len(expected)
+    for sync_answer, async_answer in zip(expected, answered):
+        assert async_answer == sync_answer
+
+
+def test_auth_and_tasks(async_app):
+    async def scenario():
+        client = async_app.test_client()
+        response = await client.post('/auth/signup', json={
+            'email': 'async@example.com', 'password': 'secret1', 'firstName': 'A', 'lastName': 'Sync'})
+        assert response.status_code == 201
+        headers = {'Authorization': f"Bearer {(await response.get_json())['access_token']}"}
+
+        response = await client.post('/auth/login', json={'email': 'async@example.com', 'password': 'secret1'})
+        assert response.status_code == 200
+        me = await (await client.get('/auth/me', headers=headers)).get_json()
+        assert me['user']['email'] == 'async@example.com'
+        assert (await client.get('/auth/me')).status_code == 401
+
+        ids = []
+        for n in range(3):
+            response = await client.post('/tasks', json={'title': f'Task {n}', 'dueDate': '2026-10-20T09:00:00Z'},
+                                         headers=headers)
+            assert response.status_code == 201
+            ids.append((await response.get_json())['id'])
+        assert [task['id'] for task in await (await client.get('/tasks', headers=headers)).get_json()] == ids
+
+        first = await (await client.get('/tasks?limit=2', headers=headers)).get_json()
+        rest = await (await client.get(f"/tasks?limit=2&cursor={first['next']}", headers=headers)).get_json()
+        assert [task['id'] for task in first['items'] + rest['items']] == ids
+        assert rest['next'] is None
+
+        streamed = await client.get('/tasks?stream=true', headers=headers)
+        assert len(await streamed.get_json()) == 3
+
+        response = await client.put(f'/tasks/{ids[0]}', json={'status': 'completed'}, headers=headers)
+        assert (await response.get_json())['status'] == 'completed'
+        response = await client.delete(f'/tasks/{ids[0]}', headers=headers)
+        assert (await response.get_json())['deleted'] is True
+        assert len(await (await client.get('/tasks', headers=headers)).get_json()) == 2
+
+    asyncio.run(scenario())
+
+
+def test_tokens_are_interchangeable_with_the_sync_app(client, auth, async_app, monkeypatch):
+    import app as sync_backend
+    headers, user_id = auth
+
+    async def scenario():
+        quart = async_app.test_client()
+        me = await (await quart.get('/auth/me', headers=headers)).get_json()
+        assert me['user']['id'] == user_id
+        assert (await quart.post('/auth/logout', headers=headers)).status_code == 200
+
+    asyncio.run(scenario())
+    # Another process learns of the logout from revoked_tokens with its next refresh
+    monkeypatch.setattr(sync_backend, 'revocation_list', RevocationList(
+        capacity=1000, error_rate=0.001, refresh_seconds=0, rebuild_seconds=3600))
+    assert client.get('/auth/me', headers=headers).status_code == 401
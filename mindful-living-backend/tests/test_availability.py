@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from availability import find_conflicts, free_slots, outside_hours
+
+DAY = datetime(2026, 10, 19)
+
+
+def at(hour, minute=0, day=0):
+    return DAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def block(name, start, end):
+    return start, end, {'title': name}
+
+
+def titles(conflict):
+    return [item['title'] for item in conflict['items']]
+
+
+def test_touching_blocks_neither_conflict_nor_leave_a_gap():
+    blocks = [block('a', at(9), at(10)), block('b', at(10), at(11))]
+    assert find_conflicts(blocks) == []
+    assert free_slots(blocks, at(9), at(11), timedelta(minutes=1)) == []
+
+
+def test_overlaps_merge_into_maximal_spans():
+    blocks = [block('a', at(9), at(11)), block('b', at(10), at(12)), block('c', at(10, 30), at(10, 45)),
+              block('d', at(12), at(13)), block('e', at(12, 30), at(13))]
+    conflicts = find_conflicts(blocks)
+    assert [(c['start'], c['end'], c['maxOverlap']) for c in conflicts] == [
+        (at(10), at(11), 3), (at(12, 30), at(13), 2)]
+    assert titles(conflicts[0]) == ['a', 'b', 'c'] and titles(conflicts[1]) == ['d', 'e']
+
+
+def test_zero_length_blocks_occupy_no_time():
+    blocks = [block('a', at(9), at(10)), block('reminder', at(9, 30), at(9, 30))]
+    assert find_conflicts(blocks) == []
+    assert free_slots(blocks, at(8), at(10), timedelta(minutes=60)) == [(at(8), at(9))]
+
+
+def test_all_day_blocks():
+    all_day = block('holiday', at(0), at(0, day=1))
+    meeting = block('meeting', at(14), at(15))
+    conflict, = find_conflicts([all_day, meeting])
+    assert (conflict['start'], conflict['end']) == (at(14), at(15)) and titles(conflict) == ['holiday', 'meeting']
+    # Nothing is free that day; the next day is free from midnight
+    assert free_slots([all_day, meeting], at(0), at(0, day=2), timedelta(minutes=30)) == [(at(0, day=1), at(0, day=2))]
+    # Back-to-back all-day blocks only touch
+    assert find_conflicts([all_day, block('trip', at(0, day=1), at(0, day=2))]) == []
+
+
+def test_free_slots_respect_the_window_and_duration():
+    blocks = [block('before', at(7), at(9)), block('a', at(10), at(10, 30)), block('after', at(17), at(20))]
+    assert free_slots(blocks, at(8), at(18), timedelta(minutes=60)) == [(at(9), at(10)), (at(10, 30), at(17))]
+    assert free_slots(blocks, at(8), at(18), timedelta(minutes=61)) == [(at(10, 30), at(17))]
+    assert free_slots([], at(8), at(9), timedelta(minutes=60)) == [(at(8), at(9))]
+
+
+def test_working_hours_close_off_the_rest_of_each_day():
+    hours = outside_hours(at(0), at(0, day=2), at(9).time(), at(17).time())
+    assert free_slots(hours, at(0), at(0, day=2), timedelta(minutes=60)) == [
+        (at(9), at(17)), (at(9, day=1), at(17, day=1))]
+
+
+def test_routes_count_recurring_events_and_an_event_from_the_day_before(client, auth):
+    headers, _ = auth
+    for event in ({'title': 'Standup', 'startTime': '2026-10-19T09:00:00Z', 'endTime': '2026-10-19T09:30:00Z',
+                   'rrule': 'FREQ=DAILY'},
+                  {'title': 'Overnight', 'startTime': '2026-10-19T22:00:00Z', 'endTime': '2026-10-20T09:15:00Z'}):
+        assert client.post('/schedules', json=event, headers=headers).status_code == 201
+    window = 'from=2026-10-20&to=2026-10-21'
+    conflicts = client.get(f'/schedules/conflicts?{window}', headers=headers).get_json()['conflicts']
+    assert [(c['start'], c['end']) for c in conflicts] == [('2026-10-20T09:00:00Z', '2026-10-20T09:15:00Z')]
+    slots = client.get(f'/schedules/free-slots?{window}&duration=600', headers=headers).get_json()['slots']
+    assert [(s['start'], s['end']) for s in slots] == [('2026-10-20T09:30:00Z', '2026-10-21T00:00:00Z')]
+
+
+def test_bad_availability_arguments(client, auth):
+    headers, _ = auth
+    window = 'from=2026-10-20&to=2026-10-21'
+    for query in ('from=2026-10-20', f'{window}&duration=0', f'{window}&dayStart=9am',
+                  f'{window}&dayStart=17:00&dayEnd=09:00'):
+        assert client.get(f'/schedules/free-slots?{query}', headers=headers).status_code == 400
+
+
+def post_events(client, headers, *events):
+    for event in events:
+        assert client.post('/schedules', json=event, headers=headers).status_code == 201
+
+
+def test_events_that_began_days_before_the_window_still_count(client, auth):
+    headers, _ = auth
+    post_events(client, headers,
+                {'title': 'Conference', 'startTime': '2026-10-17T08:00:00Z', 'endTime': '2026-10-20T18:00:00Z'},
+                {'title': 'Call', 'startTime': '2026-10-20T10:00:00Z', 'endTime': '2026-10-20T11:00:00Z'})
+    window = 'from=2026-10-20&to=2026-10-21'
+    conflicts = client.get(f'/schedules/conflicts?{window}', headers=headers).get_json()['conflicts']
+    assert [(c['start'], c['end']) for c in conflicts] == [('2026-10-20T10:00:00Z', '2026-10-20T11:00:00Z')]
+    slots = client.get(f'/schedules/free-slots?{window}', headers=headers).get_json()['slots']
+    assert [(s['start'], s['end']) for s in slots] == [('2026-10-20T18:00:00Z', '2026-10-21T00:00:00Z')]
+
+
+def test_long_occurrences_of_series_reach_into_the_window(client, auth):
+    headers, _ = auth
+    post_events(client, headers,
+                # Its last occurrence starts two days before the window and lasts three
+                {'title': 'Retreat', 'startTime': '2026-10-04T08:00:00Z', 'endTime': '2026-10-07T08:00:00Z',
+                 'rrule': 'FREQ=WEEKLY;COUNT=3'},
+                {'title': 'Standup', 'startTime': '2026-10-01T09:00:00Z', 'endTime': '2026-10-01T09:15:00Z',
+                 'rrule': 'FREQ=DAILY'})
+    standup = client.get('/schedules?from=2026-10-01&to=2026-10-02', headers=headers).get_json()[0]
+    # One standup, the day before the window, runs on for two days
+    response = client.post(f"/schedules/{standup['seriesId']}/exceptions", headers=headers, json={
+        'occurrence': '2026-10-19T09:00:00Z', 'endTime': '2026-10-21T12:00:00Z'})
+    assert response.status_code == 200
+
+    conflicts = client.get('/schedules/conflicts?from=2026-10-20&to=2026-10-23', headers=headers).get_json()
+    assert [(c['start'], c['end'], c['maxOverlap'], sorted(titles(c))) for c in conflicts['conflicts']] == [
+        ('2026-10-20T00:00:00Z', '2026-10-21T08:00:00Z', 3, ['Retreat', 'Standup', 'Standup']),
+        ('2026-10-21T09:00:00Z', '2026-10-21T09:15:00Z', 2, ['Standup', 'Standup']),
+    ]
+
+
+def test_conflicts_are_clipped_to_the_window(client, auth):
+    headers, _ = auth
+    post_events(client, headers,
+                {'title': 'Trip', 'startTime': '2026-10-18T00:00:00Z', 'endTime': '2026-10-25T00:00:00Z'},
+                {'title': 'Visit', 'startTime': '2026-10-19T00:00:00Z', 'endTime': '2026-10-24T00:00:00Z'})
+    body = client.get('/schedules/conflicts?from=2026-10-20&to=2026-10-22', headers=headers).get_json()
+    [conflict] = body['conflicts']
+    assert (conflict['start'], conflict['end']) == (body['from'], body['to']) == (
+        '2026-10-20T00:00:00Z', '2026-10-22T00:00:00Z')
+    assert sorted(titles(conflict)) == ['Trip', 'Visit']
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson.objectid import ObjectId
+
+OTHER_USER = '0123456789abcdef01234567'
+
+
+def bulk(client, headers, kind, operations):
+    response = client.post(f'/{kind}/bulk', json=operations, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_results_follow_the_operations_across_batches(app, client, auth, db):
+    headers, user_id = auth
+    app.config['BULK_BATCH_SIZE'] = 2
+    first, second = (db.tasks.insert_one({'userId': user_id, 'title': title, 'status': 'pending'}).inserted_id
+                     for title in ('First', 'Second'))
+    foreign = db.tasks.insert_one({'userId': OTHER_USER, 'title': 'Theirs'}).inserted_id
+
+    body = bulk(client, headers, 'tasks', {'operations': [
+        {'op': 'insert', 'document': {'title': 'New'}},
+        {'op': 'update', 'id': str(first), 'document': {'status': 'completed'}},
+        {'op': 'update', 'id': str(first), 'document': {'title': 'Again'}},
+        {'op': 'delete', 'id': str(second)},
+        {'op': 'delete', 'id': str(foreign)},
+        {'op': 'delete', 'id': 'not-an-id'},
+        {'op': 'upsert', 'document': {}},
+        {'op': 'insert', 'document': 'New'},
+    ]})
+    assert [result['status'] for result in body['results']] == [
+        'inserted', 'updated', 'updated', 'deleted', 'error', 'error', 'error', 'error']
+    assert [result['index'] for result in body['results']] == list(range(8))
+    assert (body['inserted'], body['updated'], body['deleted'], body['failed']) == (1, 2, 1, 4)
+
+    inserted = db.tasks.find_one({'_id': ObjectId(body['results'][0]['id'])})
+    assert inserted['userId'] == user_id and inserted['createdAt'] == inserted['updatedAt']
+    assert db.tasks.find_one({'_id': first}, {'_id': 0, 'title': 1, 'status': 1}) == {
+        'title': 'Again', 'status': 'completed'}
+    assert db.tasks.find_one({'_id': second}) is None
+    assert db.tasks.find_one({'_id': foreign})['title'] == 'Theirs'
+
+
+def test_one_document_is_written_once_per_batch(client, auth, db):
+    headers, user_id = auth
+    task_id = str(db.tasks.insert_one({'userId': user_id, 'title': 'Once'}).inserted_id)
+    body = bulk(client, headers, 'tasks', [{'op': 'update', 'id': task_id, 'document': {'title': 'A'}},
+                                           {'op': 'delete', 'id': task_id}])
+    assert body['results'][1] == {'index': 1, 'status': 'error', 'error': 'Document targeted twice in one batch'}
+    assert db.tasks.find_one()['title'] == 'A'
+
+
+def test_bulk_updates_keep_the_protected_fields(client, auth, db):
+    headers, user_id = auth
+    created = datetime(2026, 1, 1)
+    goal_id = db.goals.insert_one({'userId': user_id, 'title': 'Run', 'createdAt': created}).inserted_id
+    body = bulk(client, headers, 'goals', [{'op': 'update', 'id': str(goal_id), 'document': {
+        '_id': str(ObjectId()), 'id': 'x', 'userId': OTHER_USER, 'createdAt': '2020-01-01', 'title': 'Walk'}}])
+    assert body['updated'] == 1
+    goal = db.goals.find_one({'_id': goal_id})
+    assert (goal['userId'], goal['createdAt'], goal['title'], 'id' in goal) == (user_id, created, 'Walk', False)
+
+
+@pytest.mark.parametrize('operations, status', [({'ops': []}, 400), ([{'op': 'delete', 'id': 'x'}] * 4, 413)])
+def test_rejected_requests(app, client, auth, operations, status):
+    headers, _ = auth
+    app.config['BULK_MAX_OPERATIONS'] = 3
+    assert client.post('/tasks/bulk', json=operations, headers=headers).status_code == status
+
+
+OVERWRITES = {'id': 'x', 'userId': OTHER_USER, 'createdAt': '2020-01-01'}
+
+
+@pytest.mark.parametrize('kind, document', [
+    ('tasks', {'title': 'Write'}),
+    ('goals', {'title': 'Run'}),
+    ('life_blocks', {'name': 'Reading'}),
+])
+def test_puts_keep_the_protected_fields(client, auth, db, kind, document):
+    headers, user_id = auth
+    created = client.post(f'/{kind}', json=document, headers=headers).get_json()
+    stored = db[kind].find_one()
+    response = client.put(f"/{kind}/{created['id']}", json={**OVERWRITES, '_id': str(ObjectId()), 'title': 'New'},
+                          headers=headers)
+    assert response.status_code == 200
+    updated = db[kind].find_one()
+    assert (updated['_id'], updated['userId'], updated['createdAt']) == (stored['_id'], user_id, stored['createdAt'])
+    assert 'id' not in updated and updated['title'] == 'New'
+
+
+def test_async_puts_keep_the_protected_fields(auth, async_app, db):
+    headers, user_id = auth
+
+    async def scenario():
+        client = async_app.test_client()
+        task = await (await client.post('/tasks', json={'title': 'Write'}, headers=headers)).get_json()
+        response = await client.put(f"/tasks/{task['id']}", json={**OVERWRITES, 'status': 'completed'},
+                                    headers=headers)
+        assert response.status_code == 200
+
+    asyncio.run(scenario())
+    task = db.tasks.find_one()
+    assert (task['userId'], task['status'], 'id' in task) == (user_id, 'completed', False)
+    assert isinstance(task['createdAt'], datetime)
@@ -0,0 +1,12 @@
+def test_cache_stats_are_off_by_default(client, auth):
+    headers, _ = auth
+    assert client.get('/cache/stats', headers=headers).status_code == 404
+
+
+def test_cache_stats_when_enabled(app, client, auth):
+    headers, _ = auth
+    app.config['CACHE_STATS'] = True
+    client.get('/tasks', headers=headers)
+    client.get('/tasks', headers=headers)
+    stats = client.get('/cache/stats', headers=headers).get_json()
+    assert stats['backend'] == 'memory' and stats['hits'] >= 1
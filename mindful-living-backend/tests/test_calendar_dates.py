@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture
+def tasks(client, auth):
+    headers, _ = auth
+    for day in (18, 19, 20, 21):
+        client.post('/tasks', json={'title': f'Due {day}', 'dueDate': f'2026-10-{day}T12:00:00Z'}, headers=headers)
+    client.post('/tasks', json={'title': 'Someday'}, headers=headers)
+    return headers
+
+
+def titles(body):
+    return [task['title'] for task in (body['items'] if isinstance(body, dict) else body)]
+
+
+def test_task_windows(client, tasks):
+    assert titles(client.get('/tasks?from=2026-10-19&to=2026-10-21', headers=tasks).get_json()) == ['Due 19', 'Due 20']
+    assert titles(client.get('/tasks?from=2026-10-20', headers=tasks).get_json()) == ['Due 20', 'Due 21']
+    # An offset is converted to UTC: 14:00+02:00 is 12:00Z, and `to` is exclusive
+    assert titles(client.get('/tasks', query_string={'to': '2026-10-19T14:00:00+02:00'},
+                             headers=tasks).get_json()) == ['Due 18']
+    page = client.get('/tasks?from=2026-10-19&limit=2', headers=tasks).get_json()
+    rest = client.get(f"/tasks?from=2026-10-19&limit=2&cursor={page['next']}", headers=tasks).get_json()
+    assert titles(page) + titles(rest) == ['Due 19', 'Due 20', 'Due 21'] and rest['next'] is None
+
+
+@pytest.mark.parametrize('query, error', [
+    ('from=next-week', 'from must be an ISO 8601 date or datetime'),
+    ('to=2026-13-01', 'to must be an ISO 8601 date or datetime'),
+    ('from=2026-10-21&to=2026-10-21', 'to must be after from'),
+    ('from=2026-10-21&to=2026-10-19', 'to must be after from'),
+])
+def test_bad_task_windows(client, tasks, query, error):
+    response = client.get(f'/tasks?{query}', headers=tasks)
+    assert response.status_code == 400 and response.get_json()['error'] == error
@@ -0,0 +1,33 @@
+import gzip
+
+import brotli
+import pytest
+import zstandard
+
+DECODERS = {
+    'gzip': gzip.decompress,
+    'br': brotli.decompress,
+    'zstd': lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body),
+}
+
+
+def add_tasks(client, headers):
+    for n in range(20):
+        client.post('/tasks', json={'title': f'Task {n}', 'description': 'Compressible ' * 8}, headers=headers)
+
+
+@pytest.mark.parametrize('coding', DECODERS)
+def test_each_coding_round_trips(client, auth, coding):
+    headers, _ = auth
+    add_tasks(client, headers)
+    plain = client.get('/tasks', headers=headers)
+    response = client.get('/tasks', headers={**headers, 'Accept-Encoding': coding})
+    assert response.headers['Content-Encoding'] == coding
+    assert DECODERS[coding](response.data) == plain.data
+
+
+def test_the_preferred_coding_wins(client, auth):
+    headers, _ = auth
+    add_tasks(client, headers)
+    response = client.get('/tasks', headers={**headers, 'Accept-Encoding': 'gzip, br, zstd'})
+    assert response.headers['Content-Encoding'] == 'zstd'
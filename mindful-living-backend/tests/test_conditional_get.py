@@ -0,0 +1,84 @@
+"""ETags come from the per-user revision counters; a matching If-None-Match is a 304 without the query."""
+import pytest
+
+
+def revisions(db, user_id):
+    return {kind: count for kind, count in (db.revisions.find_one({'_id': user_id}) or {}).items() if kind != '_id'}
+
+
+def test_unchanged_lists_are_answered_with_304(client, auth, commands):
+    headers, _ = auth
+    client.post('/tasks', json={'title': 'Write'}, headers=headers)
+    first = client.get('/tasks', headers=headers)
+    assert first.status_code == 200
+    assert first.headers['ETag'].startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    commands.clear()
+    again = client.get('/tasks', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.get_data() == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert commands.on('tasks') == [] and commands.on('revisions') == ['find']
+
+
+def test_a_write_changes_the_etag(client, auth):
+    headers, _ = auth
+    etag = client.get('/tasks', headers=headers).headers['ETag']
+    client.post('/tasks', json={'title': 'Write'}, headers=headers)
+    response = client.get('/tasks', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200 and len(response.get_json()) == 1
+    assert response.headers['ETag'] != etag
+
+
+def test_etags_differ_by_query_and_user(client, auth):
+    headers, _ = auth
+    other = client.post('/auth/signup', json={'email': 'other@example.com', 'password': 'secret1',
+                                              'firstName': 'O', 'lastName': 'Ther'}).get_json()
+    etags = {
+        client.get('/tasks', headers=headers).headers['ETag'],
+        client.get('/tasks?limit=5', headers=headers).headers['ETag'],
+        client.get('/tasks', headers={'Authorization': f"Bearer {other['access_token']}"}).headers['ETag'],
+    }
+    assert len(etags) == 3
+
+
+def test_writes_to_other_collections_keep_the_etag(client, auth):
+    headers, _ = auth
+    goals = client.get('/goals', headers=headers).headers['ETag']
+    analytics = client.get('/analytics', headers=headers).headers['ETag']
+    client.post('/tasks', json={'title': 'Write'}, headers=headers)
+    assert client.get('/goals', headers={**headers, 'If-None-Match': goals}).status_code == 304
+    # Analytics are computed from the tasks, among others
+    assert client.get('/analytics', headers={**headers, 'If-None-Match': analytics}).status_code == 200
+
+
+@pytest.mark.parametrize('path, body, kinds', [
+    ('/tasks', {'title': 'Write'}, {'tasks'}),
+    ('/goals', {'title': 'Run'}, {'goals'}),
+    ('/transactions', {'description': 'Bread', 'amount': -2, 'date': '2026-10-18'}, {'transactions'}),
+    ('/schedules', {'title': 'Standup', 'startTime': '2026-10-19T09:00:00Z'}, {'schedules'}),
+    ('/finances', {'income': 100}, {'finances'}),
+    ('/life_blocks', {'name': 'Reading'}, {'life_blocks'}),
+    ('/analytics', {'weeklyData': [1]}, {'analytics'}),
+])
+def test_each_write_bumps_the_revisions_it_touches(client, auth, db, path, body, kinds):
+    headers, user_id = auth
+    before = revisions(db, user_id)
+    assert client.post(path, json=body, headers=headers).status_code in (200, 201)
+    after = revisions(db, user_id)
+    assert {kind for kind in after if after[kind] != before.get(kind, 0)} == kinds
+    assert all(after[kind] == before.get(kind, 0) + 1 for kind in kinds)
+
+
+def test_updates_and_deletes_bump_once_and_failures_not_at_all(client, auth, db):
+    headers, user_id = auth
+    task = client.post('/tasks', json={'title': 'Write'}, headers=headers).get_json()
+    assert revisions(db, user_id)['tasks'] == 1
+    client.put(f"/tasks/{task['id']}", json={'status': 'completed'}, headers=headers)
+    client.delete(f"/tasks/{task['id']}", headers=headers)
+    assert revisions(db, user_id)['tasks'] == 3
+
+    assert client.put(f"/tasks/{task['id']}", json={'title': 'Gone'}, headers=headers).status_code == 404
+    assert client.post('/schedules', json={'title': 'Bad', 'startTime': '2026-10-19T09:00:00Z',
+                                           'rrule': 'FREQ=HOURLY'}, headers=headers).status_code == 400
+    assert revisions(db, user_id) == {'tasks': 3}
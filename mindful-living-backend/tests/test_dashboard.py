@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from api_common import DASHBOARD_SECTIONS, UPCOMING_DAYS
+
+SECTIONS = {*DASHBOARD_SECTIONS, 'schedules', 'analytics'}
+
+OTHER_USER = '0123456789abcdef01234567'
+
+
+def test_each_section_holds_the_latest_trimmed_documents(client, auth, db):
+    headers, user_id = auth
+    for n in range(DASHBOARD_SECTIONS['transactions'][1] + 2):
+        client.post('/transactions', json={'description': f'Item {n}', 'amount': -n, 'category': 'Food',
+                                           'date': '2026-10-18', 'notes': 'long text'}, headers=headers)
+    client.post('/tasks', json={'title': 'Write', 'status': 'completed', 'notes': 'long text'}, headers=headers)
+    client.post('/goals', json={'title': 'Run', 'targetValue': 10}, headers=headers)
+    client.post('/life_blocks', json={'name': 'Reading', 'contents': [{'data': {}}]}, headers=headers)
+    client.post('/finances', json={'income': 100}, headers=headers)
+    client.post('/finances', json={'income': 200}, headers=headers)
+    db.tasks.insert_one({'userId': OTHER_USER, 'title': 'Theirs'})
+
+    dashboard = client.get('/dashboard', headers=headers).get_json()
+    assert set(dashboard) == SECTIONS
+    assert [item['description'] for item in dashboard['transactions']] == [f'Item {n}' for n in range(11, 1, -1)]
+    assert [task['title'] for task in dashboard['tasks']] == ['Write']
+    assert 'notes' not in dashboard['tasks'][0] and 'notes' not in dashboard['transactions'][0]
+    assert 'contents' not in dashboard['life_blocks'][0]
+    assert [finance['income'] for finance in dashboard['finances']] == [200]
+    assert dashboard['analytics']['totalTasks'] == 1 and dashboard['analytics']['productivityScore'] == 100
+
+
+def test_a_new_user_gets_empty_sections(client, auth):
+    headers, _ = auth
+    dashboard = client.get('/dashboard', headers=headers).get_json()
+    assert dashboard == {**{name: [] for name in SECTIONS}, 'analytics': {}}
+
+
+def test_one_query_per_section(client, auth, commands):
+    headers, _ = auth
+    commands.clear()
+    client.get('/dashboard', headers=headers)
+    for name in DASHBOARD_SECTIONS:
+        assert commands.on(name) == ['find']
+    # Single events and series
+    assert commands.on('schedules') == ['find', 'find']
+    assert commands.on('analytics') == ['find']
+
+
+def iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def test_schedules_are_the_upcoming_occurrences(client, auth):
+    headers, _ = auth
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    events = [
+        {'title': 'Standup', 'startTime': iso(today - timedelta(days=30, hours=-9)),
+         'endTime': iso(today - timedelta(days=30, hours=-10)), 'rrule': 'FREQ=WEEKLY', 'notes': 'long text'},
+        {'title': 'Dentist', 'startTime': iso(today + timedelta(days=2, hours=14)), 'location': 'Main St'},
+        {'title': 'Last month', 'startTime': iso(today - timedelta(days=30))},
+        {'title': 'Next month', 'startTime': iso(today + timedelta(days=UPCOMING_DAYS, hours=1))},
+    ]
+    for event in events:
+        assert client.post('/schedules', json=event, headers=headers).status_code == 201
+
+    schedules = client.get('/dashboard', headers=headers).get_json()['schedules']
+    assert sorted(event['title'] for event in schedules) == ['Dentist', 'Standup']
+    assert [event['startTime'] for event in schedules] == sorted(event['startTime'] for event in schedules)
+    standup = next(event for event in schedules if event['title'] == 'Standup')
+    assert set(standup) == {'id', 'title', 'startTime', 'endTime', 'seriesId', 'occurrenceStart'}
+    dentist = next(event for event in schedules if event['title'] == 'Dentist')
+    assert dentist['location'] == 'Main St' and 'seriesId' not in dentist
+
+
+def test_any_write_it_shows_and_a_new_day_change_the_etag(client, auth, monkeypatch):
+    import app as backend
+    headers, _ = auth
+    etag = client.get('/dashboard', headers=headers).headers['ETag']
+    assert client.get('/dashboard', headers={**headers, 'If-None-Match': etag}).status_code == 304
+    client.post('/life_blocks', json={'name': 'Reading'}, headers=headers)
+    assert client.get('/dashboard', headers={**headers, 'If-None-Match': etag}).status_code == 200
+
+    etag = client.get('/dashboard', headers=headers).headers['ETag']
+
+    class Tomorrow(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() + timedelta(days=1)
+
+    monkeypatch.setattr(backend, 'datetime', Tomorrow)
+    assert client.get('/dashboard', headers={**headers, 'If-None-Match': etag}).status_code == 200
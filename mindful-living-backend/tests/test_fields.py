@@ -0,0 +1,60 @@
+"""?fields= trims documents in the database; ?view=summary is the life-block sidebar."""
+import pytest
+
+from api_common import parse_fields
+
+BLOCK = {'name': 'Reading', 'icon': 'book', 'description': 'Books',
+         'contentTypes': [{'name': 'Book', 'fields': [{'name': 'Title'}]}],
+         'contents': [{'data': {'title': 'Dune'}}, {'data': {'title': 'Emma'}}]}
+
+
+def test_parse_fields():
+    assert parse_fields('name, id,contentTypes.name,contentTypes') == {'_id': 1, 'contentTypes': 1, 'name': 1}
+    for value in ('bad field', 'a..b', '$where', 'name,1st'):
+        with pytest.raises(ValueError):
+            parse_fields(value)
+
+
+def test_lists_and_documents_return_the_requested_fields(client, auth):
+    headers, _ = auth
+    block = client.post('/life_blocks', json=BLOCK, headers=headers).get_json()
+    client.post('/tasks', json={'title': 'Write', 'status': 'pending', 'priority': 'high'}, headers=headers)
+
+    [task] = client.get('/tasks?fields=title,status', headers=headers).get_json()
+    assert set(task) == {'id', 'title', 'status'}
+    page = client.get('/tasks?fields=title&limit=1', headers=headers).get_json()
+    assert set(page['items'][0]) == {'id', 'title'}
+    one = client.get(f"/life_blocks/{block['id']}?fields=name,contentTypes.name", headers=headers).get_json()
+    assert one == {'id': block['id'], 'name': 'Reading', 'contentTypes': [{'name': 'Book'}]}
+
+
+def test_the_password_hash_is_never_a_field(client, auth):
+    headers, user_id = auth
+    me = client.get('/auth/me?fields=password,firstName', headers=headers).get_json()
+    assert me == {'user': {'id': user_id, 'firstName': 'Test'}}
+
+
+@pytest.mark.parametrize('query', ['fields=bad field', 'view=full', 'view=summary&fields=name'])
+def test_invalid_projections_are_bad_requests(client, auth, query):
+    headers, _ = auth
+    assert client.get(f'/life_blocks?{query}', headers=headers).status_code == 400
+
+
+def test_only_life_blocks_have_a_summary(client, auth):
+    headers, _ = auth
+    assert client.get('/tasks?view=summary', headers=headers).status_code == 400
+
+
+@pytest.mark.server
+@pytest.mark.parametrize('storage', ['embedded', 'collection'])
+def test_summaries_count_the_contents_without_returning_them(app, client, auth, storage):
+    headers, _ = auth
+    app.config['LIFE_BLOCK_CONTENT_STORAGE'] = storage
+    block = client.post('/life_blocks', json=BLOCK, headers=headers).get_json()
+    client.post('/life_blocks', json={'name': 'Empty'}, headers=headers)
+
+    summaries = client.get('/life_blocks?view=summary', headers=headers).get_json()
+    assert [(summary['name'], summary['contentCount']) for summary in summaries] == [('Reading', 2), ('Empty', 0)]
+    assert all('contents' not in summary and 'contentTypes' not in summary for summary in summaries)
+    one = client.get(f"/life_blocks/{block['id']}?view=summary", headers=headers).get_json()
+    assert (one['icon'], one['contentCount']) == ('book', 2)
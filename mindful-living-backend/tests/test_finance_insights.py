@@ -0,0 +1,104 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from finance_insights import TransactionColumns, compute_insights, parse_as_of
+from rollups import amount_of, category_key, day_key, period_bounds
+
+AS_OF = '2026-10-15'
+FINANCE = {'budgets': [{'category': 'Food', 'budget': 300}, {'category': 'Rent', 'budget': 1200}],
+           'savingsGoals': [{'name': 'Trip', 'goal': 2000, 'current': 500}]}
+
+
+def parse_day(day):
+    try:
+        return np.datetime64(day, 'D')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def scanned_columns(transactions):
+    """The columns straight from the transaction documents, one entry per transaction"""
+    transactions = list(transactions)
+    index = {}
+    codes = [index.setdefault(category_key(transaction), len(index)) for transaction in transactions]
+    days = np.array([parse_day(day_key(transaction)) for transaction in transactions], dtype='datetime64[D]')
+    amounts = np.array([amount_of(transaction) for transaction in transactions], dtype=np.float64)
+    valid = days[~np.isnat(days)]
+    return TransactionColumns(days, amounts, np.array(codes, dtype=np.int64), list(index), len(transactions),
+                              valid.min() if len(valid) else np.datetime64('NaT'))
+
+
+def add_transactions(client, headers, transactions):
+    for transaction in transactions:
+        assert client.post('/transactions', json=transaction, headers=headers).status_code == 201
+
+
+def insights(client, headers):
+    response = client.get(f'/finances/insights?asOf={AS_OF}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_empty_history(client, auth):
+    headers, _ = auth
+    body = insights(client, headers)
+    assert body['transactions'] == 0
+    assert body['burnRate'] == {'last30Days': 0.0, 'last90Days': 0.0}
+    assert body['trend']['months'] == [] and body['trend']['spendingChange'] is None
+    assert body['savings'] == {'monthlyRate': 0.0, 'goals': []}
+    assert body['overspend']['categories'] == []
+
+
+def test_one_transaction(client, auth):
+    headers, _ = auth
+    add_transactions(client, headers, [{'description': 'Lunch', 'amount': -30, 'category': 'Food',
+                                        'date': '2026-10-01'}])
+    client.post('/finances', json=FINANCE, headers=headers)
+    body = insights(client, headers)
+    assert body['transactions'] == 1
+    assert body['burnRate'] == {'last30Days': 1.0, 'last90Days': round(30 / 90, 2)}
+    assert [month['month'] for month in body['trend']['months']] == ['2026-10']
+    assert body['trend']['spendingChange'] is None and body['trend']['spendingSlope'] is None
+    food = body['overspend']['categories'][0]
+    assert food['spent'] == 30 and food['projected'] == round(30 * 31 / 15, 2)
+
+
+def test_rollups_give_the_same_insights_as_the_transactions(client, auth, db):
+    headers, user_id = auth
+    random.seed(22)
+    start = date(2024, 6, 1)
+    transactions = [
+        {'description': f'Item {n}', 'category': random.choice(['Food', 'Rent', 'Fun', None, '']),
+         'amount': 2500 if n % 25 == 0 else -round(random.uniform(1, 90), 2),
+         'date': (start + timedelta(days=random.randrange(900))).isoformat()}
+        for n in range(300)
+    ]
+    transactions.append({'description': 'Bad date', 'amount': -5, 'category': 'Food', 'date': '2026-02-31'})
+    add_transactions(client, headers, transactions)
+    client.post('/finances', json=FINANCE, headers=headers)
+
+    stored = db.transactions.find({'userId': user_id})
+    expected = compute_insights(scanned_columns(stored), FINANCE, parse_as_of(AS_OF))
+    assert insights(client, headers) == expected
+
+
+def test_summary_bounds():
+    assert period_bounds('month', '2024-03', '2024-05-20') == {'$gte': '2024-03', '$lte': '2024-05'}
+    assert period_bounds('day', '2024-03-01') == {'$gte': '2024-03-01'}
+
+
+@pytest.mark.parametrize('granularity, bound, accepted', [
+    ('month', '2024-3', 'YYYY-MM-DD or YYYY-MM'),
+    ('month', '2024-02-30', 'YYYY-MM-DD or YYYY-MM'),
+    ('day', '2024-03', 'YYYY-MM-DD'),
+    ('day', '2024-03-01\n', 'YYYY-MM-DD'),
+])
+def test_invalid_summary_bounds_name_the_granularity(client, auth, granularity, bound, accepted):
+    headers, _ = auth
+    response = client.get('/finances/summary', query_string={'granularity': granularity, 'from': bound},
+                          headers=headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': f'from must be a {accepted} date for {granularity} granularity'}
@@ -0,0 +1,71 @@
+"""Every protected request resolves its user through the identity cache and is refused for unusable accounts."""
+import asyncio
+
+from flask_jwt_extended import create_access_token
+
+import identity
+from api_common import ACCOUNT_UNAVAILABLE
+
+
+def refused(response):
+    return response.status_code == 401 and response.get_json() == {'msg': ACCOUNT_UNAVAILABLE}
+
+
+def test_deactivation_stops_the_token_everywhere(client, auth, db):
+    headers, _ = auth
+    email = db.users.find_one()['email']
+    response = client.post('/auth/deactivate', json={'password': 'wrong-password'}, headers=headers)
+    assert response.status_code == 400
+    assert client.get('/tasks', headers=headers).status_code == 200
+
+    assert client.post('/auth/deactivate', json={'password': 'secret1'}, headers=headers).status_code == 200
+    assert refused(client.get('/tasks', headers=headers))
+    assert refused(client.get('/auth/me', headers=headers))
+    assert refused(client.post('/goals', json={'title': 'Run'}, headers=headers))
+    assert db.goals.count_documents({}) == 0
+
+    response = client.post('/auth/login', json={'email': email, 'password': 'secret1'})
+    assert response.status_code == 401 and response.get_json() == {'error': 'Account is deactivated'}
+
+
+def test_the_identity_is_looked_up_once_per_ttl(client, auth, commands, monkeypatch):
+    headers, _ = auth
+    commands.clear()
+    for _ in range(3):
+        assert client.get('/tasks', headers=headers).status_code == 200
+    assert commands.on('users') == ['find']
+
+    now = identity.time.monotonic()
+    monkeypatch.setattr(identity.time, 'monotonic', lambda: now + 3600)
+    commands.clear()
+    client.get('/tasks', headers=headers)
+    assert commands.on('users') == ['find']
+
+
+def test_changes_made_elsewhere_apply_once_the_entry_expires(client, auth, db, monkeypatch):
+    headers, _ = auth
+    assert client.get('/tasks', headers=headers).status_code == 200
+    # Another process deletes the account; this one still has it cached
+    db.users.delete_one({})
+    assert client.get('/tasks', headers=headers).status_code == 200
+
+    now = identity.time.monotonic()
+    monkeypatch.setattr(identity.time, 'monotonic', lambda: now + 3600)
+    assert refused(client.get('/tasks', headers=headers))
+
+
+def test_a_token_for_no_user_is_refused(app, client):
+    with app.app_context():
+        token = create_access_token(identity='not-a-user-id')
+    assert refused(client.get('/tasks', headers={'Authorization': f'Bearer {token}'}))
+
+
+def test_the_async_app_refuses_deactivated_accounts(client, auth, async_app):
+    headers, _ = auth
+    client.post('/auth/deactivate', json={'password': 'secret1'}, headers=headers)
+
+    async def scenario():
+        response = await async_app.test_client().get('/tasks', headers=headers)
+        return response.status_code, await response.get_json()
+
+    assert asyncio.run(scenario()) == (401, {'msg': ACCOUNT_UNAVAILABLE})
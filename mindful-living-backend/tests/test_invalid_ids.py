@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+BAD_ID = 'not-an-object-id'
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('get', f'/tasks/{BAD_ID}', None),
+    ('put', f'/tasks/{BAD_ID}', {'title': 'x'}),
+    ('delete', f'/tasks/{BAD_ID}', None),
+    ('get', f'/goals/{BAD_ID}', None),
+    ('put', f'/goals/{BAD_ID}', {'title': 'x'}),
+    ('delete', f'/goals/{BAD_ID}', None),
+    ('get', f'/life_blocks/{BAD_ID}', None),
+    ('put', f'/life_blocks/{BAD_ID}', {'name': 'x'}),
+    ('delete', f'/life_blocks/{BAD_ID}', None),
+    ('get', f'/life_blocks/{BAD_ID}/contents', None),
+    ('post', f'/life_blocks/{BAD_ID}/contents', {'data': {}}),
+    ('put', f'/life_blocks/{BAD_ID}/contents/abc', {'data': {}}),
+    ('delete', f'/life_blocks/{BAD_ID}/contents/abc', None),
+    ('get', f'/transactions/import/{BAD_ID}', None),
+    ('post', f'/schedules/{BAD_ID}/exceptions', {'occurrence': '2026-10-19T09:00:00'}),
+])
+@pytest.mark.parametrize('storage', ['embedded', 'collection'])
+def test_malformed_ids_are_not_found(app, client, auth, method, path, body, storage):
+    app.config['LIFE_BLOCK_CONTENT_STORAGE'] = storage
+    headers, _ = auth
+    response = getattr(client, method)(path, json=body, headers=headers)
+    assert response.status_code == 404, response.get_json()
+    assert 'error' in response.get_json()
+
+
+def test_malformed_ids_are_not_found_in_the_async_app(client, auth, async_app):
+    headers, _ = auth
+
+    async def scenario():
+        quart = async_app.test_client()
+        response = await quart.put(f'/tasks/{BAD_ID}', json={'title': 'x'}, headers=headers)
+        assert response.status_code == 404
+
+    asyncio.run(scenario())
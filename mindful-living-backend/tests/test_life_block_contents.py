@@ -0,0 +1,123 @@
+from datetime import datetime
+
+import pytest
+
+from life_block_contents import migrate_embedded_contents, normalize_legacy_contents
+
+
+def contents_page(client, headers, block_id, **query):
+    response = client.get(f'/life_blocks/{block_id}/contents', query_string=query, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture(params=['embedded', 'collection'])
+def storage(request, app):
+    app.config['LIFE_BLOCK_CONTENT_STORAGE'] = request.param
+    return request.param
+
+
+def test_pages_are_stable_when_items_come_and_go(client, auth, storage):
+    headers, _ = auth
+    block = client.post('/life_blocks', json={
+        'name': 'Reading', 'contents': [{'data': {'n': n}} for n in range(3)]
+    }, headers=headers).get_json()
+    for n in range(3, 6):
+        client.post(f"/life_blocks/{block['id']}/contents", json={'data': {'n': n}}, headers=headers)
+
+    first = contents_page(client, headers, block['id'], limit=2)
+    assert [item['data']['n'] for item in first['items']] == [0, 1]
+    # An offset cursor would skip item 2 after this delete
+    client.delete(f"/life_blocks/{block['id']}/contents/{first['items'][0]['id']}", headers=headers)
+    client.post(f"/life_blocks/{block['id']}/contents", json={'data': {'n': 6}}, headers=headers)
+
+    seen, cursor = [], first['next']
+    while cursor:
+        page = contents_page(client, headers, block['id'], limit=2, cursor=cursor)
+        seen.extend(item['data']['n'] for item in page['items'])
+        cursor = page['next']
+    assert seen == [2, 3, 4, 5, 6]
+
+
+def test_cursor_of_a_deleted_item_still_resumes(client, auth, storage):
+    headers, _ = auth
+    block = client.post('/life_blocks', json={
+        'name': 'Reading', 'contents': [{'data': {'n': n}} for n in range(4)]
+    }, headers=headers).get_json()
+    first = contents_page(client, headers, block['id'], limit=2)
+    client.delete(f"/life_blocks/{block['id']}/contents/{first['items'][-1]['id']}", headers=headers)
+    rest = contents_page(client, headers, block['id'], limit=2, cursor=first['next'])
+    assert [item['data']['n'] for item in rest['items']] == [2, 3]
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', 'AAAAAA'])
+def test_malformed_cursor_is_rejected(client, auth, storage, cursor):
+    headers, _ = auth
+    block = client.post('/life_blocks', json={'name': 'Empty'}, headers=headers).get_json()
+    response = client.get(f"/life_blocks/{block['id']}/contents", query_string={'cursor': cursor}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_duplicate_content_ids_leave_no_block(client, auth, storage, db):
+    headers, _ = auth
+    response = client.post('/life_blocks', json={
+        'name': 'Twins', 'contents': [{'id': 'same', 'data': {}}, {'id': 'same', 'data': {}}]
+    }, headers=headers)
+    assert response.status_code == 400
+    assert db.life_blocks.count_documents({}) == 0
+    assert db.life_block_contents.count_documents({}) == 0
+
+
+def test_client_timestamps_do_not_override_the_server_stamp(client, auth, storage):
+    headers, _ = auth
+    block = client.post('/life_blocks', json={'name': 'Reading', 'contents': [
+        {'id': 'mine', 'createdAt': 'yesterday', '_id': 'x', 'data': {'n': 0}}, {'data': {'n': 1}}
+    ]}, headers=headers).get_json()
+    page = contents_page(client, headers, block['id'], limit=1)
+    assert page['items'][0]['id'] == 'mine'
+    rest = contents_page(client, headers, block['id'], limit=1, cursor=page['next'])
+    assert [item['data']['n'] for item in rest['items']] == [1]
+
+
+def legacy_block(db, user_id):
+    """A block stored before the server stamped ids and creation times"""
+    return str(db.life_blocks.insert_one({
+        'userId': user_id, 'name': 'Old', 'createdAt': datetime(2023, 1, 1),
+        'contents': [
+            {'id': 'a', 'data': {'n': 0}},
+            {'id': 'b', 'createdAt': '2023-02-01T10:00:00Z', 'data': {'n': 1}},
+            {'createdAt': datetime(2023, 3, 1), 'data': {'n': 2}},
+            {'id': 'd', 'createdAt': 'garbage', 'data': {'n': 3}},
+        ]
+    }).inserted_id)
+
+
+def all_items(client, headers, block_id):
+    seen, cursor = [], None
+    while True:
+        page = contents_page(client, headers, block_id, limit=1, **({'cursor': cursor} if cursor else {}))
+        seen.extend(item['data']['n'] for item in page['items'])
+        cursor = page['next']
+        if not cursor:
+            return seen
+
+
+def test_legacy_items_page_without_errors_before_and_after_normalizing(client, auth, db):
+    headers, user_id = auth
+    block_id = legacy_block(db, user_id)
+    all_items(client, headers, block_id)
+
+    assert normalize_legacy_contents() == 1
+    assert normalize_legacy_contents() == 0
+    # Unparseable and missing times fall back to the block's createdAt
+    assert sorted(all_items(client, headers, block_id)) == [0, 1, 2, 3]
+    contents = db.life_blocks.find_one()['contents']
+    assert all(isinstance(item['id'], str) and isinstance(item['createdAt'], datetime) for item in contents)
+
+
+def test_migration_normalizes_legacy_items(client, auth, db, app):
+    headers, user_id = auth
+    block_id = legacy_block(db, user_id)
+    assert migrate_embedded_contents() == (1, 4)
+    app.config['LIFE_BLOCK_CONTENT_STORAGE'] = 'collection'
+    assert sorted(all_items(client, headers, block_id)) == [0, 1, 2, 3]
@@ -0,0 +1,35 @@
+import itertools
+
+import passwords
+from passwords import MAX_ROUNDS, MIN_ROUNDS, PasswordHasher, calibrate_rounds
+
+
+def fake_hash_times(monkeypatch, milliseconds):
+    """Make the calibration hashes appear to take `milliseconds` each, in turn"""
+    clock = itertools.accumulate(itertools.chain.from_iterable((0, ms / 1000) for ms in milliseconds))
+    monkeypatch.setattr(passwords.time, 'perf_counter', lambda: next(clock))
+    monkeypatch.setattr(passwords.bcrypt, 'hashpw', lambda password, salt: b'')
+
+
+def test_calibration_never_goes_below_the_floor(monkeypatch):
+    fake_hash_times(monkeypatch, [500] * 5)
+    assert calibrate_rounds(250) == MIN_ROUNDS == 12
+
+
+def test_calibration_is_capped(monkeypatch):
+    fake_hash_times(monkeypatch, [1] * 5)
+    assert calibrate_rounds(10 ** 6) == MAX_ROUNDS
+
+
+def test_calibration_uses_the_median_hash(monkeypatch):
+    # 15 ms at cost 8 doubles to 480 ms at cost 13; one stalled hash must not lower that
+    fake_hash_times(monkeypatch, [15, 900, 15, 15, 15])
+    assert calibrate_rounds(500) == 13
+
+
+def test_pinned_rounds_are_used_as_given():
+    hasher = PasswordHasher(workers=1, max_queue=1, rounds=4)
+    hashed = hasher.hash('secret1')
+    assert hashed.startswith('$2b$04$')
+    assert hasher.verify('secret1', hashed)
+    assert hasher.needs_rehash('$2b$04$' + 'x' * 53) is False
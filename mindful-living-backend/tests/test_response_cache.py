@@ -0,0 +1,82 @@
+import pytest
+
+import response_cache
+from response_cache import MemoryCache, cache_tags, create_response_cache
+
+
+def cache(app):
+    return app.extensions['response_cache']
+
+
+def test_repeated_gets_are_served_from_the_cache(app, client, auth, commands):
+    headers, _ = auth
+    client.post('/tasks', json={'title': 'Write'}, headers=headers)
+    first = client.get('/tasks', headers=headers)
+
+    commands.clear()
+    again = client.get('/tasks', headers=headers)
+    assert again.get_data() == first.get_data()
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert commands.on('tasks') == []
+    assert cache(app).hits == 1
+
+
+def test_a_write_invalidates_only_its_users_entries_of_the_collection(app, client, auth):
+    headers, user_id = auth
+    other = client.post('/auth/signup', json={'email': 'other@example.com', 'password': 'secret1',
+                                              'firstName': 'O', 'lastName': 'Ther'}).get_json()
+    other_headers = {'Authorization': f"Bearer {other['access_token']}"}
+    for request_headers in (headers, other_headers):
+        client.get('/tasks', headers=request_headers)
+        client.get('/goals', headers=request_headers)
+    assert cache(app).stats()['entries'] == 4
+
+    client.post('/tasks', json={'title': 'Write'}, headers=headers)
+    assert cache(app).stats()['entries'] == 3
+    assert cache(app)._tags.keys() == {*cache_tags(user_id, ['goals']),
+                                       *cache_tags(other['user']['id'], ['tasks', 'goals'])}
+    assert [task['title'] for task in client.get('/tasks', headers=headers).get_json()] == ['Write']
+
+
+def test_errors_streams_and_uncached_routes_are_not_stored(app, client, auth, commands):
+    headers, _ = auth
+    assert client.get('/tasks?limit=0', headers=headers).status_code == 400
+    client.get('/tasks?stream=true', headers=headers)
+    client.get('/transactions', headers=headers)
+    assert cache(app).stats()['entries'] == 0
+
+    commands.clear()
+    client.get('/transactions', headers=headers)
+    assert commands.on('transactions') == ['find']
+
+
+def test_without_a_cache_every_get_queries(monkeypatch, db, auth, commands):
+    import app as backend
+    monkeypatch.setenv('RESPONSE_CACHE', 'none')
+    headers, _ = auth
+    client = backend.create_app().test_client()
+    client.get('/tasks', headers=headers)
+    commands.clear()
+    client.get('/tasks', headers=headers)
+    assert commands.on('tasks') == ['find']
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_response_cache('disk', url=None, max_bytes=1, ttl=1, max_entry_bytes=1)
+
+
+def test_memory_cache_evicts_the_least_recently_used(monkeypatch):
+    memory = MemoryCache(max_bytes=10, ttl=60, max_entry_bytes=6)
+    memory.set('a', b'aaaa', ['u:tasks'])
+    memory.set('b', b'bbbb', ['u:goals'])
+    memory.get('a')
+    memory.set('c', b'cccc', ['u:goals'])
+    memory.set('d', b'd' * 7, ['u:goals'])  # larger than an entry may be
+    assert (memory.get('a'), memory.get('b'), memory.get('c'), memory.get('d')) == (b'aaaa', None, b'cccc', None)
+    assert memory.stats()['evictions'] == 1
+
+    now = response_cache.time.monotonic()
+    monkeypatch.setattr(response_cache.time, 'monotonic', lambda: now + 61)
+    assert memory.get('a') is None
+    assert memory.stats()['bytes'] == 4
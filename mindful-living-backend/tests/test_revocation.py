@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from revocation import RevocationList
+
+
+def revocation_list():
+    return RevocationList(capacity=1000, error_rate=0.001, refresh_seconds=0, rebuild_seconds=3600)
+
+
+def test_a_fresh_worker_loads_revocations_from_the_collection(db):
+    expires = datetime.utcnow() + timedelta(days=1)
+    db.revoked_tokens.insert_many([
+        {'_id': f'jti-{n}', 'userId': 'user', 'expiresAt': expires, 'revokedAt': datetime.utcnow()}
+        for n in range(50)
+    ])
+    worker = revocation_list()
+    assert worker.is_revoked('jti-7') and not worker.is_revoked('never-revoked')
+
+    # Later revocations from other workers arrive with the next incremental refresh
+    revocation_list().revoke('jti-late', 'user', expires)
+    assert worker.is_revoked('jti-late')
+
+
+def test_a_failed_load_is_retried(db, monkeypatch):
+    import revocation
+
+    worker = revocation_list()
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError('no server')
+    with monkeypatch.context() as patch:
+        patch.setattr(revocation.revoked_tokens_collection, 'find', unavailable, raising=False)
+        with pytest.raises(ConnectionError):
+            worker.is_revoked('jti')
+    assert not worker.loaded.is_set()
+
+    assert worker.is_revoked('jti') is False and worker.loaded.is_set()
@@ -0,0 +1,130 @@
+"""Each CRUD route costs one command on the collection it serves.
+
+Revision bumps, analytics deltas and the identity/revocation lookups go to
+their own collections and are not counted here.
+"""
+import pytest
+
+
+def create(client, headers, path, body):
+    response = client.post(path, json=body, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+# Tasks and goals delete with find_one_and_delete, since analytics need the old version
+@pytest.mark.parametrize('path, collection, body, delete', [
+    ('/tasks', 'tasks', {'title': 'Write report', 'status': 'pending', 'dueDate': '2026-10-20T09:00:00Z'},
+     'findAndModify'),
+    ('/goals', 'goals', {'title': 'Run a marathon', 'targetAmount': 100}, 'findAndModify'),
+    ('/life_blocks', 'life_blocks', {'name': 'Journal', 'contentTypes': [{'name': 'Entry'}]}, 'delete'),
+])
+def test_create_update_delete_is_one_command_each(client, auth, commands, path, collection, body, delete):
+    headers, _ = auth
+    commands.clear()
+    document = create(client, headers, path, body)
+    assert commands.on(collection) == ['insert']
+
+    commands.clear()
+    assert client.get(f"{path}/{document['id']}", headers=headers).status_code == 200
+    assert commands.on(collection) == ['find']
+
+    commands.clear()
+    assert client.put(f"{path}/{document['id']}", json={'title': 'Renamed'}, headers=headers).status_code == 200
+    assert commands.on(collection) == ['findAndModify']
+
+    commands.clear()
+    assert client.delete(f"{path}/{document['id']}", headers=headers).status_code == 200
+    assert commands.on(collection) == [delete]
+
+
+def test_task_update_and_delete_use_find_and_modify(client, auth, commands):
+    headers, _ = auth
+    task = create(client, headers, '/tasks', {'title': 'Call bank', 'status': 'pending'})
+
+    commands.clear()
+    response = client.put(f"/tasks/{task['id']}", json={'status': 'completed'}, headers=headers)
+    assert response.get_json()['status'] == 'completed'
+    assert commands.on('tasks') == ['findAndModify']
+
+    commands.clear()
+    assert client.delete(f"/tasks/{task['id']}", headers=headers).get_json()['deleted'] is True
+    assert commands.on('tasks') == ['findAndModify']
+
+
+def test_missing_task_is_one_command(client, auth, commands):
+    headers, _ = auth
+    commands.clear()
+    response = client.put('/tasks/0123456789abcdef01234567', json={'status': 'done'}, headers=headers)
+    assert response.status_code == 404
+    assert commands.on('tasks') == ['findAndModify']
+
+
+def test_task_pages_are_one_find_each(client, auth, commands):
+    headers, _ = auth
+    ids = [create(client, headers, '/tasks', {'title': f'Task {n}'})['id'] for n in range(5)]
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        commands.clear()
+        query = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        body = client.get('/tasks', query_string=query, headers=headers).get_json()
+        assert commands.on('tasks') == ['find']
+        seen.extend(item['id'] for item in body['items'])
+        pages += 1
+        cursor = body['next']
+        if not cursor:
+            break
+    assert seen == ids
+    assert pages == 3
+
+
+def test_legacy_task_list_is_one_find(client, auth, commands):
+    headers, user_id = auth
+    create(client, headers, '/tasks', {'title': 'Only task'})
+    commands.clear()
+    body = client.get('/tasks', headers=headers).get_json()
+    assert [task['userId'] for task in body] == [user_id]
+    assert commands.on('tasks') == ['find']
+
+
+def test_embedded_content_writes_are_one_command_each(client, auth, commands):
+    headers, _ = auth
+    block = create(client, headers, '/life_blocks', {'name': 'Reading'})
+    path = f"/life_blocks/{block['id']}/contents"
+
+    commands.clear()
+    response = client.post(path, json={'contentTypeId': 'book', 'data': {'title': 'Dune'}}, headers=headers)
+    assert response.status_code == 200
+    content_id = response.get_json()['contents'][0]['id']
+    assert commands.on('life_blocks') == ['findAndModify']
+
+    commands.clear()
+    response = client.put(f'{path}/{content_id}', json={'data': {'title': 'Dune Messiah'}}, headers=headers)
+    assert response.status_code == 200
+    assert commands.on('life_blocks') == ['findAndModify']
+
+    commands.clear()
+    assert client.delete(f'{path}/{content_id}', headers=headers).status_code == 200
+    assert commands.on('life_blocks') == ['findAndModify']
+
+
+def test_collection_content_writes_touch_only_the_item(app, client, auth, commands):
+    app.config['LIFE_BLOCK_CONTENT_STORAGE'] = 'collection'
+    headers, _ = auth
+    block = create(client, headers, '/life_blocks', {'name': 'Reading'})
+    path = f"/life_blocks/{block['id']}/contents"
+
+    commands.clear()
+    content = create(client, headers, path, {'contentTypeId': 'book', 'data': {'title': 'Dune'}})
+    assert commands.on('life_block_contents') == ['insert']
+    # The parent's contentCount update doubles as the ownership check
+    assert commands.on('life_blocks') == ['update']
+
+    commands.clear()
+    response = client.put(f"{path}/{content['id']}", json={'data': {'title': 'Emma'}}, headers=headers)
+    assert response.get_json()['data'] == {'title': 'Emma'}
+    assert commands.on('life_block_contents') == ['findAndModify']
+    assert commands.on('life_blocks') == []
@@ -0,0 +1,146 @@
+"""Recurring events: expansion in UTC windows, exceptions, and /schedules windows."""
+import asyncio
+
+import pytest
+from bson.objectid import ObjectId
+
+DAILY = {'title': 'Standup', 'startTime': '2026-10-19T09:00:00Z', 'endTime': '2026-10-19T09:15:00Z',
+         'rrule': 'FREQ=DAILY'}
+
+
+@pytest.fixture
+def series(client, auth):
+    headers, _ = auth
+    response = client.post('/schedules', json=DAILY, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def starts(events):
+    return [event['startTime'] for event in events]
+
+
+def test_series_are_expanded_in_every_window(client, auth, series):
+    headers, _ = auth
+    client.post('/schedules', json={'title': 'Dentist', 'startTime': '2026-11-03T14:00:00Z'}, headers=headers)
+    # Long after the first occurrence the series is still there, and the single event sorts in
+    events = client.get('/schedules?from=2026-11-02&to=2026-11-05', headers=headers).get_json()
+    assert starts(events) == ['2026-11-02T09:00:00Z', '2026-11-03T09:00:00Z', '2026-11-03T14:00:00Z',
+                              '2026-11-04T09:00:00Z']
+    assert events[0]['endTime'] == '2026-11-02T09:15:00Z' and events[0]['seriesId'] == series
+    assert events == client.get('/schedules/occurrences?from=2026-11-02&to=2026-11-05', headers=headers).get_json()
+    # Without a window the series is one document
+    assert len(client.get('/schedules', headers=headers).get_json()) == 2
+
+
+def test_windows_are_utc(client, auth, series):
+    headers, _ = auth
+    # 09:00Z is 11:00 at +02:00: a window ending at 10:00+02:00 stops before the 20th's occurrence
+    events = client.get('/schedules/occurrences', query_string={
+        'from': '2026-10-19T00:00:00+02:00', 'to': '2026-10-20T10:00:00+02:00'}, headers=headers).get_json()
+    assert starts(events) == ['2026-10-19T09:00:00Z']
+    # The window is [from, to): an occurrence starting exactly at `to` is left out
+    events = client.get('/schedules?from=2026-10-19T09:00:00&to=2026-10-20T09:00:00', headers=headers).get_json()
+    assert starts(events) == ['2026-10-19T09:00:00Z']
+
+
+@pytest.mark.parametrize('query, error', [
+    ('from=2026-10-19', 'from and to are required'),
+    ('from=tomorrow&to=2026-10-26', 'from must be an ISO 8601 date or datetime'),
+    ('from=2026-10-26&to=2026-10-19', 'to must be after from'),
+    ('from=2026-01-01&to=2027-06-01', 'The window may span at most 366 days'),
+    ('from=2026-10-19&to=2026-10-26&limit=10', 'A schedule window is not paginated or streamed'),
+])
+def test_bad_schedule_windows(client, auth, query, error):
+    headers, _ = auth
+    response = client.get(f'/schedules?{query}', headers=headers)
+    assert response.status_code == 400 and response.get_json()['error'] == error
+
+
+def test_exceptions_cancel_move_and_replace(client, auth, series):
+    headers, _ = auth
+    url = f'/schedules/{series}/exceptions'
+    assert client.post(url, json={'occurrence': '2026-10-20T09:00:00Z', 'cancelled': True},
+                       headers=headers).status_code == 200
+    moved = client.post(url, json={'occurrence': '2026-10-21T09:00:00Z', 'startTime': '2026-10-23T16:00:00Z',
+                                   'title': '$5 coffee instead'}, headers=headers)
+    assert moved.status_code == 200 and len(moved.get_json()['exceptions']) == 2
+
+    events = client.get('/schedules?from=2026-10-19&to=2026-10-23', headers=headers).get_json()
+    assert starts(events) == ['2026-10-19T09:00:00Z', '2026-10-22T09:00:00Z']
+    events = client.get('/schedules?from=2026-10-23&to=2026-10-24', headers=headers).get_json()
+    assert starts(events) == ['2026-10-23T09:00:00Z', '2026-10-23T16:00:00Z']
+    assert events[1]['title'] == '$5 coffee instead' and events[1]['occurrenceStart'] == '2026-10-21T09:00:00Z'
+    assert events[1]['endTime'] == '2026-10-23T16:15:00Z'
+
+    # A second exception for the same occurrence replaces the first
+    client.post(url, json={'occurrence': '2026-10-20T09:00:00Z', 'title': 'Back on'}, headers=headers)
+    events = client.get('/schedules?from=2026-10-20&to=2026-10-21', headers=headers).get_json()
+    assert [event['title'] for event in events] == ['Back on']
+
+
+def test_an_exception_is_checked_then_written(client, auth, series, commands):
+    headers, _ = auth
+    commands.clear()
+    response = client.post(f'/schedules/{series}/exceptions', json={'occurrence': '2026-10-20T09:00:00Z',
+                                                                     'cancelled': True}, headers=headers)
+    assert response.status_code == 200
+    assert commands.on('schedules') == ['find', 'findAndModify']
+
+    commands.clear()
+    response = client.post(f'/schedules/{series}/exceptions', json={'occurrence': '2026-10-20T10:00:00Z',
+                                                                     'cancelled': True}, headers=headers)
+    assert response.status_code == 400
+    assert commands.on('schedules') == ['find']
+
+
+def test_an_exception_is_not_written_over_a_changed_rule(client, auth, series, db, monkeypatch):
+    import app as backend
+    headers, _ = auth
+    check = backend.is_occurrence
+
+    def check_then_change(series_document, when):
+        # Another request changes the rule between the check and the write
+        db.schedules.update_one({'_id': ObjectId(series)}, {'$set': {'recurrence.interval': 2}})
+        return check(series_document, when)
+
+    monkeypatch.setattr(backend, 'is_occurrence', check_then_change)
+    response = client.post(f'/schedules/{series}/exceptions', json={'occurrence': '2026-10-20T09:00:00Z',
+                                                                     'cancelled': True}, headers=headers)
+    assert response.status_code == 409
+    assert not db.schedules.find_one({'_id': ObjectId(series)}).get('exceptions')
+
+
+def test_exception_errors(client, auth, series, db):
+    headers, _ = auth
+    url = f'/schedules/{series}/exceptions'
+    response = client.post(url, json={'occurrence': '2026-10-20T10:00:00Z', 'cancelled': True}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'occurrence is not an occurrence of this event'
+    assert not db.schedules.find_one({'_id': ObjectId(series)}).get('exceptions')
+
+    assert client.post(url, json={'cancelled': True}, headers=headers).status_code == 400
+    for override in ({'startTime': 'tomorrow'}, {'endTime': 1700000000}, {'startTime': None}):
+        response = client.post(url, json={'occurrence': '2026-10-20T09:00:00Z', **override}, headers=headers)
+        assert response.status_code == 400 and response.get_json()['error'].endswith('must be an ISO 8601 datetime')
+    assert not db.schedules.find_one({'_id': ObjectId(series)}).get('exceptions')
+    single = client.post('/schedules', json={'title': 'Once', 'startTime': '2026-10-19T12:00:00Z'},
+                         headers=headers).get_json()['id']
+    response = client.post(f'/schedules/{single}/exceptions', json={'occurrence': '2026-10-19T12:00:00Z'},
+                           headers=headers)
+    assert response.status_code == 400 and response.get_json()['error'] == 'Not a recurring event'
+
+    other = client.post('/auth/signup', json={'email': 'other@example.com', 'password': 'secret1',
+                                              'firstName': 'O', 'lastName': 'Ther'}).get_json()
+    response = client.post(url, json={'occurrence': '2026-10-20T09:00:00Z', 'cancelled': True},
+                           headers={'Authorization': f"Bearer {other['access_token']}"})
+    assert response.status_code == 404
+
+
+def test_async_schedule_windows_expand_series(async_app, client, auth, series):
+    headers, _ = auth
+
+    async def scenario():
+        response = await async_app.test_client().get('/schedules?from=2026-11-02&to=2026-11-04', headers=headers)
+        return await response.get_json()
+    assert starts(asyncio.run(scenario())) == ['2026-11-02T09:00:00Z', '2026-11-03T09:00:00Z']
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson.objectid import ObjectId
+
+from serialization import MongoJSONProvider, OrjsonProvider, to_public
+
+DOCUMENT = {
+    'naive': datetime(2026, 10, 15, 9, 30),
+    'millis': datetime(2026, 10, 15, 9, 30, 5, 123000),
+    'aware': datetime(2026, 10, 15, 11, 30, tzinfo=timezone(timedelta(hours=2))),
+    'id': ObjectId('64b000000000000000000001'),
+}
+EXPECTED = ('{"aware":"Thu, 15 Oct 2026 09:30:00 GMT","id":"64b000000000000000000001",'
+            '"millis":"Thu, 15 Oct 2026 09:30:05 GMT","naive":"Thu, 15 Oct 2026 09:30:00 GMT"}')
+
+
+@pytest.mark.parametrize('provider', [MongoJSONProvider, OrjsonProvider])
+def test_datetimes_are_http_dates(app, provider):
+    assert provider(app).dumps(DOCUMENT, separators=(',', ':')) == EXPECTED
+
+
+def test_calendar_times_are_iso_8601_to_the_millisecond():
+    document = to_public({
+        '_id': ObjectId('64b000000000000000000001'),
+        'startTime': datetime(2026, 10, 15, 9, 30, 5, 123456),
+        'endTime': datetime(2026, 10, 15, 10, 0),
+        'createdAt': datetime(2026, 10, 15, 9, 0),
+        'exceptions': [{'occurrence': datetime(2026, 10, 16, 9, 30, tzinfo=timezone.utc)}],
+        'recurrence': {'until': None},
+    })
+    assert document['startTime'] == '2026-10-15T09:30:05.123Z'
+    assert document['endTime'] == '2026-10-15T10:00:00Z'
+    assert document['exceptions'] == [{'occurrence': '2026-10-16T09:30:00Z'}]
+    assert isinstance(document['createdAt'], datetime)
+
+
+def test_dates_round_trip_through_the_api(client, auth):
+    headers, _ = auth
+    task = client.post('/tasks', json={'title': 'Due', 'dueDate': '2026-10-20T09:00:00.123456Z'},
+                       headers=headers).get_json()
+    assert task['dueDate'] == '2026-10-20T09:00:00.123Z'
+    # Read back from MongoDB (milliseconds only) it is the same string
+    assert client.get(f"/tasks/{task['id']}", headers=headers).get_json()['dueDate'] == task['dueDate']
+    assert task['createdAt'].endswith(' GMT')
@@ -0,0 +1,107 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from statement_import import RowError, parse_amount, parse_date, parse_ofx, run_import_job
+
+
+@pytest.fixture
+def dedupe(db):
+    """The unique importHash index; mongomock gets it only while every transaction is imported"""
+    if 'userId_importHash_unique' not in db.transactions.index_information():
+        db.transactions.create_index([('userId', 1), ('importHash', 1)], name='userId_importHash_unique', unique=True)
+
+
+def import_file(client, headers, body, **query):
+    response = client.post('/transactions/import', query_string=query, data=body, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.mark.parametrize('text, amount', [
+    ('12.50', 12.5), ('-$1,234.56', -1234.56), ('(12.00)', -12.0), ('+7', 7.0),
+])
+def test_amounts(text, amount):
+    assert parse_amount(text) == amount
+
+
+@pytest.mark.parametrize('text', ['', 'twelve'])
+def test_invalid_amounts(text):
+    with pytest.raises(RowError):
+        parse_amount(text)
+
+
+@pytest.mark.parametrize('text', ['2024-03-05', '03/05/2024', '05.03.2024', '5 Mar 2024', 'Mar 05, 2024'])
+def test_dates(text):
+    assert parse_date(text) == '2024-03-05'
+
+
+def test_ofx_transactions_carry_their_account():
+    ofx = (b'<OFX><BANKACCTFROM><ACCTID>111</BANKACCTFROM>'
+           b'<STMTTRN><DTPOSTED>20240305<TRNAMT>-3.50<FITID>1<NAME>Coffee</STMTTRN></OFX>')
+    [(_, row)] = parse_ofx(io.BytesIO(ofx))
+    assert row == {'description': 'Coffee', 'amount': -3.5, 'category': 'Uncategorized',
+                   'date': '2024-03-05', 'fitId': '1', 'account': '111'}
+
+
+def test_duplicate_rows_of_an_unsorted_csv_are_kept_once_each(client, auth, dedupe, db):
+    headers, _ = auth
+    csv = (b'Date,Description,Amount\n'
+           b'2024-03-05,Coffee,-3.50\n'
+           b'2024-03-04,Bread,-2.00\n'
+           b'2024-03-05,Coffee,-3.50\n')
+    assert import_file(client, headers, csv)['inserted'] == 3
+    again = import_file(client, headers, csv)
+    assert (again['inserted'], again['duplicates']) == (0, 3)
+    assert db.transactions.count_documents({'description': 'Coffee'}) == 2
+
+
+def test_reused_fitids_of_different_accounts_are_both_kept(client, auth, dedupe, db):
+    headers, _ = auth
+    for account in (b'111', b'222'):
+        ofx = (b'<OFX><BANKACCTFROM><ACCTID>' + account + b'</BANKACCTFROM>'
+               b'<STMTTRN><DTPOSTED>20240305<TRNAMT>-3.50<FITID>1<NAME>Coffee</STMTTRN></OFX>')
+        assert import_file(client, headers, ofx, format='ofx')['inserted'] == 1
+    assert db.transactions.count_documents({}) == 2
+    assert 'account' not in db.transactions.find_one()
+
+
+def test_rejected_rows_are_reported_with_their_lines(client, auth):
+    headers, _ = auth
+    counts = import_file(client, headers, b'Date,Amount\n2024-03-05,-1\nsoon,-2\n2024-03-06,lots\n')
+    assert (counts['inserted'], counts['rejected']) == (1, 2)
+    assert [error['line'] for error in counts['errors']] == [3, 4]
+
+
+def test_unreadable_csv_is_a_bad_request(client, auth):
+    headers, _ = auth
+    csv = b'Date,Description,Amount\n2024-03-05,' + b'x' * 200_000 + b',-1\n'
+    response = client.post('/transactions/import', data=csv, headers=headers)
+    assert response.status_code == 400
+    assert 'after line 1' in response.get_json()['error']
+
+
+def running_job(db, user_id, heartbeat):
+    return db.import_jobs.insert_one({
+        'userId': user_id, 'status': 'running', 'createdAt': heartbeat, 'heartbeatAt': heartbeat
+    }).inserted_id
+
+
+def test_a_job_that_stopped_reporting_is_failed(client, auth, db):
+    headers, user_id = auth
+    stale = running_job(db, user_id, datetime.utcnow() - timedelta(hours=1))
+    live = running_job(db, user_id, datetime.utcnow())
+    assert client.get(f'/transactions/import/{stale}', headers=headers).get_json()['status'] == 'failed'
+    assert client.get(f'/transactions/import/{live}', headers=headers).get_json()['status'] == 'running'
+
+
+def test_an_expired_job_is_not_run(auth, db, tmp_path):
+    _, user_id = auth
+    job_id = running_job(db, user_id, datetime.utcnow())
+    db.import_jobs.update_one({'_id': job_id}, {'$set': {'status': 'failed'}})
+    path = tmp_path / 'statement.csv'
+    path.write_bytes(b'Date,Amount\n2024-03-05,-1\n')
+    run_import_job(job_id, user_id, str(path), 'csv', 10)
+    assert db.transactions.count_documents({}) == 0
+    assert not path.exists()
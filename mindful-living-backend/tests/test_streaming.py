@@ -0,0 +1,49 @@
+"""?stream=true sends the whole list as a chunked JSON array, STREAM_BATCH_SIZE documents per chunk."""
+import gzip
+import json
+
+import pytest
+
+
+@pytest.fixture
+def tasks(client, auth):
+    headers, _ = auth
+    for n in range(5):
+        client.post('/tasks', json={'title': f'Task {n}', 'dueDate': f'2026-10-2{n}T09:00:00Z'}, headers=headers)
+    return headers
+
+
+def chunks(response):
+    return [chunk.decode('utf-8') for chunk in response.iter_encoded()]
+
+
+def test_documents_are_sent_a_batch_at_a_time(app, client, tasks):
+    app.config['STREAM_BATCH_SIZE'] = 2
+    response = client.get('/tasks?stream=true', headers=tasks, buffered=False)
+    assert response.is_streamed and response.mimetype == 'application/json'
+    sent = chunks(response)
+    assert [len(json.loads(f"[{chunk.lstrip(',')}]")) for chunk in sent[1:-1]] == [2, 2, 1]
+    assert (sent[0], sent[-1]) == ('[', ']')
+    assert json.loads(''.join(sent)) == client.get('/tasks', headers=tasks).get_json()
+
+
+def test_an_empty_list_streams_as_an_empty_array(client, auth):
+    headers, _ = auth
+    assert chunks(client.get('/goals?stream=true', headers=headers, buffered=False)) == ['[', ']']
+
+
+def test_streams_combine_with_fields_and_windows(client, tasks):
+    streamed = client.get('/tasks?stream=true&fields=title&from=2026-10-21&to=2026-10-23', headers=tasks)
+    assert [set(task) for task in streamed.get_json()] == [{'id', 'title'}] * 2
+    assert [task['title'] for task in streamed.get_json()] == ['Task 1', 'Task 2']
+
+
+def test_invalid_streams_are_rejected_before_streaming(client, tasks):
+    response = client.get('/tasks?stream=true&fields=bad field', headers=tasks)
+    assert response.status_code == 400 and response.get_json() == {'error': 'Invalid field: bad field'}
+
+
+def test_streams_are_compressed(client, tasks):
+    response = client.get('/tasks?stream=true', headers={**tasks, 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.get_data()))) == 5
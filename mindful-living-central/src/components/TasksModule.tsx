@@ -151,7 +151,7 @@ const TasksModule = () => {
             <div className="flex items-center justify-between text-sm text-gray-500">
               <div className="flex items-center space-x-1">
                 <Calendar className="w-4 h-4" />
-                <span>{task.dueDate}</span>
+                <span>{task.dueDate ? new Date(task.dueDate).toLocaleDateString() : ''}</span>
               </div>
               <span className="bg-gray-100 px-2 py-1 rounded-full text-xs">
                 {task.category}